@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from app.ai.client import AsyncChatClient, ChatClient
+from app.ai.report_cache import ReportCache
+from app.ai.report_jobs import job_key
+from app.ai.tokens import TokenBudget
+from app.ai.trench_report import TrenchInput, agenerate_trench_report
+from app.utils.instrumentation import timed
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BatchReport:
+    token_address: Optional[str]
+    markdown: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+async def generate_reports(inputs: Sequence[TrenchInput], client: AsyncChatClient | ChatClient,
+                           concurrency: int = 4, budget: Optional[TokenBudget] = None,
+                           cache: Optional[ReportCache] = None, model: str = "gpt-4o",
+                           temperature: float = 0.2, max_tokens: int = 1000) -> List[BatchReport]:
+    """Trench reports for many tokens at once, in input order.
+
+    At most ``concurrency`` LLM calls are in flight, each waits on ``budget``
+    (tokens per minute) before it is sent, cached reports are reused and
+    duplicate inputs in the batch are generated once. A failed report is
+    returned with its ``error`` rather than failing the batch.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def one(data: TrenchInput) -> BatchReport:
+        address = data.token.get("address") or data.token.get("token_address")
+        cached = cache.get(data) if cache is not None else None
+        if cached is not None:
+            return BatchReport(address, cached, cached=True)
+        async with semaphore:
+            try:
+                with timed("report"):
+                    markdown = await agenerate_trench_report(data, client, model=model, temperature=temperature,
+                                                             max_tokens=max_tokens, budget=budget)
+            except Exception as e:
+                logger.exception("batch report for %s failed", address)
+                return BatchReport(address, error=str(e))
+        if cache is not None:
+            cache.put(data, markdown)
+        return BatchReport(address, markdown)
+
+    keys = [cache.key(data) if cache is not None else job_key(data) for data in inputs]
+    for key, data in zip(keys, inputs):
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(one(data))
+    done = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+    return [done[key] for key in keys]
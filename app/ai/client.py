@@ -1,20 +1,28 @@
 from __future__ import annotations
 
 import os
-from typing import Protocol
-
-from openai import OpenAI
+from typing import Iterator, Protocol
 
 
 class ChatClient(Protocol):
     def complete(self, system_prompt: str, user_prompt: str, model: str, temperature: float, max_tokens: int) -> str: ...
 
 
+class AsyncChatClient(Protocol):
+    async def complete(self, system_prompt: str, user_prompt: str, model: str, temperature: float, max_tokens: int) -> str: ...
+
+
+class StreamingChatClient(ChatClient, Protocol):
+    def stream(self, system_prompt: str, user_prompt: str, model: str, temperature: float, max_tokens: int) -> Iterator[str]: ...
+
+
 class OpenAIChatClient:
     def __init__(self, api_key: str | None = None, base_url: str | None = None):
         api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set")
+        # Imported on first use: the SDK takes ~0.4 s to import and mock mode never needs it
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key, base_url=base_url)
 
     def complete(self, system_prompt: str, user_prompt: str, model: str, temperature: float = 0.2, max_tokens: int = 1000) -> str:
@@ -32,7 +40,59 @@ class OpenAIChatClient:
             return resp.choices[0].message.content or ""
         except Exception as e:
             # Return a basic fallback report instead of crashing
-            return f"**AI Analysis Unavailable**\n\nError: {str(e)}\n\nPlease review the numerical scores manually."
+            return _fallback_report(e)
+
+    def stream(self, system_prompt: str, user_prompt: str, model: str, temperature: float = 0.2, max_tokens: int = 1000) -> Iterator[str]:
+        """Yield the completion's text as it is generated"""
+        try:
+            chunks = self.client.chat.completions.create(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                timeout=30.0,
+                stream=True,
+            )
+            for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            yield _fallback_report(e)
+
+
+class AsyncOpenAIChatClient:
+    """``OpenAIChatClient`` on the async API, for handlers and batches that must not block the event loop"""
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None):
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not set")
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    async def complete(self, system_prompt: str, user_prompt: str, model: str, temperature: float = 0.2, max_tokens: int = 1000) -> str:
+        try:
+            resp = await self.client.chat.completions.create(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                timeout=30.0,
+            )
+            return resp.choices[0].message.content or ""
+        except Exception as e:
+            return _fallback_report(e)
+
+
+def _fallback_report(error: Exception) -> str:
+    # Return a basic fallback report instead of crashing
+    return f"**AI Analysis Unavailable**\n\nError: {str(error)}\n\nPlease review the numerical scores manually."
 
 
 class MockChatClient:
@@ -42,4 +102,5 @@ class MockChatClient:
     def complete(self, system_prompt: str, user_prompt: str, model: str, temperature: float, max_tokens: int) -> str:
         return self.response
 
-
+    def stream(self, system_prompt: str, user_prompt: str, model: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        yield from self.response.splitlines(keepends=True)
@@ -0,0 +1,170 @@
+"""Local OpenAI-compatible chat server for tests and load runs.
+
+Answers ``POST /v1/chat/completions`` (plain and ``stream=true``) with a
+canned report after a configurable delay, and records how many requests
+were in flight at once and how many tokens they used, so concurrency caps
+and token budgets can be checked without an API key. Prefill can cost time
+per uncached prompt token; like OpenAI's automatic prompt caching, a prompt
+prefix of at least ``cache_min_tokens`` seen before is cached in 128-token
+blocks and reported as ``usage.prompt_tokens_details.cached_tokens``::
+
+    python -m app.ai.mock_chat_server --port 8901 --latency lognormal:800:0.4
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8901/v1 ...
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from app.ai.tokens import CHARS_PER_TOKEN, estimate_tokens
+from extractors.provider_sim import LatencyModel
+
+DEFAULT_REPLY = "**🎯 $MOCK – Momentum Play**\n📍 **The Intel:** Mock analysis.\n\n**⚡ Bottom Line:** NEUTRAL"
+
+
+class MockChatServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply: str = DEFAULT_REPLY,
+                 latency: str = "none", seed: int = 0, prefill_ms_per_1k_tokens: float = 0.0,
+                 cache_min_tokens: int = 1024):
+        self.reply = reply
+        self.latency = LatencyModel(latency, seed)
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self.cache_min_tokens = cache_min_tokens
+        self._prompts: deque = deque(maxlen=64)
+        self.requests: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL for the OpenAI clients (``base_url``)"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def total_tokens(self) -> int:
+        with self._lock:
+            return sum(r["prompt_tokens"] + r["completion_tokens"] for r in self.requests)
+
+    def start(self) -> "MockChatServer":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockChatServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        body = json.loads(handler.rfile.read(int(handler.headers.get("Content-Length", 0))) or b"{}")
+        if not handler.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(handler, 404, {"error": {"message": "unknown endpoint"}})
+            return
+        prompt = "".join(m.get("content") or "" for m in body.get("messages", []))
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in body.get("messages", []))
+        completion_tokens = min(estimate_tokens(self.reply), body.get("max_tokens") or 10**9)
+        with self._lock:
+            cached_tokens = self._cached_tokens(prompt)
+            self._prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.requests.append({"started": time.monotonic(), "prompt_tokens": prompt_tokens,
+                                  "cached_tokens": cached_tokens, "completion_tokens": completion_tokens,
+                                  "model": body.get("model")})
+        try:
+            prefill = (prompt_tokens - cached_tokens) * self.prefill_ms_per_1k_tokens / 1_000_000
+            time.sleep(self.latency.sample() + prefill)
+            if body.get("stream"):
+                self._send_stream(handler, body)
+            else:
+                self._send_json(handler, 200, {
+                    "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": self.reply}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens,
+                              "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+                })
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _cached_tokens(self, prompt: str) -> int:
+        """Tokens of the longest previously seen prefix, in 128-token blocks once past ``cache_min_tokens``"""
+        shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._prompts), default=0)
+        tokens = shared // CHARS_PER_TOKEN
+        return 0 if tokens < self.cache_min_tokens else tokens - tokens % 128
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _send_stream(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        for text in self.reply.splitlines(keepends=True) + [None]:
+            chunk = {
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": text} if text else {},
+                             "finish_reason": None if text else "stop"}],
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            handler.wfile.flush()
+        handler.wfile.write(b"data: [DONE]\n\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", default="none", help="none, fixed:<ms>, uniform:<lo>:<hi> or lognormal:<median>:<sigma>")
+    parser.add_argument("--prefill-ms", type=float, default=0.0, help="ms per 1k uncached prompt tokens")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024)
+    args = parser.parse_args(argv)
+    server = MockChatServer(args.host, args.port, latency=args.latency,
+                            prefill_ms_per_1k_tokens=args.prefill_ms, cache_min_tokens=args.cache_min_tokens)
+    print(f"Mock chat server on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.ai.trench_report import TrenchInput
+from app.utils.instrumentation import CACHE_REQUESTS, inc
+
+# Significant digits kept of metric values in the fingerprint
+METRIC_DIGITS = 2
+
+# Rough fixed cost of one entry besides the markdown (key string, tuple, OrderedDict slot)
+_PER_ENTRY_OVERHEAD_BYTES = 300
+
+
+def _quantize(value: object, digits: int = METRIC_DIGITS) -> object:
+    """Numbers rounded to ``digits`` significant digits, recursively through dicts and lists"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        if value == 0 or not math.isfinite(value):
+            return value
+        return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+    if isinstance(value, dict):
+        return {str(k): _quantize(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_quantize(v, digits) for v in value]
+    return str(value)
+
+
+class ReportCache:
+    """Finished trench reports keyed by token, score bucket and a fingerprint of the report inputs.
+
+    Scores fall into ``score_bucket``-point buckets and metrics are compared
+    at two significant digits, so a token whose numbers barely moved reuses
+    its report. The timestamp is not part of the key. Entries expire after
+    ``ttl`` seconds; past ``max_entries`` the least recently used is evicted.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024, score_bucket: float = 2.5):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.score_bucket = score_bucket
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def key(self, data: TrenchInput) -> str:
+        address = data.token.get("address") or data.token.get("token_address") or data.token.get("symbol", "")
+        bucket = math.floor(float(data.scores.get("total", 0) or 0) / self.score_bucket)
+        fingerprint = {
+            "token": {k: data.token.get(k) for k in ("symbol", "name")},
+            "scores": {k: math.floor(float(v or 0) / self.score_bucket) for k, v in sorted(data.scores.items())},
+            "signals": list(data.signals[:6]),
+            "prefilter": _quantize(data.prefilter),
+            "metrics": _quantize(data.metrics),
+            "timeframe": data.timeframe,
+        }
+        digest = hashlib.sha1(json.dumps(fingerprint, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{address}|{bucket}|{digest[:16]}"
+
+    def get(self, data: TrenchInput, now: Optional[float] = None) -> Optional[str]:
+        key = self.key(data)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        inc(CACHE_REQUESTS, "report", "miss" if entry is None else "hit")
+        return None if entry is None else entry[1]
+
+    def put(self, data: TrenchInput, markdown: str, now: Optional[float] = None):
+        key = self.key(data)
+        with self._lock:
+            self._entries[key] = (time.time() if now is None else now, markdown)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def estimated_bytes(self) -> int:
+        with self._lock:
+            return sum(sys.getsizeof(markdown) for _, markdown in self._entries.values()) \
+                + len(self._entries) * _PER_ENTRY_OVERHEAD_BYTES
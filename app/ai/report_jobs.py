@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Optional
+
+from app.ai.report_cache import ReportCache
+from app.ai.trench_report import TrenchInput
+from app.utils.instrumentation import timed
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class ReportQueueFull(RuntimeError):
+    pass
+
+
+def job_key(data: TrenchInput) -> str:
+    """Identity of a report request; the timestamp alone does not make a report different"""
+    fields = asdict(data)
+    fields.pop("as_of_utc", None)
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class ReportJob:
+    id: str
+    key: str
+    token_address: Optional[str]
+    status: str = PENDING
+    markdown: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    future: Future = field(default_factory=Future, repr=False)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "report_id": self.id,
+            "status": self.status,
+            "token_address": self.token_address,
+            "markdown": self.markdown,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ReportJobQueue:
+    """Background trench report generation.
+
+    At most ``max_concurrency`` reports are generated at once (the LLM is the
+    bottleneck), at most ``max_pending`` wait behind them, and a request
+    identical to a job that is still pending or running joins that job instead
+    of queueing another. Finished jobs are kept for ``result_ttl`` seconds,
+    and at most ``max_jobs`` jobs are kept in total, so clients can fetch them.
+
+    With a ``cache``, a cached report finishes the job on submit, finished
+    reports are stored in it, and pending jobs are matched by its key, so
+    near-identical requests share one job too.
+    """
+
+    def __init__(self, generate: Callable[[TrenchInput], str], max_concurrency: int = 4,
+                 max_pending: int = 100, result_ttl: float = 600, max_jobs: int = 1000,
+                 cache: Optional[ReportCache] = None):
+        self.generate = generate
+        self.cache = cache
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="dvm-report")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._active: Dict[str, ReportJob] = {}  # key -> pending or running job
+
+    def submit(self, data: TrenchInput) -> ReportJob:
+        key = self.cache.key(data) if self.cache is not None else job_key(data)
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+        cached = self.cache.get(data) if self.cache is not None else None
+        with self._lock:
+            if cached is not None:
+                self._prune()
+                job = ReportJob(id=uuid.uuid4().hex, key=key, token_address=data.token.get("address"),
+                                status=DONE, markdown=cached)
+                job.finished_at = job.created_at
+                job.future.set_result(job)
+                self._jobs[job.id] = job
+                return job
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            if len(self._active) >= self.max_pending:
+                raise ReportQueueFull(f"{len(self._active)} reports already queued")
+            self._prune()
+            job = ReportJob(id=uuid.uuid4().hex, key=key, token_address=data.token.get("address"))
+            self._jobs[job.id] = job
+            self._active[key] = job
+        self._executor.submit(self._run, job, data)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job: ReportJob, timeout: Optional[float]) -> ReportJob:
+        """Wait up to ``timeout`` seconds (``None``: until finished) without blocking the event loop"""
+        if not job.future.done() and (timeout is None or timeout > 0):
+            # asyncio.wait leaves the job running when the timeout expires
+            await asyncio.wait([asyncio.wrap_future(job.future)], timeout=timeout)
+        return job
+
+    def _run(self, job: ReportJob, data: TrenchInput):
+        job.status = RUNNING
+        try:
+            with timed("report"):
+                job.markdown = self.generate(data)
+            if self.cache is not None:
+                self.cache.put(data, job.markdown)
+            job.status = DONE
+        except Exception as e:
+            logger.exception("report %s failed", job.id)
+            job.error = str(e)
+            job.status = FAILED
+        job.finished_at = time.time()
+        with self._lock:
+            self._active.pop(job.key, None)
+        job.future.set_result(job)
+
+    def _prune(self):
+        """Drop finished jobs past their TTL, then the oldest finished ones over ``max_jobs``"""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and (now - job.finished_at > self.result_ttl or len(self._jobs) >= self.max_jobs):
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable
+
+
+# Average characters per token of English text for GPT-4-class tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate; close enough for budgeting without a tokenizer dependency"""
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class TokenBudget:
+    """Tokens-per-minute bucket shared by concurrent LLM calls.
+
+    ``acquire`` reserves a request's tokens up front (prompt plus
+    ``max_tokens``, as the provider's rate limiter counts them) and sleeps
+    until the bucket has refilled enough to cover them. Reservations are
+    taken in call order, so a large request is not starved by smaller ones.
+    """
+
+    def __init__(self, tokens_per_minute: float, clock: Callable[[], float] = time.monotonic):
+        if tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute must be positive")
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.clock = clock
+        self._available = tokens_per_minute
+        self._refilled = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._available = min(self.capacity, self._available + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def reserve(self, tokens: int) -> float:
+        """Take ``tokens`` from the bucket and return how long to wait before using them"""
+        self._refill()
+        self._available -= tokens
+        return max(0.0, -self._available / self.rate)
+
+    async def acquire(self, tokens: int):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 
-from app.ai.client import ChatClient
+from app.ai.client import AsyncChatClient, ChatClient
+from app.ai.tokens import TokenBudget, estimate_tokens
 
 
 SYSTEM_PROMPT = (
@@ -25,76 +26,116 @@ class TrenchInput:
     as_of_utc: str
 
 
-def _build_user_prompt(data: TrenchInput) -> str:
-    # Determine primary narrative theme based on strongest score
-    momentum_score = data.scores.get('momentum', 0)
-    smart_money_score = data.scores.get('smart_money', 0)
-    sentiment_score = data.scores.get('sentiment', 0)
-    event_score = data.scores.get('event', 0)
-    total_score = data.scores.get('total', 0)
-    
-    # Find dominant theme
-    max_score = max(momentum_score, smart_money_score, sentiment_score, event_score)
-    if max_score == momentum_score and momentum_score > 15:
-        theme = "Momentum"
-    elif max_score == smart_money_score and smart_money_score > 15:
-        theme = "Smart Money"
-    elif max_score == sentiment_score and sentiment_score > 5:
-        theme = "Sentiment Driven"
-    elif max_score == event_score and event_score > 5:
-        theme = "Event Catalyst"
-    else:
-        theme = "Stability"
-    
-    # Calculate power indicators for enhanced reporting
-    market_cap_tier = "micro" if data.metrics.get('market_cap_usd', 0) < 10000000 else "mid" if data.metrics.get('market_cap_usd', 0) < 100000000 else "large"
-    volume_strength = "high" if data.metrics.get('volume_24h_usd', 0) > 1000000 else "moderate" if data.metrics.get('volume_24h_usd', 0) > 100000 else "low"
-    
-    # Enhanced signal analysis
-    top_signals = data.signals[:6]  # More signals for power
-    
-    return (
-        f"🎯 ALPHA REPORT: ${data.token.get('symbol')} ({data.token.get('name')})\n"
-        f"📊 DVM Score: {total_score:.0f}/100 | Theme: {theme}\n"
-        f"💰 Market Cap: {market_cap_tier.title()}-cap | Volume: {volume_strength}\n"
-        f"🔍 Key Signals: {', '.join(top_signals)}\n"
-        f"📈 Score Breakdown: Momentum {momentum_score:.0f} | Smart Money {smart_money_score:.0f} | Sentiment {sentiment_score:.0f} | Event {event_score:.0f}\n\n"
-        
-        "Write a POWERFUL DVM Trenches alpha report using natural American English in this EXACT format:\n\n"
-        
-        "**🎯 ${SYMBOL} – {Primary Theme} Play**\n"
-        '📍 **The Intel:** "Write 2-3 clear sentences sharing what\'s really happening. Start with specific whale moves, '
-        "smart money activity, or market dynamics. Use exact numbers and percentages. "
-        'End with what traders should watch for next. Sound like a pro sharing premium insights."\n\n'
-        
-        "**⚡ Bottom Line:** BULLISH/NEUTRAL/CAUTIOUS - clear reason with supporting data\n\n"
-        
-        "**📊 Score Breakdown:**\n"
-        "• Momentum: [score]/37.5 - what's driving price action\n"
-        "• Smart Money: [score]/37.5 - what whales are doing\n"
-        "• Sentiment: [score]/12.5 - social media and community buzz\n"
-        "• Event: [score]/12.5 - upcoming catalysts or news\n\n"
-        
-        "**👀 What to Watch:** 3 specific things to monitor with clear thresholds\n\n"
-        
-        "NATURAL AMERICAN ENGLISH EXAMPLES:\n"
-        '• "Here\'s what\'s happening: Three major whale wallets just bought $2.1M worth of [TOKEN] in a coordinated 15-minute buying spree. The on-chain data shows they\'re using the same DCA strategy that worked for [previous winner]. This could be the start of something big."\n'
-        '• "Word from the trenches: The [TOKEN] team just burned half their supply while top influencers are quietly loading up. Social mentions jumped 340% but the price hasn\'t caught up yet — classic setup before a major move."\n'
-        '• "Smart money is rotating: Major wallets sold their [competing token] positions and moved $4.2M into [TOKEN] over the past two days. Volume is building, holder count is growing, and liquidity is locked. All the pieces are falling into place."\n\n'
-        
-        "WRITING REQUIREMENTS:\n"
-        "- Use natural, conversational American English\n"
-        "- Include specific wallet activity and transaction details\n"
-        "- Reference successful comparable tokens when relevant\n"
-        "- Sound like a seasoned trader sharing exclusive insights\n"
-        "- Keep under 280 words but deliver maximum value\n"
-        "- Use precise numbers, percentages, and timeframes\n"
-        "- Make it clear and easy to understand\n"
-        "- Use strategic emojis for visual appeal"
-    )
-
-
-def generate_trench_report(data: TrenchInput, client: ChatClient, model: str = "gpt-4o", temperature: float = 0.2, max_tokens: int = 1000) -> str:
+# Fixed instructions, sent unchanged as the system message of every report. Nothing
+# token-specific goes in here, so the provider's prompt cache can reuse the whole prefix.
+# Kept short: at this size it sits under OpenAI's 1024-token caching minimum, so every
+# token of it is paid for on each report.
+REPORT_INSTRUCTIONS = (
+    "Input: TOKEN $SYMBOL (Name); SCORE total/100 | theme | market cap tier | volume; "
+    "BREAKDOWN momentum smart_money sentiment event; SIGNALS (optional).\n\n"
+
+    "Write the alpha report for that token in this EXACT format:\n\n"
+
+    "**🎯 ${SYMBOL} – {Primary Theme} Play**\n"
+    '📍 **The Intel:** "2-3 sentences: specific whale moves, smart money or market dynamics with exact numbers, '
+    'then what traders should watch next."\n\n'
+
+    "**⚡ Bottom Line:** BULLISH/NEUTRAL/CAUTIOUS - clear reason with supporting data\n\n"
+
+    "**📊 Score Breakdown:**\n"
+    "• Momentum: [score]/37.5 - what's driving price action\n"
+    "• Smart Money: [score]/37.5 - what whales are doing\n"
+    "• Sentiment: [score]/12.5 - social media and community buzz\n"
+    "• Event: [score]/12.5 - upcoming catalysts or news\n\n"
+
+    "**👀 What to Watch:** 3 specific things to monitor with clear thresholds\n\n"
+
+    'Intel example: "Three whale wallets just bought $2.1M of [TOKEN] in a 15-minute spree, the same DCA pattern '
+    'that preceded [previous winner]. Volume is building and liquidity is locked."\n\n'
+
+    "Under 280 words. Use precise numbers, percentages and timeframes, wallet and transaction details, "
+    "comparable tokens when relevant, and a few strategic emojis."
+)
+
+STATIC_PREFIX = SYSTEM_PROMPT + "\n\n" + REPORT_INSTRUCTIONS
+
+# Prompt tokens (local estimate) allowed per report, static prefix included
+PROMPT_TOKEN_BUDGET = 512
+MAX_SIGNALS = 6
+MAX_NAME_CHARS = 40
+MAX_SYMBOL_CHARS = 16
+
+
+@dataclass
+class Prompt:
+    system: str
+    user: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.system) + estimate_tokens(self.user)
+
+
+def _theme(scores: Dict[str, float]) -> str:
+    """Primary narrative theme based on the strongest score"""
+    momentum = scores.get('momentum', 0)
+    smart_money = scores.get('smart_money', 0)
+    sentiment = scores.get('sentiment', 0)
+    event = scores.get('event', 0)
+    strongest = max(momentum, smart_money, sentiment, event)
+    if strongest == momentum and momentum > 15:
+        return "Momentum"
+    if strongest == smart_money and smart_money > 15:
+        return "Smart Money"
+    if strongest == sentiment and sentiment > 5:
+        return "Sentiment Driven"
+    if strongest == event and event > 5:
+        return "Event Catalyst"
+    return "Stability"
+
+
+def _encode_data(data: TrenchInput, signals: List[str], name_chars: int, symbol_chars: int) -> str:
+    scores = data.scores
+    market_cap = data.metrics.get('market_cap_usd', 0)
+    volume = data.metrics.get('volume_24h_usd', 0)
+    market_cap_tier = "micro" if market_cap < 10000000 else "mid" if market_cap < 100000000 else "large"
+    volume_strength = "high" if volume > 1000000 else "moderate" if volume > 100000 else "low"
+    symbol = str(data.token.get('symbol'))[:symbol_chars]
+    name = str(data.token.get('name'))[:name_chars]
+    lines = [
+        f"TOKEN ${symbol} ({name})",
+        f"SCORE {scores.get('total', 0):.0f}/100 | {_theme(scores)} | {market_cap_tier}-cap | {volume_strength} volume",
+        f"BREAKDOWN {scores.get('momentum', 0):.0f} {scores.get('smart_money', 0):.0f} "
+        f"{scores.get('sentiment', 0):.0f} {scores.get('event', 0):.0f}",
+    ]
+    if signals:
+        lines.append("SIGNALS " + "; ".join(signals))
+    return "\n".join(lines)
+
+
+def build_prompt(data: TrenchInput, budget: int = PROMPT_TOKEN_BUDGET) -> Prompt:
+    """Static instructions first, then the token's data in compact form, within ``budget`` prompt tokens.
+
+    The symbol and name are clipped to ``MAX_SYMBOL_CHARS`` and ``MAX_NAME_CHARS``. Over
+    budget, signals are dropped from the end first, then the name and symbol are shortened.
+    Only a budget too small for the static prefix and the shortest data raises ValueError.
+    """
+    signals = [str(s) for s in data.signals[:MAX_SIGNALS]]
+    name_chars, symbol_chars = MAX_NAME_CHARS, MAX_SYMBOL_CHARS
+    while True:
+        prompt = Prompt(STATIC_PREFIX, _encode_data(data, signals, name_chars, symbol_chars))
+        if prompt.tokens <= budget:
+            return prompt
+        if signals:
+            signals.pop()
+        elif name_chars > 8 or symbol_chars > 8:
+            name_chars, symbol_chars = 8, 8
+        else:
+            raise ValueError(f"report prompt needs {prompt.tokens} tokens, budget is {budget}")
+
+
+def generate_trench_report(data: TrenchInput, client: ChatClient, model: str = "gpt-4o", temperature: float = 0.2, max_tokens: int = 1000,
+                           prompt_budget: int = PROMPT_TOKEN_BUDGET) -> str:
     # Check if using MockChatClient
     from app.ai.client import MockChatClient
     if isinstance(client, MockChatClient):
@@ -103,7 +144,38 @@ def generate_trench_report(data: TrenchInput, client: ChatClient, model: str = "
         return generate_dynamic_report(data)
     
     # Otherwise use OpenAI
-    prompt = _build_user_prompt(data)
-    return client.complete(SYSTEM_PROMPT, prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+    prompt = build_prompt(data, prompt_budget)
+    return client.complete(prompt.system, prompt.user, model=model, temperature=temperature, max_tokens=max_tokens)
 
 
+def stream_trench_report(data: TrenchInput, client: ChatClient, model: str = "gpt-4o", temperature: float = 0.2, max_tokens: int = 1000,
+                         prompt_budget: int = PROMPT_TOKEN_BUDGET) -> Iterator[str]:
+    """Like ``generate_trench_report`` but yields the report in chunks as the client produces them"""
+    from app.ai.client import MockChatClient
+    if isinstance(client, MockChatClient):
+        from app.ai.dynamic_report import generate_dynamic_report
+        yield from generate_dynamic_report(data).splitlines(keepends=True)
+        return
+
+    prompt = build_prompt(data, prompt_budget)
+    stream = getattr(client, "stream", None)
+    if stream is None:
+        # Clients without streaming deliver the whole report as one chunk
+        yield client.complete(prompt.system, prompt.user, model=model, temperature=temperature, max_tokens=max_tokens)
+        return
+    yield from stream(prompt.system, prompt.user, model=model, temperature=temperature, max_tokens=max_tokens)
+
+
+async def agenerate_trench_report(data: TrenchInput, client: AsyncChatClient | ChatClient, model: str = "gpt-4o",
+                                  temperature: float = 0.2, max_tokens: int = 1000,
+                                  budget: Optional[TokenBudget] = None, prompt_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """``generate_trench_report`` for an async client, waiting on ``budget`` for the prompt plus ``max_tokens``"""
+    from app.ai.client import MockChatClient
+    if isinstance(client, MockChatClient):
+        from app.ai.dynamic_report import generate_dynamic_report
+        return generate_dynamic_report(data)
+
+    prompt = build_prompt(data, prompt_budget)
+    if budget is not None:
+        await budget.acquire(prompt.tokens + max_tokens)
+    return await client.complete(prompt.system, prompt.user, model=model, temperature=temperature, max_tokens=max_tokens)
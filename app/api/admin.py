@@ -0,0 +1,33 @@
+"""Access control shared by the /admin routers.
+
+Every admin route sits behind the profiling token (``DVM_PROFILE_TOKEN``),
+sent in the ``X-DVM-Profile`` header. Without a token none of them is
+installed.
+"""
+from __future__ import annotations
+
+import hmac
+import os
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+
+def admin_token(token: Optional[str] = None) -> Optional[str]:
+    """The explicit token, else ``DVM_PROFILE_TOKEN``"""
+    return token or os.getenv("DVM_PROFILE_TOKEN")
+
+
+def require_admin(token: str) -> Callable:
+    """A dependency that rejects requests without the admin token with 403"""
+
+    async def authorize(x_dvm_profile: Optional[str] = Header(default=None)):
+        if x_dvm_profile is None or not hmac.compare_digest(x_dvm_profile, token):
+            raise HTTPException(status_code=403, detail="Forbidden")
+
+    return authorize
+
+
+def protected_router(prefix: str, token: str) -> APIRouter:
+    """An unlisted router whose every route requires the admin token"""
+    return APIRouter(prefix=prefix, include_in_schema=False, dependencies=[Depends(require_admin(token))])
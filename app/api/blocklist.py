@@ -0,0 +1,43 @@
+"""Blocklist admin endpoints.
+
+Behind the profiling token (``DVM_PROFILE_TOKEN``) like the other admin
+routes. ``GET /admin/blocklist`` reports entries, memory and the expected and
+observed false-positive rates. ``POST /admin/blocklist/reload`` rebuilds the
+filter from ``DVM_BLOCKLIST_FILE`` after the file was updated.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException
+
+from app.api.admin import admin_token, protected_router
+from extractors.blocklist import BLOCKLIST, Blocklist
+
+ADMIN_PREFIX = "/admin/blocklist"
+
+
+def blocklist_router(token: str, blocklist: Blocklist = BLOCKLIST) -> APIRouter:
+    router = protected_router(ADMIN_PREFIX, token)
+
+    @router.get("")
+    async def blocklist_stats():
+        return blocklist.stats()
+
+    @router.post("/reload")
+    async def reload_blocklist():
+        try:
+            return blocklist.reload()
+        except (OSError, ValueError) as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    return router
+
+
+def install_blocklist_admin(app: FastAPI, token: Optional[str] = None) -> bool:
+    """Add the blocklist admin endpoints when a profiling token is configured"""
+    token = admin_token(token)
+    if not token:
+        return False
+    app.include_router(blocklist_router(token))
+    return True
@@ -0,0 +1,54 @@
+"""Memory accounting admin endpoints.
+
+Shares the profiling token (``DVM_PROFILE_TOKEN``) and, like profiling, is
+not installed without it. ``GET /admin/memory`` reports RSS, per-structure
+byte estimates and, while tracemalloc is tracing, the top allocation sites
+(``?diff=true`` for growth since tracing started). Tracing is started with
+``POST /admin/memory/tracing?frames=N`` or at boot with
+``DVM_TRACEMALLOC_FRAMES``, and stopped with ``DELETE``.
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException
+
+from app.api.admin import admin_token, protected_router
+from app.utils.memory import GROUP_BY, MemoryAccounting, memory
+
+ADMIN_PREFIX = "/admin/memory"
+
+
+def memory_router(token: str, accounting: MemoryAccounting = memory) -> APIRouter:
+    router = protected_router(ADMIN_PREFIX, token)
+
+    @router.get("")
+    async def memory_report(limit: int = 20, group_by: str = "lineno", diff: bool = False):
+        if group_by not in GROUP_BY:
+            raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+        return accounting.report(limit, group_by, diff)
+
+    @router.post("/tracing")
+    async def start_tracing(frames: int = 1):
+        accounting.start(max(1, frames))
+        return {"tracing": True, "frames": max(1, frames)}
+
+    @router.delete("/tracing")
+    async def stop_tracing():
+        accounting.stop()
+        return {"tracing": False}
+
+    return router
+
+
+def install_memory_admin(app: FastAPI, token: Optional[str] = None) -> bool:
+    """Add the memory admin endpoints when a profiling token is configured"""
+    token = admin_token(token)
+    if not token:
+        return False
+    frames = int(os.getenv("DVM_TRACEMALLOC_FRAMES", "0"))
+    if frames > 0:
+        memory.start(frames)
+    app.include_router(memory_router(token))
+    return True
@@ -0,0 +1,237 @@
+"""On-demand request profiling.
+
+Installed only when ``DVM_PROFILE_TOKEN`` is set, so normal deployments run
+without the middleware at all. A request carrying ``X-DVM-Profile: <token>``
+is profiled by a sampling thread that walks
+``sys._current_frames()``, which also covers the provider calls running in the
+extractor's thread pool. Profiles are written as collapsed stacks (for
+flamegraph.pl / speedscope) or speedscope JSON (``?profile_format=speedscope``)
+and served from ``/admin/profiles``.
+"""
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.responses import FileResponse
+
+from app.api.admin import admin_token, protected_router
+
+PROFILE_HEADER = "x-dvm-profile"
+ADMIN_PREFIX = "/admin/profiles"
+DEFAULT_DIR = "profiles"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_INTERVAL_SECONDS = 0.002
+
+
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval until stopped"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dvm-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                name = names.get(ident)
+                if name is None:
+                    names.update((t.ident, t.name) for t in threading.enumerate())
+                    name = names.setdefault(ident, f"thread-{ident}")
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format: ``frame;frame;frame count``"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common())
+
+    def speedscope(self, name: str) -> str:
+        """speedscope's file format with one sampled profile"""
+        frames: List[Dict[str, str]] = []
+        index: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled", "name": name, "unit": "seconds",
+                "startValue": 0, "endValue": self.elapsed,
+                "samples": samples, "weights": weights,
+            }],
+            "name": name,
+            "exporter": "dvm-profiler",
+        })
+
+
+class ProfileStore:
+    """Profile files in one directory, pruned oldest-first to stay under ``max_bytes``"""
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._prune()
+        return name
+
+    def _prune(self):
+        entries = self.list()
+        total = sum(e["bytes"] for e in entries)
+        for entry in reversed(entries):  # oldest last
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, entry["name"]))
+            total -= entry["bytes"]
+
+    def list(self) -> List[Dict[str, object]]:
+        """Profiles newest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append({"name": name, "bytes": stat.st_size, "created": stat.st_mtime})
+        return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+    def path(self, name: str) -> Optional[str]:
+        if os.path.basename(name) != name or name.startswith("."):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """Profiles requests that present the profiling token; other requests pass straight through"""
+
+    def __init__(self, app, token: str, store: ProfileStore, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.app = app
+        self.token = token
+        self.store = store
+        self.interval = interval
+        # One profile at a time: concurrent samplers would record each other's requests
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> Tuple[bool, str]:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        fmt = query.get("profile_format", ["collapsed"])[0]
+        # Header only: query strings end up in access and proxy logs
+        for key, value in scope.get("headers", []):
+            if key == PROFILE_HEADER.encode():
+                return hmac.compare_digest(value.decode("latin-1"), self.token), fmt
+        return False, fmt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"].startswith(ADMIN_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        requested, fmt = self._requested(scope)
+        if not requested or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(self.interval).start()
+        stopped = False
+
+        def finish() -> str:
+            nonlocal stopped
+            stopped = True
+            sampler.stop()
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            label = scope["path"].strip("/").replace("/", "_") or "root"
+            if fmt == "speedscope":
+                return self.store.write(f"{stamp}-{label}.speedscope.json", sampler.speedscope(f"{scope['method']} {scope['path']}"))
+            return self.store.write(f"{stamp}-{label}.collapsed", sampler.collapsed())
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start" and not stopped:
+                name = finish()
+                message = {**message, "headers": list(message.get("headers", [])) + [(PROFILE_HEADER.encode(), name.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not stopped:
+                finish()
+            self._busy.release()
+
+
+def admin_router(token: str, store: ProfileStore) -> APIRouter:
+    router = protected_router(ADMIN_PREFIX, token)
+
+    @router.get("")
+    async def list_profiles():
+        return {"profiles": store.list()}
+
+    @router.get("/{name}")
+    async def get_profile(name: str):
+        path = store.path(name)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        media_type = "application/json" if name.endswith(".json") else "text/plain"
+        return FileResponse(path, media_type=media_type, filename=name)
+
+    return router
+
+
+def install_profiling(app: FastAPI, token: Optional[str] = None, directory: Optional[str] = None,
+                      max_bytes: Optional[int] = None) -> bool:
+    """Add the profiling middleware and admin endpoints when a profiling token is configured"""
+    token = admin_token(token)
+    if not token:
+        return False
+    store = ProfileStore(
+        directory or os.getenv("DVM_PROFILE_DIR", DEFAULT_DIR),
+        max_bytes or int(os.getenv("DVM_PROFILE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
+    interval = float(os.getenv("DVM_PROFILE_INTERVAL_MS", DEFAULT_INTERVAL_SECONDS * 1000)) / 1000
+    app.add_middleware(ProfilingMiddleware, token=token, store=store, interval=interval)
+    app.include_router(admin_router(token, store))
+    return True
@@ -23,6 +23,11 @@ class ScoreResponse(BaseModel):
     new_scores: Optional[dict] = None  # {"5m": 0.85, "15m": 0.72, "30m": 0.68, "1h": 0.63}
     trench_report_markdown: Optional[str] = None
     trench_report_json: Optional[dict] = None
+    # Background report job; poll GET /report/{report_id} while the markdown above is missing
+    report_id: Optional[str] = None
+    report_status: Optional[str] = None
+    # Per-stage wall time in ms, only when requested with ?timings=true
+    timings: Optional[dict] = None
 
 
 class RankRow(BaseModel):
@@ -30,6 +35,7 @@ class RankRow(BaseModel):
     id: str
     symbol: str
     name: str
+    deployer: Optional[str] = None  # Checked against the blocklist with the mint
     price_now: float
     price_change_pct: float = 0.0
     mc_now: float = 0.0
@@ -64,6 +70,8 @@ class RankRow(BaseModel):
 class RankResponse(BaseModel):
     tab: Literal["New", "Surging", "All"]
     rows: List[dict]
+    # Per-stage and per-token wall time in ms, only when requested with ?timings=true
+    timings: Optional[dict] = None
 
 
 class RankRequest(BaseModel):
@@ -1,29 +1,40 @@
 """FastAPI server for DVM Scoring Engine"""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
-import traceback
+import json
 import os
 from dotenv import load_dotenv
 
+from app.api.blocklist import install_blocklist_admin
+from app.api.memory import install_memory_admin
+from app.api.profiling import install_profiling
 from app.api.schemas import (
     ScoreRequest, ScoreResponse, 
     RankRequest, RankResponse
 )
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
 from pydantic import BaseModel
 
 # Define missing request/response models
 class ExtractRequest(BaseModel):
     token_address: str
     demo_mode: bool = False  # Enable demo mode for unknown tokens
+    tier: Literal["full", "fast"] = "full"  # "fast" skips the throttled Birdeye price history
+    fields: Optional[List[str]] = None  # Only fetch the providers these fields need
+    timeout_seconds: Optional[float] = Field(default=None, gt=0, le=120)  # Abandon slower providers
 
 class ExtractResponse(BaseModel):
     success: bool
     data: Optional[Dict[str, Any]]
     message: str
+    timings: Optional[Dict[str, Any]] = None
 
 class ReportRequest(BaseModel):
     token_data: Dict[str, Any]
@@ -32,23 +43,67 @@ class ReportRequest(BaseModel):
 
 class ReportResponse(BaseModel):
     report: Dict[str, Any]
+
+class BatchReportRequest(BaseModel):
+    reports: List[ReportRequest]
+
+class BatchReportResponse(BaseModel):
+    reports: List[Dict[str, Any]]
+
+class ReportJobResponse(BaseModel):
+    report_id: str
+    status: str
+    token_address: Optional[str] = None
+    markdown: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
 from app.utils.pre_filter import run_pre_filter
 from app.models.token import TokenData, DegenAudit
 from app.models.metrics import ScoreMetrics, MomentumMetrics, SmartMoneyMetrics, SentimentMetrics, EventMetrics
 from app.engine.scoring_engine import ScoringEngine
 from app.ranker.formulas import score_new, score_surging, score_all
-from app.ai.trench_report import generate_trench_report, TrenchInput
-from app.ai.client import OpenAIChatClient
-from extractors.unified_extractor import extract_token_data
+from app.utils.timeseries import TokenSeriesStore
+from app.utils.volume_window import VolumeWindowAggregator
+from app.utils.memory import deep_sizeof, memory
+from app.utils.log import configure_logging, debug_token, get_logger, shutdown_logging, token_extra
+from app.utils.instrumentation import (
+    PREFILTER_FAILURES, TOKENS_RANKED, ServerTimingMiddleware, current_timings, inc, registry,
+    set_token_scope, timed,
+)
+from app.ai.trench_report import generate_trench_report, stream_trench_report, TrenchInput
+from app.ai.batch import generate_reports
+from app.ai.client import AsyncOpenAIChatClient, MockChatClient, OpenAIChatClient
+from app.ai.report_cache import ReportCache
+from app.ai.report_jobs import DONE, ReportJobQueue, ReportQueueFull
+from app.ai.tokens import TokenBudget
+from extractors.context import ExtractionContext
+from extractors.blocklist import BLOCKLIST
+from extractors.negative_cache import NOT_FOUND
+from extractors.result_cache import EXTRACTIONS
+from extractors.tx_cursor import TX_CURSORS
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Component setup that should not slow down importing the module"""
+    # Level-gated structured logging written by a background thread (DVM_LOG_LEVEL, DVM_LOG_MODULES, ...)
+    configure_logging()
+    _setup_chat_clients()
+    yield
+    report_jobs.shutdown()
+    shutdown_logging()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="DVM Scoring Engine API",
     description="Deep Value Memetics token scoring and ranking system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins during development
@@ -60,31 +115,134 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+# Server-Timing header with per-stage wall time on every response
+app.add_middleware(ServerTimingMiddleware)
+# On-demand profiling, installed only when DVM_PROFILE_TOKEN is set
+install_profiling(app)
+# Memory accounting at /admin/memory, behind the same token
+install_memory_admin(app)
+install_blocklist_admin(app)
+
+# Fields /rank reads from an extraction: pre-filter inputs, scoring metrics and row values.
+# Extraction skips providers and derived variables none of these depend on.
+RANK_FIELDS = [
+    *TokenData.model_fields,
+    'price_now', 'mc_now', 'volume_24h_usd', 'liquidity_usd',
+    'vol_over_avg_ratio', 'price_change_percent', 'ath_hit', 'holders_growth_percent',
+    'whale_buy_usd', 'whale_buy_supply_percent', 'dca_accumulation_supply_percent',
+    'net_inflow_wallets_gt_10k_usd', 'mentions_velocity_ratio', 'tier1_kol_buy_supply_percent',
+    'influencer_reach', 'polarity_positive_percent', 'inflow_over_mcap_percent',
+    'upgrade_or_staking_live',
+]
 
 # Initialize components
 scoring_engine = ScoringEngine()
+# Per-token snapshot history used for growth, delta and peak metrics
+series_store = TokenSeriesStore()
+# Rolling 1-minute volume buckets behind vol_over_avg_ratio
+volume_windows = VolumeWindowAggregator()
+# Byte estimates of the long-lived structures, reported at /admin/memory
+memory.register("series_store", series_store.estimated_bytes)
+memory.register("volume_windows", volume_windows.estimated_bytes)
+memory.register("metrics_registry", lambda: deep_sizeof(registry.snapshot()))
+memory.register("not_found_cache", NOT_FOUND.estimated_bytes)
+memory.register("extraction_cache", EXTRACTIONS.estimated_bytes)
+memory.register("helius_tx_cursors", TX_CURSORS.estimated_bytes)
+memory.register("blocklist", BLOCKLIST.estimated_bytes)
 # Initialize chat client
 # Demo mode: Uses dynamic reports based on actual token data
 # OpenAI mode: Uses GPT-4 for even more sophisticated analysis
 use_mock = True  # Set to False when you have a valid OpenAI API key
 
-if use_mock:
-    print("ℹ️ Using dynamic AI reports based on token data (set use_mock=False for GPT-4 analysis)")
-else:
+# Dynamic reports until the lifespan hook has set up the OpenAI clients
+chat_client = MockChatClient("")  # Empty default, will be replaced dynamically
+async_chat_client = chat_client
+
+def _setup_chat_clients():
+    """Create the OpenAI clients (importing the SDK) when OpenAI mode is configured"""
+    global chat_client, async_chat_client
+    if use_mock:
+        logger.info("Using dynamic AI reports based on token data (set use_mock=False for GPT-4 analysis)")
+        return
     try:
         # Check if API key is actually set and not empty
         api_key = os.environ.get("OPENAI_API_KEY", "").strip()
         if not api_key or api_key == "sk-proj-REPLACE_ME":
             raise RuntimeError("OPENAI_API_KEY not configured")
         chat_client = OpenAIChatClient()
+        async_chat_client = AsyncOpenAIChatClient()
     except (RuntimeError, Exception) as e:
-        print(f"⚠️ Warning: OpenAI not available ({e}) - Using demo AI reports")
-        use_mock = True
+        logger.warning("OpenAI not available (%s) - using demo AI reports", e)
+
+# Trench reports are generated in the background with bounded concurrency toward the LLM;
+# /score waits this long for the report before returning just its id
+REPORT_INLINE_WAIT_SECONDS = float(os.getenv("DVM_REPORT_INLINE_WAIT", "0.25"))
+# Retry-After sent to /report callers while the report queue is full
+REPORT_RETRY_AFTER_SECONDS = 5
+# Reports of tokens whose scores and metrics barely moved are reused for a while
+report_cache = ReportCache(
+    ttl=float(os.getenv("DVM_REPORT_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("DVM_REPORT_CACHE_SIZE", "1024")),
+    score_bucket=float(os.getenv("DVM_REPORT_SCORE_BUCKET", "2.5")),
+)
+memory.register("report_cache", report_cache.estimated_bytes)
+report_jobs = ReportJobQueue(
+    lambda data: generate_trench_report(data, chat_client),
+    max_concurrency=int(os.getenv("DVM_REPORT_CONCURRENCY", "4")),
+    max_pending=int(os.getenv("DVM_REPORT_MAX_PENDING", "100")),
+    cache=report_cache,
+)
+
+# Batch reports: LLM calls in flight per batch, and a tokens-per-minute budget shared by all batches
+REPORT_BATCH_CONCURRENCY = int(os.getenv("DVM_REPORT_BATCH_CONCURRENCY", "4"))
+REPORT_BATCH_MAX = 50
+report_budget = TokenBudget(float(os.environ["DVM_REPORT_TPM"])) if os.getenv("DVM_REPORT_TPM") else None
+
+def extract_token_data(token_address: str, fields: Optional[List[str]] = None,
+                       context: Optional[ExtractionContext] = None) -> Dict[str, Any]:
+    """Unified extraction; the extractor and its HTTP stack are imported on the first request"""
+    from extractors.unified_extractor import extract_token_data as extract
+    return extract(token_address, fields=fields, context=context)
+
+def _record_history(token_address: str, extraction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Record an extraction in the series store and volume windows and fill history-based metrics into combined_data"""
+    if not extraction or not extraction.get('data_sources'):
+        # Demo/placeholder data would only pollute the history
+        return None
+    data = extraction['combined_data']
+    
+    if 'volume_5m_usd' in data:
+        volume_windows.add_sample(token_address, data['volume_5m_usd'], 300, volume_24h_usd=data.get('volume_24h_usd'))
+        for tf, ratio in volume_windows.ratios(token_address).items():
+            if ratio is not None:
+                data[f'vol_over_avg_ratio_{tf}'] = ratio
+        # Scoring runs on the 1h timeframe
+        data.update(volume_windows.momentum_fields(token_address, "1h"))
+    
+    history = series_store.record(token_address, data)
+    if history['samples'] < 2:
+        return None
+    for key in ('holders_growth_percent', 'lp_mcap_delta_percent', 'ath_hit', 'minutes_since_peak'):
+        if history[key] is not None:
+            data[key] = history[key]
+    return history
+
+def _compact_result(result: Dict[str, Any], include_sources: bool) -> Dict[str, Any]:
+    from extractors.unified_extractor import compact_result
+    return compact_result(result, include_sources=include_sources)
+
+def _run_pre_filter(token_model: TokenData):
+    """Run the pre-filter, recording its duration and which checks failed"""
+    with timed("prefilter"):
+        result = run_pre_filter(token_model)
+    for check in result.failed_checks:
+        inc(PREFILTER_FAILURES, check)
+    return result
 
-if use_mock or 'chat_client' not in locals():
-    from app.ai.client import MockChatClient
-    # We'll create dynamic reports in the generate_trench_report function
-    chat_client = MockChatClient("")  # Empty default, will be replaced dynamically
+def _timings(enabled: bool) -> Optional[Dict[str, Any]]:
+    """The request's stage timings for the response body, when the client asked for them"""
+    timings = current_timings()
+    return timings.as_dict() if enabled and timings else None
 
 @app.get("/")
 async def root():
@@ -96,72 +254,57 @@ async def root():
             "/extract - Extract token data from multiple sources",
             "/score - Score a single token",
             "/rank - Rank multiple tokens",
-            "/report - Generate AI trench report"
+            "/report - Generate AI trench report",
+            "/report/{report_id} - Fetch a background trench report",
+            "/report/batch - Generate AI trench reports for many tokens",
+            "/report/stream - Stream an AI trench report (Server-Sent Events)"
         ]
     }
 
 @app.post("/extract", response_model=ExtractResponse)
-async def post_extract(request: ExtractRequest):
-    """Extract token data from all sources"""
+async def post_extract(request: ExtractRequest, timings: bool = False, sources: bool = False):
+    """Extract token data from all sources.
+
+    The per-provider payloads under ``data_sources`` duplicate ``combined_data``
+    and are only returned with ``?sources=true``.
+    """
     try:
-        print(f"\n📊 Extracting data for token: {request.token_address}")
+        logger.info("extract %s", request.token_address)
         
-        # Set demo mode if requested
-        if request.demo_mode:
-            os.environ['DVM_DEMO_MODE'] = 'true'
+        # Demo mode, tier and deadline travel with this request only
+        context = ExtractionContext.create(
+            timeout=request.timeout_seconds, fields=request.fields,
+            demo_mode=request.demo_mode, tier=request.tier,
+        )
         
-        # Extract data using unified extractor
-        result = extract_token_data(request.token_address)
+        # Extract data using unified extractor, off the event loop so extractions run in parallel
+        with timed("extract"):
+            result = await run_in_threadpool(extract_token_data, request.token_address, context=context)
         
-        # Reset demo mode
-        if request.demo_mode:
-            os.environ['DVM_DEMO_MODE'] = 'false'
+        _record_history(request.token_address, result)
         
-        # Print extracted scoring variables
-        if result and 'combined_data' in result:
+        # Log extracted scoring variables (DEBUG, sampled per token)
+        if result and 'combined_data' in result and debug_token(logger, request.token_address):
             data = result['combined_data']
-            print("\n" + "="*60)
-            print("🎯 EXTRACTED SCORING VARIABLES FROM APIs")
-            print("="*60)
-            
-            scoring_vars = {
-                "📊 MOMENTUM": [
-                    ("price_change_percent", data.get('price_change_percent')),
-                    ("price_change_5m_percent", data.get('price_change_5m_percent')),
-                    ("price_change_24h_percent", data.get('price_change_24h_percent')),
-                    ("vol_over_avg_ratio", data.get('vol_over_avg_ratio')),
-                ],
-                "💰 MARKET DATA": [
-                    ("price_now", data.get('price_now')),
-                    ("mc_now", data.get('mc_now')),
-                    ("volume_24h_usd", data.get('volume_24h_usd')),
-                    ("liquidity_usd", data.get('liquidity_usd')),
-                ],
-                "👥 HOLDERS": [
-                    ("holders_count", data.get('holders_count')),
-                    ("top_10_holders_percent", data.get('top_10_holders_percent')),
-                ]
-            }
-            
-            for category, vars in scoring_vars.items():
-                print(f"\n{category}:")
-                for name, value in vars:
-                    if value is not None:
-                        print(f"  ✅ {name}: {value}")
-                    else:
-                        print(f"  ❌ {name}: Not available")
-            
-            print("="*60 + "\n")
+            logger.debug(
+                "extracted %s: coverage %s%%", request.token_address,
+                result.get('coverage', {}).get('percentage', 0),
+                extra=token_extra(request.token_address, **{key: data.get(key) for key in (
+                    'price_change_percent', 'price_change_5m_percent', 'price_change_24h_percent',
+                    'vol_over_avg_ratio', 'price_now', 'mc_now', 'volume_24h_usd', 'liquidity_usd',
+                    'holders_count', 'top_10_holders_percent',
+                )}),
+            )
         
         return ExtractResponse(
             success=True,
-            data=result,
-            message="Data extraction completed"
+            data=_compact_result(result, sources),
+            message="Data extraction completed",
+            timings=_timings(timings)
         )
         
     except Exception as e:
-        print(f"❌ Extraction error: {str(e)}")
-        traceback.print_exc()
+        logger.exception("extraction failed for %s", request.token_address)
         return ExtractResponse(
             success=False,
             data=None,
@@ -169,13 +312,13 @@ async def post_extract(request: ExtractRequest):
         )
 
 @app.post("/score", response_model=ScoreResponse)
-async def post_score(request: ScoreRequest):
+async def post_score(request: ScoreRequest, timings: bool = False):
     """Score a single token"""
     try:
         # Extract token data from request
         token_data = request.token
         token_address = token_data.get('token_address', 'Unknown')
-        print(f"\n🎯 Scoring token: {token_address}")
+        logger.info("score %s", token_address)
         
         # Run pre-filter
         # Convert dict to TokenData model
@@ -191,7 +334,7 @@ async def post_score(request: ScoreRequest):
             token_data['degen_audit'] = DegenAudit(**token_data['degen_audit'])
         
         token_model = TokenData(**token_data)
-        pre_filter_result = run_pre_filter(token_model)
+        pre_filter_result = _run_pre_filter(token_model)
         
         if not pre_filter_result.passed:
             return ScoreResponse(
@@ -202,7 +345,8 @@ async def post_score(request: ScoreRequest):
                 momentum=0.0,
                 smart_money=0.0,
                 sentiment=0.0,
-                event=0.0
+                event=0.0,
+                timings=_timings(timings)
             )
         
         # Create metrics from token data
@@ -215,6 +359,7 @@ async def post_score(request: ScoreRequest):
                 vol_over_avg_ratio=metrics_data.get('vol_over_avg_ratio', 1.0),
                 price_change_percent=metrics_data.get('price_change_percent', 0.0),
                 ath_hit=metrics_data.get('ath_hit', False),
+                lp_mcap_delta_percent=metrics_data.get('lp_mcap_delta_percent', 0.0),
                 holders_growth_percent=metrics_data.get('holders_growth_percent', 0.0)
             ),
             smart_money=SmartMoneyMetrics(
@@ -236,37 +381,17 @@ async def post_score(request: ScoreRequest):
         )
         
         # Calculate scores using the scoring engine
-        score_result = scoring_engine.score(metrics, "1h")
+        with timed("scoring"):
+            score_result = scoring_engine.score(metrics, "1h")
         total_score = score_result.total
         
-        # Print extracted scoring variables
-        print("\n" + "="*60)
-        print("🔍 EXTRACTED SCORING VARIABLES")
-        print("="*60)
-        
-        print("\n📊 MOMENTUM METRICS:")
-        print(f"  vol_over_avg_ratio: {metrics.momentum.vol_over_avg_ratio}")
-        print(f"  price_change_percent: {metrics.momentum.price_change_percent}")
-        print(f"  ath_hit: {metrics.momentum.ath_hit}")
-        print(f"  holders_growth_percent: {metrics.momentum.holders_growth_percent}")
-        
-        print("\n💰 SMART MONEY METRICS:")
-        print(f"  whale_buy_usd: {metrics.smart_money.whale_buy_usd}")
-        print(f"  whale_buy_supply_percent: {metrics.smart_money.whale_buy_supply_percent}")
-        print(f"  dca_accumulation_supply_percent: {metrics.smart_money.dca_accumulation_supply_percent}")
-        print(f"  net_inflow_wallets_gt_10k_usd: {metrics.smart_money.net_inflow_wallets_gt_10k_usd}")
-        
-        print("\n💬 SENTIMENT METRICS:")
-        print(f"  mentions_velocity_ratio: {metrics.sentiment.mentions_velocity_ratio}")
-        print(f"  tier1_kol_buy_supply_percent: {metrics.sentiment.tier1_kol_buy_supply_percent}")
-        print(f"  influencer_reach: {metrics.sentiment.influencer_reach}")
-        print(f"  polarity_positive_percent: {metrics.sentiment.polarity_positive_percent}")
-        
-        print("\n🎯 EVENT METRICS:")
-        print(f"  inflow_over_mcap_percent: {metrics.event.inflow_over_mcap_percent}")
-        print(f"  upgrade_or_staking_live: {metrics.event.upgrade_or_staking_live}")
-        
-        print("="*60 + "\n")
+        # Log the scoring inputs (DEBUG, sampled per token)
+        if debug_token(logger, token_address):
+            logger.debug(
+                "scored %s: total %.2f", token_address, total_score,
+                extra=token_extra(token_address, **metrics.momentum.model_dump(), **metrics.smart_money.model_dump(),
+                                  **metrics.sentiment.model_dump(), **metrics.event.model_dump()),
+            )
         
         # Build response matching schema
         breakdown = {
@@ -276,10 +401,11 @@ async def post_score(request: ScoreRequest):
             "event": score_result.event
         }
         
-        # Generate AI report if requested
+        # Queue the AI report; it is returned inline only if it is ready within the wait budget
         trench_report = None
+        trench_report_text = None
+        report_job = None
         if True:  # Always generate for demo
-            print("\n🤖 Generating AI trench report...")
             trench_input = TrenchInput(
                 token={
                     'name': token_model.token_name,
@@ -310,17 +436,23 @@ async def post_score(request: ScoreRequest):
                 timeframe='multi',
                 as_of_utc=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
             )
-            trench_report_text = generate_trench_report(trench_input, chat_client)
-            # Convert to dict format for response
-            trench_report = {
-                "markdown": trench_report_text,
-                "sections": [
-                    {
-                        "title": "Analysis",
-                        "content": trench_report_text
-                    }
-                ]
-            }
+            try:
+                with timed("report_wait"):
+                    report_job = await report_jobs.wait(report_jobs.submit(trench_input), REPORT_INLINE_WAIT_SECONDS)
+            except ReportQueueFull as e:
+                logger.warning("report for %s not queued: %s", token_address, e)
+            if report_job is not None and report_job.status == DONE:
+                trench_report_text = report_job.markdown
+                # Convert to dict format for response
+                trench_report = {
+                    "markdown": trench_report_text,
+                    "sections": [
+                        {
+                            "title": "Analysis",
+                            "content": trench_report_text
+                        }
+                    ]
+                }
         
         return ScoreResponse(
             passed_prefilter=True,
@@ -331,20 +463,22 @@ async def post_score(request: ScoreRequest):
             smart_money=score_result.smart_money,
             sentiment=score_result.sentiment,
             event=score_result.event,
-            trench_report_markdown=trench_report_text if trench_report else None,
-            trench_report_json=trench_report
+            trench_report_markdown=trench_report_text,
+            trench_report_json=trench_report,
+            report_id=report_job.id if report_job else None,
+            report_status=report_job.status if report_job else None,
+            timings=_timings(timings)
         )
         
     except Exception as e:
-        print(f"❌ Scoring error: {str(e)}")
-        traceback.print_exc()
+        logger.exception("scoring failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/rank", response_model=RankResponse)
-async def post_rank(request: RankRequest):
+async def post_rank(request: RankRequest, timings: bool = False):
     """Rank multiple tokens"""
     try:
-        print(f"\n🏆 Ranking {len(request.rows)} tokens in category: {request.tab}")
+        logger.info("rank %d tokens in %s", len(request.rows), request.tab)
         
         # Import category filters
         from app.ranker.category_filters import get_category_filter
@@ -355,28 +489,43 @@ async def post_rank(request: RankRequest):
         # Convert RankRow objects to dicts for processing
         tokens = [row.model_dump() for row in request.rows]
         
+        # Settings for this request's extractions; only the fields ranking reads are extracted
+        context = ExtractionContext.create(fields=RANK_FIELDS)
+        
         # Filter and score tokens
         scored_tokens = []
         for token in tokens:
             token_address = token.get('id')
-            print(f"Processing token: {token_address}")
+            set_token_scope(token_address)
+            
+            # Known scam mints and deployers are dropped before any provider call
+            if BLOCKLIST.blocked(token_address, token.get('deployer')):
+                inc(PREFILTER_FAILURES, "blocklist")
+                logger.debug("rank %s: blocklisted", token_address, extra=token_extra(token_address))
+                continue
             
             # Extract real data for the token
             extracted_data = None
+            history = None
             try:
-                extracted_data = extract_token_data(token_address)
+                # Off the event loop, so other requests are served while providers answer
+                with timed("extract"):
+                    extracted_data = await run_in_threadpool(extract_token_data, token_address, context=context)
                 if extracted_data and extracted_data.get('combined_data'):
                     # Use extracted combined data
                     token_data = extracted_data['combined_data']
                     token_data['token_address'] = token_address
-                    print(f"✅ Using extracted data for {token_address}")
-                    print(f"   Coverage: {extracted_data.get('coverage', {}).get('percentage', 0)}%")
+                    history = _record_history(token_address, extracted_data)
+                    if debug_token(logger, token_address):
+                        logger.debug("rank %s: using extracted data, coverage %s%%", token_address,
+                                     extracted_data.get('coverage', {}).get('percentage', 0),
+                                     extra=token_extra(token_address))
                 else:
                     # No combined data, skip this token
-                    print(f"❌ No data available for {token_address}")
+                    logger.debug("rank %s: no data available", token_address, extra=token_extra(token_address))
                     continue
             except Exception as e:
-                print(f"❌ Failed to extract data for {token_address}: {e}")
+                logger.warning("rank %s: extraction failed: %s", token_address, e, extra=token_extra(token_address))
                 continue
             
             # Convert to TokenData model
@@ -392,15 +541,18 @@ async def post_rank(request: RankRequest):
                 token_data['degen_audit'] = DegenAudit(**token_data['degen_audit'])
             
             token_model = TokenData(**token_data)
-            pre_filter_result = run_pre_filter(token_model)
+            pre_filter_result = _run_pre_filter(token_model)
             
             # Check both pre-filter and category-specific requirements
             if not pre_filter_result.passed:
-                print(f"❌ Token {token_address} failed pre-filter: {pre_filter_result.failed_checks}")
+                logger.debug("rank %s: failed pre-filter %s", token_address, pre_filter_result.failed_checks,
+                             extra=token_extra(token_address))
             elif not category_filter(token_data):
-                print(f"❌ Token {token_address} failed category filter for {request.tab}")
+                logger.debug("rank %s: failed %s category filter", token_address, request.tab,
+                             extra=token_extra(token_address))
             else:
-                print(f"✅ Token {token_address} passed filters for {request.tab} category")
+                logger.debug("rank %s: passed %s filters", token_address, request.tab,
+                             extra=token_extra(token_address))
                 # Create metrics from extracted data if available
                 scoring_data = extracted_data.get('combined_data', {})
                 if scoring_data:
@@ -409,6 +561,7 @@ async def post_rank(request: RankRequest):
                             vol_over_avg_ratio=scoring_data.get('vol_over_avg_ratio', 1.0),
                             price_change_percent=scoring_data.get('price_change_percent', 0.0),
                             ath_hit=scoring_data.get('ath_hit', False),
+                            lp_mcap_delta_percent=scoring_data.get('lp_mcap_delta_percent', 0.0),
                             holders_growth_percent=scoring_data.get('holders_growth_percent', 0.0)
                         ),
                         smart_money=SmartMoneyMetrics(
@@ -432,7 +585,8 @@ async def post_rank(request: RankRequest):
                     # Create default metrics for ranking
                     metrics = ScoreMetrics()
                 
-                score_result = scoring_engine.score(metrics, "1h")
+                with timed("scoring"):
+                    score_result = scoring_engine.score(metrics, "1h")
                 
                 # Merge extracted data with original row
                 original_row = next((r for r in tokens if r.get('id') == token_address), {})
@@ -447,11 +601,15 @@ async def post_rank(request: RankRequest):
                 
                 scored_tokens.append({
                     'token': token_data,
+                    'history': history,
                     'score': score_result.total,
                     'original_row': original_row if 'original_row' in locals() else token
                 })
         
+        set_token_scope(None)
+        
         # Apply ranking formula based on tab
+        ranking = timed("ranking").start()
         sol_usd = 225.0  # Current SOL price, could be fetched dynamically
         
         ranked_rows = []
@@ -460,10 +618,18 @@ async def post_rank(request: RankRequest):
             original_row = scored_data.get('original_row', 
                 next((r for r in tokens if r.get('id') == scored_data['token']['token_address']), {}))
             
+            # Server-side history wins over client-supplied deltas once we have some
+            history = scored_data.get('history') or {}
+            def from_history(key, fallback):
+                value = history.get(key)
+                return fallback if value is None else value
+            
             # Merge with defaults for ranking formulas
             row = {
                 **original_row,
-                'mc_change_pct': original_row.get('mc_change_pct', 0),
+                'mc_change_pct': from_history('mc_change_pct', original_row.get('mc_change_pct', 0)),
+                'vol_change_pct': from_history('vol_change_pct', original_row.get('vol_change_pct', 0)),
+                'holders_change_pct': from_history('holders_change_pct', original_row.get('holders_change_pct', 0)),
                 'vol_now': original_row.get('vol_now', 0),
                 'vol_to_mc': original_row.get('vol_to_mc', 0),
                 'kolusd_now': original_row.get('kolusd_now', 0),
@@ -474,9 +640,9 @@ async def post_rank(request: RankRequest):
                 'mc_now': original_row.get('mc_now', 1),
                 'top10_pct': token_data.get('top_10_holders_percent', 20) / 100,  # Convert to decimal
                 'bundle_pct': token_data.get('bundle_percent', 30) / 100,  # Convert to decimal
-                'minutes_since_peak': 30,  # Default
+                'minutes_since_peak': from_history('minutes_since_peak', 30),  # Default until we have history
                 'dca_flag': 0,
-                'ath_flag': 0,
+                'ath_flag': int(from_history('ath_hit', 0)),
                 'score': scored_data['score']
             }
             
@@ -494,46 +660,123 @@ async def post_rank(request: RankRequest):
         
         # Sort by rank score descending
         ranked_rows.sort(key=lambda x: x['rank_score'], reverse=True)
+        ranking.stop()
+        inc(TOKENS_RANKED, request.tab, amount=len(ranked_rows))
         
         # Log summary
-        print(f"\n📊 Ranking Summary:")
-        print(f"  - Total tokens submitted: {len(request.rows)}")
-        print(f"  - Tokens that passed filters: {len(scored_tokens)}")
-        print(f"  - Tokens ranked: {len(ranked_rows)}")
+        logger.info("ranked %s: %d submitted, %d passed filters, %d ranked",
+                    request.tab, len(request.rows), len(scored_tokens), len(ranked_rows))
         
-        return RankResponse(tab=request.tab, rows=ranked_rows)
+        return RankResponse(tab=request.tab, rows=ranked_rows, timings=_timings(timings))
         
     except Exception as e:
-        print(f"❌ Ranking error: {str(e)}")
+        logger.exception("ranking failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _report_input(request: ReportRequest) -> TrenchInput:
+    return TrenchInput(
+        token=request.token_data,
+        prefilter={},
+        scores={'total': request.score},
+        signals=[],
+        metrics=request.metrics,
+        timeframe='multi',
+        as_of_utc=datetime.utcnow().isoformat()
+    )
+
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    """One Server-Sent Events message; JSON keeps multi-line text on a single data line"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
 @app.post("/report", response_model=ReportResponse)
 async def post_report(request: ReportRequest):
     """Generate AI-powered trench report"""
     try:
         token_address = request.token_data.get('token_address', 'Unknown')
-        print(f"\n📝 Generating trench report for: {token_address}")
-        
-        # Create TrenchInput
-        trench_input = TrenchInput(
-            token=request.token_data,
-            prefilter={},
-            scores={'total': request.score},
-            signals=[],
-            metrics=request.metrics,
-            timeframe='multi',
-            as_of_utc=datetime.utcnow().isoformat()
-        )
-        
-        # Generate report
-        report_text = generate_trench_report(trench_input, chat_client)
-        
-        return ReportResponse(report={'text': report_text})
-        
+        logger.info("report %s", token_address)
+        
+        trench_input = _report_input(request)
+        
+        # Generate report on the report workers, without blocking the event loop
+        try:
+            job = report_jobs.submit(trench_input)
+        except ReportQueueFull as e:
+            logger.warning("report for %s not queued: %s", token_address, e)
+            raise HTTPException(status_code=503, detail="Report queue is full, retry later",
+                                headers={"Retry-After": str(REPORT_RETRY_AFTER_SECONDS)})
+        with timed("report_wait"):
+            job = await report_jobs.wait(job, None)
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        
+        return ReportResponse(report={'text': job.markdown})
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Report generation error: {str(e)}")
+        logger.exception("report generation failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/report/batch", response_model=BatchReportResponse)
+async def post_report_batch(request: BatchReportRequest):
+    """Trench reports for up to 50 tokens (e.g. a tab's top N), generated concurrently on the async client"""
+    if len(request.reports) > REPORT_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {REPORT_BATCH_MAX} reports per batch")
+    logger.info("report batch of %d", len(request.reports))
+    results = await generate_reports(
+        [_report_input(item) for item in request.reports], async_chat_client,
+        concurrency=REPORT_BATCH_CONCURRENCY, budget=report_budget, cache=report_cache,
+    )
+    return BatchReportResponse(reports=[{
+        'token_address': r.token_address, 'text': r.markdown, 'cached': r.cached, 'error': r.error,
+    } for r in results])
+
+@app.post("/report/stream")
+async def post_report_stream(request: ReportRequest):
+    """Trench report as Server-Sent Events: ``chunk`` events while the LLM writes, then ``done`` with the full markdown"""
+    trench_input = _report_input(request)
+    logger.info("report stream %s", request.token_data.get('token_address', 'Unknown'))
+    cached = report_cache.get(trench_input)
+    
+    def events():
+        if cached is not None:
+            yield _sse("chunk", {"text": cached})
+            yield _sse("done", {"markdown": cached, "cached": True})
+            return
+        parts = []
+        stage = timed("report").start()
+        try:
+            for text in stream_trench_report(trench_input, chat_client):
+                parts.append(text)
+                yield _sse("chunk", {"text": text})
+        except Exception as e:
+            logger.exception("report stream failed")
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            stage.stop()
+        markdown = "".join(parts)
+        report_cache.put(trench_input, markdown)
+        yield _sse("done", {"markdown": markdown, "cached": False})
+    
+    # Starlette drains the sync generator in its threadpool, so the event loop never blocks on the LLM
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/report/{report_id}", response_model=ReportJobResponse)
+async def get_report(report_id: str, wait: float = 0.0):
+    """Status of a queued report and its markdown once done; ``?wait=<seconds>`` long-polls until it finishes"""
+    job = report_jobs.get(report_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    job = await report_jobs.wait(job, min(max(wait, 0.0), 60.0))
+    return ReportJobResponse(**job.as_dict())
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency histograms and pipeline counters in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,14 +1,32 @@
 from __future__ import annotations
 
+import argparse
+import heapq
 import json
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List
+from typing import IO, Callable, Iterable, Iterator, List, Optional, Tuple
 
+from pydantic import ValidationError
+
+from app.api.schemas import RankRow
+from app.engine.scoring_engine import ScoringEngine
 from app.models import PreFilterResult, TokenData
+from app.models.metrics import EventMetrics, MomentumMetrics, ScoreMetrics, SentimentMetrics, SmartMoneyMetrics
+from app.ranker.formulas import score_all, score_new, score_surging
 from app.utils.pre_filter import run_pre_filter
 
 
+SUBCOMMANDS = ("prefilter", "score", "rank")
+RANK_FORMULAS = {"New": score_new, "Surging": score_surging, "All": score_all}
+
+
 def _load_tokens_from_json(path: Path) -> List[TokenData]:
     with path.open("r", encoding="utf-8") as f:
         payload = json.load(f)
@@ -21,8 +39,196 @@ def _serialize_results(results: Iterable[PreFilterResult]) -> str:
     return json.dumps([r.model_dump() for r in results], indent=2)
 
 
-def main() -> int:
-    path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/mock_data.json")
+def _metrics_from_flat(data: dict) -> ScoreMetrics:
+    """Build ScoreMetrics from a flat dict of metric fields (the /score request shape)"""
+    def pick(model):
+        return model(**{k: data[k] for k in model.model_fields if k in data})
+
+    return ScoreMetrics(
+        momentum=pick(MomentumMetrics),
+        smart_money=pick(SmartMoneyMetrics),
+        sentiment=pick(SentimentMetrics),
+        event=pick(EventMetrics),
+    )
+
+
+# --- Per-record processors (run inside worker processes) ---------------------
+# Each takes one parsed JSONL record and returns (sort_key, passed, output_record).
+
+
+def _prefilter_record(record: dict) -> Tuple[float, bool, dict]:
+    result = run_pre_filter(TokenData.model_validate(record), verbose=False)
+    return (1.0 if result.passed else 0.0), result.passed, result.model_dump()
+
+
+def _score_record(record: dict, engine: ScoringEngine, timeframe: str) -> Tuple[float, bool, dict]:
+    metrics = record.pop("metrics", None) or {}
+    if not isinstance(metrics, dict):
+        raise TypeError("metrics must be a JSON object")
+    token = TokenData.model_validate(record)
+    pre_filter_result = run_pre_filter(token, verbose=False)
+    out = {
+        "token_address": token.token_address,
+        "passed_prefilter": pre_filter_result.passed,
+        "failed_checks": pre_filter_result.failed_checks,
+    }
+    if not pre_filter_result.passed:
+        return 0.0, False, out
+    breakdown = engine.score(_metrics_from_flat(metrics), timeframe)
+    out.update(
+        total=breakdown.total,
+        momentum=breakdown.momentum,
+        smart_money=breakdown.smart_money,
+        sentiment=breakdown.sentiment,
+        event=breakdown.event,
+    )
+    return breakdown.total, True, out
+
+
+def _rank_record(record: dict, tab: str, sol_usd: float) -> Tuple[float, bool, dict]:
+    row = RankRow.model_validate(record).model_dump()
+    row["rank_score"] = RANK_FORMULAS[tab](row, sol_usd)
+    return row["rank_score"], True, row
+
+
+def _process_chunk(chunk: List[Tuple[int, str]], processor: Callable) -> List[Tuple[float, int, str, Optional[bool]]]:
+    """Parse, validate and process a chunk of (line_no, line) pairs.
+
+    Returns (sort_key, line_no, serialized_output, passed) so the parent only
+    writes strings; ``passed`` is None for invalid lines.
+    """
+    out = []
+    for line_no, line in chunk:
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise TypeError(f"expected a JSON object, got {type(record).__name__}")
+            key, passed, record = processor(record)
+            out.append((key, line_no, json.dumps(record), passed))
+        except (ValueError, ValidationError, TypeError) as e:
+            error = {"line": line_no, "error": str(e).splitlines()[0]}
+            out.append((float("-inf"), line_no, json.dumps(error), None))
+    return out
+
+
+# --- Streaming pipeline -------------------------------------------------------
+
+
+def _read_lines(stream: IO[str]) -> Iterator[Tuple[int, str]]:
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield line_no, line
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _process_stream(lines: Iterator[Tuple[int, str]], fn: Callable, workers: int, chunk_size: int) -> Iterator[list]:
+    """Yield processed chunks in input order, keeping at most 2 chunks per worker in flight"""
+    chunks = _chunks(lines, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _run_stream(args: argparse.Namespace) -> int:
+    if args.command == "prefilter":
+        processor = _prefilter_record
+    elif args.command == "score":
+        processor = partial(_score_record, engine=ScoringEngine(), timeframe=args.timeframe)
+    else:
+        processor = partial(_rank_record, tab=args.tab, sol_usd=args.sol_usd)
+    fn = partial(_process_chunk, processor=processor)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    total = passed = errors = 0
+    top: List[Tuple[float, int, str]] = []
+    try:
+        for results in _process_stream(_read_lines(source), fn, args.workers, args.chunk_size):
+            for key, line_no, serialized, ok in results:
+                total += 1
+                if ok is None:
+                    errors += 1
+                elif ok:
+                    passed += 1
+                if args.command == "rank":
+                    # Only the best `--top` rows are kept, so memory stays bounded
+                    if ok is None:
+                        sink.write(serialized + "\n")
+                    elif len(top) < args.top:
+                        heapq.heappush(top, (key, -line_no, serialized))
+                    else:
+                        heapq.heappushpop(top, (key, -line_no, serialized))
+                else:
+                    sink.write(serialized + "\n")
+        for _, _, serialized in sorted(top, reverse=True):
+            sink.write(serialized + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.command}: {total} records, {passed} passed, {errors} invalid "
+        f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} records/s)",
+        file=sys.stderr,
+    )
+    if args.command == "prefilter":
+        return 0 if errors == 0 and passed == total else 1
+    return 0 if errors == 0 else 1
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.main",
+        description="Bulk pre-filter, scoring and ranking over JSONL token snapshots (one JSON object per line).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p: argparse.ArgumentParser):
+        p.add_argument("input", help="JSONL input path, or - for stdin")
+        p.add_argument("-o", "--output", default="-", help="JSONL output path (default: stdout)")
+        p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (1 = in-process)")
+        p.add_argument("--chunk-size", type=int, default=1000, help="records per worker task")
+
+    add_common(sub.add_parser("prefilter", help="run the pre-filter on TokenData records"))
+    score = sub.add_parser("score", help="pre-filter and score TokenData records with an optional flat 'metrics' object")
+    add_common(score)
+    score.add_argument("--timeframe", choices=["5m", "15m", "30m", "1h"], default="1h")
+    rank = sub.add_parser("rank", help="rank RankRow records and write the top N")
+    add_common(rank)
+    rank.add_argument("--tab", choices=list(RANK_FORMULAS), default="All")
+    rank.add_argument("--top", type=int, default=100)
+    rank.add_argument("--sol-usd", type=float, default=225.0)
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return _run_stream(_build_parser().parse_args(argv))
+
+    # Legacy mode: a single JSON document (object or array) in, a JSON array out
+    path = Path(argv[0]) if argv else Path("data/mock_data.json")
     if not path.exists():
         print(f"Input not found: {path}")
         return 2
@@ -34,5 +240,3 @@ def main() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
-
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metric name -> (type, help, label names)
+METRICS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "dvm_stage_duration_seconds": (
+        "histogram", "Wall time of each pipeline stage", ("stage", "provider")),
+    "dvm_cache_requests_total": (
+        "counter", "Cache lookups by cache and result (hit/miss)", ("cache", "result")),
+    "dvm_provider_errors_total": (
+        "counter", "Failed provider calls by provider and kind", ("provider", "kind")),
+    "dvm_prefilter_failures_total": (
+        "counter", "Pre-filter check failures by check name", ("check",)),
+    "dvm_tokens_ranked_total": (
+        "counter", "Tokens returned by /rank per tab", ("tab",)),
+}
+
+STAGE_SECONDS = "dvm_stage_duration_seconds"
+CACHE_REQUESTS = "dvm_cache_requests_total"
+PROVIDER_ERRORS = "dvm_provider_errors_total"
+PREFILTER_FAILURES = "dvm_prefilter_failures_total"
+TOKENS_RANKED = "dvm_tokens_ranked_total"
+
+
+class _Shard:
+    """One thread's private counters and histograms; only its owner thread writes to it"""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Tuple[str, ...]], List[float]] = {}
+
+    def merge_into(self, counters: dict, histograms: dict):
+        for key, value in list(self.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, values in list(self.histograms.items()):
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(values)
+            else:
+                for i, v in enumerate(values):
+                    total[i] += v
+
+
+class Registry:
+    """Per-thread metric aggregation.
+
+    Every thread records into its own shard without locking; the lock is only
+    taken when a thread records for the first time and when ``render`` sums the
+    shards. Shards of finished threads (e.g. the per-extraction provider pool)
+    are folded into a retired shard so memory does not grow with thread churn.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._retired = _Shard()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                shard.merge_into(self._retired.counters, self._retired.histograms)
+        self._shards = alive
+
+    def inc(self, name: str, labels: Tuple[str, ...] = (), amount: float = 1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, labels: Tuple[str, ...] = ()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0.0] * (len(BUCKETS) + 2)
+        values[bisect_left(BUCKETS, seconds)] += 1
+        values[-1] += seconds
+
+    def snapshot(self) -> Tuple[dict, dict]:
+        """Summed (counters, histograms) over every thread"""
+        counters: dict = {}
+        histograms: dict = {}
+        with self._lock:
+            self._retire_dead()
+            self._retired.merge_into(counters, histograms)
+            for _, shard in self._shards:
+                shard.merge_into(counters, histograms)
+        return counters, histograms
+
+    def reset(self):
+        with self._lock:
+            self._retired = _Shard()
+            for _, shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        counters, histograms = self.snapshot()
+        lines = []
+        for name, (kind, help_text, label_names) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(label_names, labels)} {_number(value)}")
+            else:
+                for (metric, labels), values in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0.0
+                    for bound, count in zip(BUCKETS + (float("inf"),), values):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {_number(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(label_names, labels)} {values[-1]!r}")
+                    lines.append(f"{name}_count{_labels(label_names, labels)} {_number(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], le: str = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values) if v != ""]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+
+
+class timed:
+    """Record the wall time of a block as a pipeline stage::
+
+        with timed("scoring"):
+            ...
+        with timed("provider", "birdeye"):
+            ...
+        stage = timed("ranking").start()
+        ...
+        stage.stop()
+    """
+
+    __slots__ = ("labels", "started")
+
+    def __init__(self, stage: str, provider: str = ""):
+        self.labels = (stage, provider)
+
+    def __enter__(self) -> "timed":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        registry.observe(STAGE_SECONDS, elapsed, self.labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(self.labels, elapsed)
+
+    # For stages that span too much code for a ``with`` block
+    start = __enter__
+
+    def stop(self):
+        self.__exit__()
+
+
+def inc(name: str, *labels: str, amount: float = 1):
+    registry.inc(name, labels, amount)
+
+
+# --- Per-request timings (Server-Timing) ----------------------------------------------
+
+
+class RequestTimings:
+    """Wall time per stage for one request, optionally broken down per token.
+
+    Stages that run in parallel (provider calls) each report their own wall
+    time, so stage totals can add up to more than the request took.
+    """
+
+    __slots__ = ("started", "stages", "tokens")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.tokens: Dict[str, Dict[str, float]] = {}
+
+    def add(self, labels: Tuple[str, str], seconds: float):
+        name = f"{labels[0]}.{labels[1]}" if labels[1] else labels[0]
+        ms = seconds * 1000
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+        token = _token_scope.get()
+        if token is not None:
+            per_token = self.tokens.setdefault(token, {})
+            per_token[name] = per_token.get(name, 0.0) + ms
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self) -> str:
+        """``Server-Timing`` header value"""
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        entries.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, object]:
+        out: Dict[str, object] = {
+            "total_ms": round(self.total_ms(), 3),
+            "stages_ms": {name: round(ms, 3) for name, ms in self.stages.items()},
+        }
+        if self.tokens:
+            out["tokens"] = {
+                token: {name: round(ms, 3) for name, ms in stages.items()}
+                for token, stages in self.tokens.items()
+            }
+        return out
+
+
+_request_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None)
+_token_scope: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("token_scope", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def set_token_scope(token: Optional[str]):
+    """Attribute stages recorded from here on in this context to ``token`` (``None`` to stop)"""
+    _token_scope.set(token)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware collecting stage timings per request into a ``Server-Timing`` header.
+
+    Work handed to other threads only reports into the request when it runs in
+    a copied context (``contextvars.copy_context().run``).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        reset_token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                # Lets cross-origin frontends read the entries through the Resource Timing API
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(reset_token)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import zlib
+from typing import Dict, IO, Optional
+
+
+# Loggers configured here; module loggers (app.api.server, extractors.unified_extractor, ...) inherit from them
+ROOT_LOGGERS = ("app", "extractors")
+
+DEFAULT_LEVEL = "INFO"
+# Share of tokens whose per-token DEBUG events are kept
+DEFAULT_SAMPLE_RATE = 0.1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_sample_rate = DEFAULT_SAMPLE_RATE
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def token_sampled(token: Optional[str], rate: Optional[float] = None) -> bool:
+    """Deterministic per-token sampling, so a kept token keeps all of its events"""
+    rate = _sample_rate if rate is None else rate
+    if rate >= 1 or token is None:
+        return True
+    if rate <= 0:
+        return False
+    return zlib.crc32(token.encode()) % 10_000 < rate * 10_000
+
+
+def debug_token(logger: logging.Logger, token: Optional[str]) -> bool:
+    """Whether a per-token DEBUG event should be built at all; guard expensive ``extra`` with it"""
+    return logger.isEnabledFor(logging.DEBUG) and token_sampled(token)
+
+
+def token_extra(token: Optional[str], **fields) -> Dict[str, object]:
+    """``extra=`` payload for a per-token event (structured fields end up in JSON output)"""
+    return {"token": token, "fields": fields}
+
+
+class TokenSamplingFilter(logging.Filter):
+    """Drops DEBUG records of tokens outside the sample; other records always pass"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return token_sampled(getattr(record, "token", None))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        token = getattr(record, "token", None)
+        if token is not None:
+            out["token"] = token
+        fields = getattr(record, "fields", None)
+        if fields:
+            out.update(fields)
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    """``'app.utils.pre_filter=DEBUG,extractors=WARNING'`` -> ``{logger: level}``"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: Optional[str] = None, modules: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_rate: Optional[float] = None, stream: Optional[IO[str]] = None) -> logging.handlers.QueueListener:
+    """Route ``app.*`` and ``extractors.*`` loggers through a queue to a background writer thread.
+
+    Settings default to ``DVM_LOG_LEVEL``, ``DVM_LOG_MODULES`` (per-module levels),
+    ``DVM_LOG_FORMAT`` (``text`` or ``json``) and ``DVM_LOG_SAMPLE_RATE``.
+    Calling it again replaces the previous configuration.
+    """
+    global _listener, _sample_rate
+    shutdown_logging()
+
+    level = (level or os.getenv("DVM_LOG_LEVEL", DEFAULT_LEVEL)).upper()
+    modules = modules if modules is not None else os.getenv("DVM_LOG_MODULES", "")
+    fmt = fmt or os.getenv("DVM_LOG_FORMAT", "text")
+    _sample_rate = float(sample_rate if sample_rate is not None else os.getenv("DVM_LOG_SAMPLE_RATE", DEFAULT_SAMPLE_RATE))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(TokenSamplingFilter())
+
+    for name in ROOT_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    for name, module_level in _parse_levels(modules).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records, stop the writer thread and detach the queue handlers"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for name in ROOT_LOGGERS:
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logger.removeHandler(handler)
+        logger.propagate = True
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+
+# Allocations made by tracemalloc itself and by the import system are noise in a top list
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+
+def deep_sizeof(obj: object) -> int:
+    """``sys.getsizeof`` summed over containers (dict, list, tuple, set) and their contents.
+
+    Shared objects are counted once. Good enough to compare structures of
+    decoded JSON; it does not follow object attributes.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, when the platform exposes it"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryAccounting:
+    """Named byte estimates for long-lived structures plus tracemalloc allocation sites.
+
+    Caches register an estimator (usually their ``estimated_bytes``); tracing
+    is off until ``start`` because tracemalloc slows every allocation. The
+    snapshot taken at ``start`` is the baseline for ``diff``, which is what
+    shows a leak: sites whose live size keeps growing between reports.
+    """
+
+    def __init__(self):
+        self._estimators: Dict[str, Callable[[], int]] = {}
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def register(self, name: str, estimator: Callable[[], int]):
+        self._estimators[name] = estimator
+
+    def structures(self) -> Dict[str, int]:
+        return {name: int(estimate()) for name, estimate in self._estimators.items()}
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        """Start (or restart) tracing and take the baseline snapshot"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+
+    def stop(self):
+        tracemalloc.stop()
+        self._baseline = None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def top(self, limit: int = 20, group_by: str = "lineno", diff: bool = False) -> List[Dict[str, object]]:
+        """Largest allocation sites, or the largest growth since ``start`` with ``diff``"""
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = self._snapshot()
+        if diff and self._baseline is not None:
+            return [
+                {"site": _site(stat.traceback), "bytes": stat.size, "count": stat.count,
+                 "bytes_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(self._baseline, group_by)[:limit]
+            ]
+        return [
+            {"site": _site(stat.traceback), "bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+    def report(self, limit: int = 20, group_by: str = "lineno", diff: bool = False) -> Dict[str, object]:
+        out: Dict[str, object] = {
+            "rss_bytes": rss_bytes(),
+            "gc_objects": len(gc.get_objects()),
+            "structures_bytes": self.structures(),
+            "tracing": self.tracing,
+        }
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            out["traced_bytes"] = current
+            out["traced_peak_bytes"] = peak
+            out["top"] = self.top(limit, group_by, diff)
+        return out
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    # Innermost frame first, like the tracemalloc docs' output
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback))
+
+
+memory = MemoryAccounting()
@@ -3,6 +3,10 @@ from __future__ import annotations
 from typing import Dict, Tuple
 
 from app.models import PreFilterResult, TokenData
+from app.utils.log import debug_token, get_logger, token_extra
+
+
+logger = get_logger(__name__)
 
 
 # Pre-filter thresholds per document requirements
@@ -123,25 +127,8 @@ def check_bundle_percent(token: TokenData) -> Tuple[bool, Dict[str, float]]:
     }
 
 
-def run_pre_filter(token: TokenData) -> PreFilterResult:
-    # Print debug information about the token
-    print("\n" + "="*60)
-    print("PRE-FILTER DEBUG - Token Values:")
-    print("="*60)
-    print(f"Token Address: {token.token_address}")
-    print(f"Token Symbol: {token.token_symbol}")
-    print(f"Token Age: {token.token_age_minutes} minutes")
-    print(f"Liquidity Locked: {token.liquidity_locked_percent}%")
-    print(f"Volume (5m): ${token.volume_5m_usd:,.2f}")
-    print(f"Holders Count: {token.holders_count}")
-    print(f"LP Count: {token.lp_count}")
-    print(f"LP/MCap Ratio: {token.lp_mcap_ratio:.4f}")
-    print(f"Top 10 Holders: {token.top_10_holders_percent}%")
-    print(f"Bundle Percent: {token.bundle_percent}%")
-    print(f"DegenAudit: Honeypot={token.degen_audit.is_honeypot}, Blacklist={token.degen_audit.has_blacklist}")
-    print(f"           Buy Tax={token.degen_audit.buy_tax_percent}%, Sell Tax={token.degen_audit.sell_tax_percent}%")
-    print("="*60)
-    
+def run_pre_filter(token: TokenData, verbose: bool = True) -> PreFilterResult:
+    """Run every pre-filter check; with ``verbose`` the per-check results are logged at DEBUG (sampled per token)"""
     checks = {
         "age_gt_1h": check_token_age,
         "degen_audit_pass": check_degen_audit,
@@ -157,24 +144,24 @@ def run_pre_filter(token: TokenData) -> PreFilterResult:
     failed = []
     details: Dict[str, object] = {}
     
-    print("\nPre-filter Check Results:")
-    print("-" * 60)
-    
     for name, fn in checks.items():
         ok, info = fn(token)
         details[name] = info
         if not ok:
             failed.append(name)
-        
-        # Print check result with actual vs required values
-        status = "✓ PASS" if ok else "✗ FAIL"
-        print(f"{status} | {name}: {info}")
     
-    print("-" * 60)
-    print(f"Overall Result: {'PASSED' if len(failed) == 0 else 'FAILED'}")
-    if failed:
-        print(f"Failed checks: {', '.join(failed)}")
-    print("="*60 + "\n")
+    if verbose and debug_token(logger, token.token_address):
+        logger.debug(
+            "pre-filter %s %s: %s", token.token_symbol, token.token_address,
+            "PASSED" if not failed else "FAILED " + ", ".join(failed),
+            extra=token_extra(
+                token.token_address,
+                passed=not failed,
+                failed_checks=failed,
+                token_values=token.model_dump(exclude={"token_address"}),
+                checks=details,
+            ),
+        )
 
     return PreFilterResult(
         token_address=token.token_address,
@@ -182,5 +169,3 @@ def run_pre_filter(token: TokenData) -> PreFilterResult:
         failed_checks=failed,
         details=details,
     )
-
-
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# Snapshot columns kept for every sample in a token's ring buffer
+FIELDS = ("timestamp", "price_now", "mc_now", "vol_now", "holders_count", "lp_mcap_ratio")
+_TS, _PRICE, _MC, _VOL, _HOLDERS, _LP_MCAP = range(len(FIELDS))
+
+# Per-token scalar state stored ahead of the ring in the same array
+_HEAD, _COUNT, _PEAK_PRICE, _PEAK_TS, _ATH_HIT = range(5)
+_STATE_SIZE = 5
+
+# Rough fixed cost of one tracked token besides its array payload
+# (array header, OrderedDict entry and the address string)
+_PER_TOKEN_OVERHEAD_BYTES = 250
+
+_MISSING = math.nan
+
+
+def _pct_change(new: float, old: float) -> Optional[float]:
+    if math.isnan(new) or math.isnan(old) or old <= 0:
+        return None
+    return (new - old) / old * 100
+
+
+class TokenSeriesStore:
+    """Fixed-size ring buffers of extraction snapshots, one per token.
+
+    Each token owns a single ``array('d')`` of ``5 + capacity * len(FIELDS)``
+    doubles, so memory per token is constant and known up front. Deltas are
+    taken between the newest and oldest sample in the ring; peaks are tracked
+    incrementally, so both ``record`` and ``metrics`` are O(1). When more than
+    ``max_tokens`` are tracked the least recently updated token is dropped.
+    """
+
+    def __init__(self, capacity: int = 32, max_tokens: int = 100_000):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.max_tokens = max_tokens
+        self._series: "OrderedDict[str, array]" = OrderedDict()
+
+    @property
+    def bytes_per_token(self) -> int:
+        return (_STATE_SIZE + self.capacity * len(FIELDS)) * 8 + _PER_TOKEN_OVERHEAD_BYTES
+
+    def estimated_bytes(self) -> int:
+        return len(self._series) * self.bytes_per_token
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __contains__(self, token_address: str) -> bool:
+        return token_address in self._series
+
+    @staticmethod
+    def _slot(index: int) -> int:
+        return _STATE_SIZE + index * len(FIELDS)
+
+    def record(self, token_address: str, snapshot: Dict[str, float], timestamp: Optional[float] = None) -> Dict[str, object]:
+        """Append a snapshot (extraction ``combined_data`` or a rank row) and return the updated metrics"""
+        buf = self._series.get(token_address)
+        if buf is None:
+            if len(self._series) >= self.max_tokens:
+                self._series.popitem(last=False)
+            buf = array("d", bytes(8 * (_STATE_SIZE + self.capacity * len(FIELDS))))
+            buf[_PEAK_PRICE] = _MISSING
+            self._series[token_address] = buf
+        else:
+            self._series.move_to_end(token_address)
+
+        values = (
+            time.time() if timestamp is None else timestamp,
+            snapshot.get("price_now"),
+            snapshot.get("mc_now"),
+            snapshot.get("vol_now", snapshot.get("volume_24h_usd")),
+            snapshot.get("holders_count", snapshot.get("holders_now")),
+            snapshot.get("lp_mcap_ratio"),
+        )
+        head = int(buf[_HEAD])
+        base = self._slot(head)
+        for i, value in enumerate(values):
+            buf[base + i] = _MISSING if value is None else float(value)
+
+        # Peak / ATH tracking over everything seen for this token
+        price = buf[base + _PRICE]
+        if not math.isnan(price):
+            peak = buf[_PEAK_PRICE]
+            is_new_peak = math.isnan(peak) or price >= peak
+            buf[_ATH_HIT] = 1.0 if is_new_peak and buf[_COUNT] >= 1 else 0.0
+            if is_new_peak:
+                buf[_PEAK_PRICE] = price
+                buf[_PEAK_TS] = buf[base + _TS]
+        else:
+            buf[_ATH_HIT] = 0.0
+
+        buf[_HEAD] = (head + 1) % self.capacity
+        buf[_COUNT] = min(buf[_COUNT] + 1, self.capacity)
+        return self.metrics(token_address)
+
+    def metrics(self, token_address: str) -> Optional[Dict[str, object]]:
+        """Growth and delta metrics between the oldest and newest buffered snapshot"""
+        buf = self._series.get(token_address)
+        if buf is None:
+            return None
+        count = int(buf[_COUNT])
+        head = int(buf[_HEAD])
+        newest = self._slot((head - 1) % self.capacity)
+        oldest = self._slot((head - count) % self.capacity)
+
+        holders_change = _pct_change(buf[newest + _HOLDERS], buf[oldest + _HOLDERS])
+        peak_ts = buf[_PEAK_TS] if not math.isnan(buf[_PEAK_PRICE]) else buf[newest + _TS]
+        return {
+            "samples": count,
+            "window_minutes": (buf[newest + _TS] - buf[oldest + _TS]) / 60,
+            "mc_change_pct": _pct_change(buf[newest + _MC], buf[oldest + _MC]),
+            "vol_change_pct": _pct_change(buf[newest + _VOL], buf[oldest + _VOL]),
+            "holders_change_pct": holders_change,
+            "holders_growth_percent": holders_change,
+            "lp_mcap_delta_percent": _pct_change(buf[newest + _LP_MCAP], buf[oldest + _LP_MCAP]),
+            "minutes_since_peak": max(0.0, (buf[newest + _TS] - peak_ts) / 60),
+            "ath_hit": bool(buf[_ATH_HIT]),
+        }
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+# Scoring timeframes and their window length in minutes
+TIMEFRAME_MINUTES = {"5m": 5, "15m": 15, "30m": 30, "1h": 60}
+
+# Per-token state stored ahead of the minute buckets in the same array
+_LAST_MINUTE, _COVERED, _DAILY_RATE, _TOTAL = range(4)
+_SUMS = 4  # running sums for each timeframe follow, in TIMEFRAME_MINUTES order
+_STATE_SIZE = _SUMS + len(TIMEFRAME_MINUTES)
+_WINDOWS = tuple(TIMEFRAME_MINUTES.values())
+
+# Use the bucket history as the baseline once it covers this many minutes;
+# before that the 24h average from the provider is the better reference
+MIN_BASELINE_MINUTES = 60
+
+
+class VolumeWindowAggregator:
+    """Rolling per-token volume at 1-minute resolution.
+
+    Samples are trailing-window volumes as reported by DexScreener
+    (``volume.m5``) or exact per-minute candles from Birdeye. Each token keeps
+    ``history_minutes`` buckets in one ``array('d')`` plus running sums for
+    every scoring timeframe, so ratios are O(1) to read and advancing the clock
+    costs O(1) per elapsed minute (bounded by ``history_minutes``).
+
+    ``vol_over_avg_ratio`` for a timeframe is the volume in the last window
+    divided by the average volume of a window of that length over the whole
+    history (or the 24h average while history is short).
+    """
+
+    def __init__(self, history_minutes: int = 240, max_tokens: int = 100_000):
+        if history_minutes < max(_WINDOWS) + 1:
+            raise ValueError(f"history_minutes must exceed {max(_WINDOWS)}")
+        self.history_minutes = history_minutes
+        self.max_tokens = max_tokens
+        self._tokens: "OrderedDict[str, array]" = OrderedDict()
+
+    @property
+    def bytes_per_token(self) -> int:
+        # Array payload plus a rough fixed cost for the array header, dict entry and key
+        return (_STATE_SIZE + self.history_minutes) * 8 + 250
+
+    def estimated_bytes(self) -> int:
+        return len(self._tokens) * self.bytes_per_token
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _state(self, token_address: str, first_minute: int) -> array:
+        buf = self._tokens.get(token_address)
+        if buf is None:
+            if len(self._tokens) >= self.max_tokens:
+                self._tokens.popitem(last=False)
+            buf = array("d", bytes(8 * (_STATE_SIZE + self.history_minutes)))
+            buf[_LAST_MINUTE] = first_minute - 1
+            self._tokens[token_address] = buf
+        else:
+            self._tokens.move_to_end(token_address)
+        return buf
+
+    def _reset(self, buf: array, first_minute: int):
+        """Forget every bucket once a gap outlasts the history; the 24h rate is kept"""
+        daily_rate = buf[_DAILY_RATE]
+        buf[:] = array("d", bytes(8 * len(buf)))
+        buf[_DAILY_RATE] = daily_rate
+        buf[_LAST_MINUTE] = first_minute - 1
+
+    def _push(self, buf: array, minute: int, volume: float):
+        """Write the bucket for ``minute`` (the next minute) and roll every running sum forward"""
+        history = self.history_minutes
+        for i, window in enumerate(_WINDOWS):
+            buf[_SUMS + i] += volume - buf[_STATE_SIZE + (minute - window) % history]
+        buf[_TOTAL] += volume - buf[_STATE_SIZE + minute % history]
+        buf[_STATE_SIZE + minute % history] = volume
+        buf[_LAST_MINUTE] = minute
+        buf[_COVERED] = min(buf[_COVERED] + 1, history)
+
+    def _set_current(self, buf: array, minute: int, volume: float):
+        """Replace the bucket of the current minute with a newer estimate"""
+        slot = _STATE_SIZE + minute % self.history_minutes
+        delta = volume - buf[slot]
+        for i in range(len(_WINDOWS)):
+            buf[_SUMS + i] += delta
+        buf[_TOTAL] += delta
+        buf[slot] = volume
+
+    def add_sample(self, token_address: str, volume_usd: float, window_seconds: int = 300,
+                   volume_24h_usd: Optional[float] = None, timestamp: Optional[float] = None):
+        """Record a trailing-window volume sample (e.g. DexScreener ``volume_5m_usd``).
+
+        The sample's per-minute rate fills the minutes since the previous sample
+        that fall inside its window; older gap minutes use the 24h average when known.
+        """
+        minute = int((time.time() if timestamp is None else timestamp) // 60)
+        window_minutes = max(1, int(window_seconds // 60))
+        # A token's first sample already covers its whole window
+        buf = self._state(token_address, minute - window_minutes + 1)
+        if volume_24h_usd:
+            buf[_DAILY_RATE] = volume_24h_usd / 1440
+        rate = max(0.0, volume_usd) / window_minutes
+
+        last = int(buf[_LAST_MINUTE])
+        if minute <= last:
+            if minute == last:
+                self._set_current(buf, minute, rate)
+            return
+        if minute - last >= self.history_minutes:
+            # Nothing in the buckets is recent enough to keep: start over like a new token
+            self._reset(buf, minute - window_minutes + 1)
+            last = int(buf[_LAST_MINUTE])
+        for m in range(last + 1, minute + 1):
+            inside_window = minute - m < window_minutes
+            self._push(buf, m, rate if inside_window or not buf[_DAILY_RATE] else buf[_DAILY_RATE])
+
+    def add_minute_volume(self, token_address: str, volume_usd: float, timestamp: Optional[float] = None):
+        """Record the exact volume of one minute (e.g. a Birdeye 1m candle)"""
+        minute = int((time.time() if timestamp is None else timestamp) // 60)
+        buf = self._state(token_address, minute)
+        last = int(buf[_LAST_MINUTE])
+        if minute <= last:
+            if minute == last:
+                self._set_current(buf, minute, volume_usd)
+            return
+        if minute - last >= self.history_minutes:
+            self._reset(buf, minute)
+            last = minute - 1
+        for m in range(last + 1, minute):
+            self._push(buf, m, 0.0)
+        self._push(buf, minute, volume_usd)
+
+    def ratios(self, token_address: str) -> Dict[str, Optional[float]]:
+        """``vol_over_avg_ratio`` for every scoring timeframe (None when there isn't enough data)"""
+        buf = self._tokens.get(token_address)
+        if buf is None:
+            return {tf: None for tf in TIMEFRAME_MINUTES}
+        covered = buf[_COVERED]
+        if covered >= MIN_BASELINE_MINUTES and buf[_TOTAL] > 0:
+            baseline_rate = buf[_TOTAL] / covered
+        else:
+            baseline_rate = buf[_DAILY_RATE]
+        ratios = {}
+        for i, (tf, window) in enumerate(TIMEFRAME_MINUTES.items()):
+            if covered < window or baseline_rate <= 0:
+                ratios[tf] = None
+            else:
+                ratios[tf] = max(0.0, buf[_SUMS + i]) / (baseline_rate * window)
+        return ratios
+
+    def momentum_fields(self, token_address: str, timeframe: str = "1h") -> Dict[str, float]:
+        """``MomentumMetrics`` fields for a timeframe, falling back to the longest covered shorter window"""
+        ratios = self.ratios(token_address)
+        names = list(TIMEFRAME_MINUTES)
+        for tf in reversed(names[: names.index(timeframe) + 1]):
+            if ratios[tf] is not None:
+                return {"vol_over_avg_ratio": ratios[tf]}
+        return {}
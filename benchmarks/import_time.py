@@ -0,0 +1,84 @@
+"""Cold import time of the API server and the CLI, from ``python -X importtime``.
+
+Each module is imported in a fresh interpreter, so the numbers are what an
+autoscaled worker or a ``python -m app.main`` run pays before doing any work::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time app.api.server --top 20 --budget-ms 750
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+MODULES = ["app.api.server", "app.main"]
+
+# Cumulative import time per module (ms); override with DVM_IMPORT_BUDGET_MS
+DEFAULT_BUDGET_MS = 1000.0
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(module: str) -> Dict[str, object]:
+    """Self and cumulative import time (µs) of everything ``module`` pulls in, in a fresh interpreter"""
+    # ``-c`` puts the working directory on sys.path, like ``python -m``
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    imports: Dict[str, Dict[str, int]] = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                             "depth": len(indent) // 2}
+    if module not in imports:
+        raise RuntimeError(f"no importtime line for {module}")
+    return {"module": module, "total_ms": imports[module]["cumulative_us"] / 1000, "imports": imports}
+
+
+def heaviest(result: Dict[str, object], top: int = 10) -> List[tuple]:
+    """``(name, cumulative ms)`` of the slowest imports under the measured module"""
+    imports = result["imports"]
+    rows = [(name, i["cumulative_us"] / 1000) for name, i in imports.items() if name != result["module"]]
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def budget_ms() -> float:
+    return float(os.getenv("DVM_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per module")
+    parser.add_argument("--budget-ms", type=float, default=None, help=f"fail above this (default {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument("-o", "--output", help="write the measurements as JSON")
+    args = parser.parse_args(argv)
+    budget = args.budget_ms if args.budget_ms is not None else budget_ms()
+
+    results = [import_times(module) for module in args.modules]
+    over = []
+    for result in results:
+        status = "ok" if result["total_ms"] <= budget else "OVER BUDGET"
+        print(f"{result['module']}: {result['total_ms']:.1f} ms (budget {budget:.0f} ms) {status}")
+        for name, ms in heaviest(result, args.top):
+            print(f"  {ms:>8.1f} ms  {name}")
+        if result["total_ms"] > budget:
+            over.append(result["module"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.micro import metrics_payload, rank_row_payload, token_payload
+from extractors.provider_sim import ProviderSimulator, SyntheticUniverse, build_faults
+
+
+DEFAULT_OUTPUT = "benchmarks/load_results.json"
+
+# Histogram bucket upper bounds in milliseconds (roughly x2 steps up to 60s)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 30_000, 60_000)
+
+
+# --- Scenarios -------------------------------------------------------------------------
+
+
+@dataclass
+class Scenario:
+    """A request mix: closed loop (``concurrency`` callers back to back) or open loop at ``rate``/s"""
+    name: str
+    path: str
+    payload: Callable[[random.Random, List[str]], dict]
+    concurrency: int = 1
+    rate: Optional[float] = None
+    requests: Optional[int] = None
+    duration: float = 10.0
+    description: str = ""
+
+
+def _score_payload(rng: random.Random, tokens: List[str]) -> dict:
+    token = token_payload(rng)
+    token["token_address"] = rng.choice(tokens)
+    metrics = {}
+    for group in metrics_payload(rng).values():
+        metrics.update(group)
+    return {"token": token, "metrics": metrics}
+
+
+def _rank_payload(rows: int) -> Callable[[random.Random, List[str]], dict]:
+    def payload(rng: random.Random, tokens: List[str]) -> dict:
+        out = []
+        for address in rng.sample(tokens, min(rows, len(tokens))):
+            row = rank_row_payload(rng)
+            row["id"] = address
+            out.append(row)
+        return {"tab": rng.choice(["New", "Surging", "All"]), "rows": out}
+    return payload
+
+
+def _extract_payload(rng: random.Random, tokens: List[str]) -> dict:
+    return {"token_address": rng.choice(tokens)}
+
+
+def _report_payload(rng: random.Random, tokens: List[str]) -> dict:
+    metrics = metrics_payload(rng)
+    return {
+        "token_data": {"token_address": rng.choice(tokens), "token_symbol": "SIM", "token_name": "Simulated Token"},
+        "metrics": metrics,
+        "score": rng.uniform(0, 100),
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("rank-100x50", "/rank", _rank_payload(50), concurrency=100, requests=200,
+             description="100 concurrent /rank requests of 50 rows each"),
+    Scenario("score-1k-rps", "/score", _score_payload, rate=1000, duration=10,
+             description="open-loop /score at 1000 requests/s"),
+    Scenario("extract-50", "/extract", _extract_payload, concurrency=50, requests=500,
+             description="50 concurrent /extract requests"),
+    Scenario("report-20", "/report", _report_payload, concurrency=20, requests=200,
+             description="20 concurrent /report requests"),
+)}
+
+
+# --- Measurement -------------------------------------------------------------------------
+
+
+class LoadResult:
+    """Latencies, status counts and Server-Timing stage durations of one scenario run"""
+
+    def __init__(self):
+        self.latencies_ms = array("d")
+        self.status: Dict[str, int] = defaultdict(int)
+        self.stages: Dict[str, array] = defaultdict(lambda: array("d"))
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, latency_ms: float, status: str, server_timing: Optional[str] = None):
+        self.latencies_ms.append(latency_ms)
+        self.status[status] += 1
+        if server_timing:
+            for name, duration in parse_server_timing(server_timing).items():
+                self.stages[name].append(duration)
+
+    def summary(self) -> Dict[str, object]:
+        ordered = sorted(self.latencies_ms)
+        total = len(ordered)
+        ok = sum(n for status, n in self.status.items() if status.startswith("2"))
+        histogram = {}
+        previous = 0
+        for bound in BUCKETS_MS:
+            count = _count_le(ordered, bound) - previous
+            histogram[f"<={bound}ms"] = count
+            previous += count
+        histogram[f">{BUCKETS_MS[-1]}ms"] = total - previous
+        return {
+            "requests": total,
+            "elapsed_s": self.elapsed,
+            "throughput_per_s": total / self.elapsed if self.elapsed else 0.0,
+            "error_rate": (total - ok) / total if total else 0.0,
+            "status": dict(self.status),
+            "latency_ms": _percentiles(ordered),
+            "histogram": histogram,
+            "stages_ms": {name: _percentiles(sorted(values)) for name, values in self.stages.items()},
+        }
+
+
+def _count_le(ordered: List[float], bound: float) -> int:
+    lo, hi = 0, len(ordered)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ordered[mid] <= bound:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _percentiles(ordered: List[float]) -> Dict[str, float]:
+    if not ordered:
+        return {"count": 0}
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "max": ordered[-1],
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """``'extract;dur=12.5, score;dur=0.4'`` -> ``{'extract': 12.5, 'score': 0.4}``"""
+    stages = {}
+    for entry in header.split(","):
+        parts = [p.strip() for p in entry.split(";")]
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key == "dur":
+                try:
+                    stages[parts[0]] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario, body: dict, result: LoadResult, start: float):
+    try:
+        response = await client.post(scenario.path, json=body)
+        status = str(response.status_code)
+        timing = response.headers.get("server-timing")
+    except httpx.HTTPError as e:
+        status, timing = type(e).__name__, None
+    result.add((time.perf_counter() - start) * 1000, status, timing)
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, tokens: List[str], seed: int = 7,
+                       duration: Optional[float] = None, requests: Optional[int] = None) -> Dict[str, object]:
+    """Drive ``scenario`` through ``client`` and summarise latencies.
+
+    Open-loop latency is measured from each request's scheduled send time, so
+    a server (or generator) that falls behind shows up as queueing delay
+    instead of silently lowering the offered rate.
+    """
+    rng = random.Random(f"{seed}:{scenario.name}")
+    duration = duration if duration is not None else scenario.duration
+    requests = requests if requests is not None else scenario.requests
+    result = LoadResult()
+
+    if scenario.rate:
+        total = requests or int(scenario.rate * duration)
+        interval = 1 / scenario.rate
+        tasks = []
+        t0 = time.perf_counter()
+        for i in range(total):
+            scheduled = t0 + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(_send(client, scenario, scenario.payload(rng, tokens), result, scheduled)))
+        await asyncio.gather(*tasks)
+    else:
+        deadline = None if requests else time.perf_counter() + duration
+        remaining = [requests or math.inf]
+
+        async def caller():
+            while remaining[0] > 0 and (deadline is None or time.perf_counter() < deadline):
+                remaining[0] -= 1
+                await _send(client, scenario, scenario.payload(rng, tokens), result, time.perf_counter())
+
+        await asyncio.gather(*(caller() for _ in range(scenario.concurrency)))
+
+    result.elapsed = time.perf_counter() - result.started
+    return result.summary()
+
+
+# --- Server under test -----------------------------------------------------------------
+
+
+class ServerProcess:
+    """``uvicorn app.api.server:app`` in a subprocess with the given worker count"""
+
+    def __init__(self, workers: int, port: int, env: Dict[str, str], log_path: Optional[str] = None):
+        self.workers = workers
+        self.port = port
+        self.env = {**os.environ, **env}
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60.0) -> "ServerProcess":
+        log = open(self.log_path, "ab") if self.log_path else subprocess.DEVNULL
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.api.server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--no-access-log"],
+            env=self.env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"uvicorn did not become healthy within {timeout:.0f}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _provider_stages(simulator: ProviderSimulator) -> Dict[str, object]:
+    stages = {}
+    for provider, stats in simulator.stats.items():
+        if stats["requests"]:
+            summary = _percentiles(sorted(s * 1000 for s in stats["latency_s"]))
+            summary["status"] = dict(stats["status"])
+            stages[provider] = summary
+    return stages
+
+
+def _print_summary(label: str, summary: Dict[str, object]):
+    latency = summary["latency_ms"]
+    print(f"\n▶ {label}")
+    print(f"  {summary['requests']:,} requests in {summary['elapsed_s']:.1f}s "
+          f"({summary['throughput_per_s']:,.1f}/s), error rate {summary['error_rate']:.2%} {summary['status']}")
+    if latency.get("count"):
+        print(f"  latency ms  p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  "
+              f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    peak = max(summary["histogram"].values()) or 1
+    for bucket, count in summary["histogram"].items():
+        if count:
+            print(f"  {bucket:>9} {count:>8,} {'█' * max(1, int(40 * count / peak))}")
+    for group in ("stages_ms", "provider_ms"):
+        for name, stage in summary.get(group, {}).items():
+            if stage.get("count"):
+                print(f"  {group[:-3]} {name:<14} n={stage['count']:<7,} p50 {stage['p50']:.1f}  p99 {stage['p99']:.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description="Load-test the API against the offline provider simulator.",
+    )
+    parser.add_argument("--scenarios", default="rank-100x50,score-1k-rps",
+                        help=f"comma-separated scenarios (available: {', '.join(SCENARIOS)})")
+    parser.add_argument("--workers", default="1", help="comma-separated uvicorn worker counts to compare")
+    parser.add_argument("--target", help="load-test an already running server instead of starting uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sim-port", type=int, default=0, help="provider simulator port (default: any free port)")
+    parser.add_argument("--duration", type=float, help="override scenario duration (seconds)")
+    parser.add_argument("--requests", type=int, help="override scenario request count")
+    parser.add_argument("--synthetic", type=int, default=1000, help="synthetic tokens served by the simulator")
+    parser.add_argument("--latency", action="append", default=None,
+                        help="simulator latency, PROVIDER=SPEC (default '*=lognormal:40:0.5')")
+    parser.add_argument("--errors", action="append", help="simulator errors, PROVIDER=5XX_RATE,429_RATE")
+    parser.add_argument("--rate-limit", action="append", help="simulator rate limit, PROVIDER=RPS")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--server-log", help="append uvicorn output to this file")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    names = [n for n in args.scenarios.split(",") if n]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    universe = SyntheticUniverse(args.synthetic, args.seed)
+    tokens = list(universe.tokens)
+    faults = build_faults(args.latency or ["*=lognormal:40:0.5"], args.errors, args.rate_limit, args.seed)
+    report = {"meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "seed": args.seed,
+                       "cpu_count": os.cpu_count(), "latency": args.latency, "errors": args.errors,
+                       "rate_limit": args.rate_limit}, "runs": []}
+
+    with ProviderSimulator(port=args.sim_port, universe=universe, faults=faults) as simulator:
+        print(f"🧪 Provider simulator on {simulator.url}")
+        worker_counts = [None] if args.target else [int(w) for w in args.workers.split(",")]
+        for workers in worker_counts:
+            server = None
+            if workers is not None:
+                print(f"🚀 Starting uvicorn with {workers} worker(s)")
+                server = ServerProcess(workers, args.port, simulator.env(), args.server_log).start()
+            base_url = args.target or server.url
+            try:
+                for name in names:
+                    scenario = SCENARIOS[name]
+                    simulator.reset_stats()
+                    limits = httpx.Limits(max_connections=max(scenario.concurrency, int(scenario.rate or 0), 1))
+                    async def go():
+                        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+                            return await run_scenario(client, scenario, tokens, args.seed, args.duration, args.requests)
+                    summary = asyncio.run(go())
+                    summary["provider_ms"] = _provider_stages(simulator)
+                    summary.update(scenario=name, workers=workers)
+                    report["runs"].append(summary)
+                    _print_summary(f"{name} ({scenario.description}), workers={workers or 'external'}", summary)
+            finally:
+                if server:
+                    server.stop()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
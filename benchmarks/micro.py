@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import pydantic
+
+from app.api.schemas import RankRow
+from app.engine.scoring_engine import ScoringEngine
+from app.models import TokenData
+from app.models.metrics import ScoreMetrics
+from app.ranker.formulas import score_all, score_new, score_surging
+from app.utils.pre_filter import run_pre_filter
+
+
+DEFAULT_SIZES = (1, 1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_OUTPUT = "benchmarks/results.json"
+
+# Distinct inputs generated per case; larger runs cycle through the pool so
+# input generation stays out of the measurement and memory reflects the work itself
+POOL_SIZE = 10_000
+
+# Small batches are repeated until at least this many calls were timed
+MIN_TIMED_CALLS = 1_000
+
+SOL_USD = 225.0
+
+
+# --- Synthetic inputs ------------------------------------------------------------
+
+
+def _address(rng: random.Random) -> str:
+    return "".join(rng.choice("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz") for _ in range(44))
+
+
+def token_payload(rng: random.Random) -> dict:
+    """A TokenData dict; roughly half of them pass the pre-filter"""
+    return {
+        "token_address": _address(rng),
+        "token_symbol": f"T{rng.randrange(1_000_000)}",
+        "token_name": "Synthetic Token",
+        "token_age_minutes": rng.randint(10, 10_000),
+        "degen_audit": {
+            "is_honeypot": rng.random() < 0.02,
+            "has_blacklist": rng.random() < 0.02,
+            "buy_tax_percent": rng.choice([0.0, 0.0, 1.0, 2.5, 5.0]),
+            "sell_tax_percent": rng.choice([0.0, 0.0, 1.0, 2.5, 5.0]),
+        },
+        "liquidity_locked_percent": rng.choice([100.0, 100.0, 100.0, 80.0]),
+        "volume_5m_usd": rng.lognormvariate(9, 1.2),
+        "holders_count": rng.randint(20, 20_000),
+        "lp_count": rng.randint(1, 5),
+        "lp_mcap_ratio": rng.uniform(0.005, 0.2),
+        "top_10_holders_percent": rng.uniform(5, 60),
+        "bundle_percent": rng.choice([None, rng.uniform(0, 60)]),
+    }
+
+
+def metrics_payload(rng: random.Random) -> dict:
+    """A ScoreMetrics dict with every metric populated"""
+    return {
+        "momentum": {
+            "vol_over_avg_ratio": rng.uniform(0, 5),
+            "price_change_percent": rng.uniform(-30, 60),
+            "ath_hit": rng.random() < 0.2,
+            "lp_mcap_delta_percent": rng.uniform(-20, 30),
+            "holders_growth_percent": rng.uniform(-10, 200),
+        },
+        "smart_money": {
+            "whale_buy_usd": rng.uniform(0, 100_000),
+            "whale_buy_supply_percent": rng.uniform(0, 1),
+            "dca_accumulation_supply_percent": rng.uniform(0, 1),
+            "net_inflow_wallets_gt_10k_usd": rng.uniform(-50_000, 100_000),
+        },
+        "sentiment": {
+            "mentions_velocity_ratio": rng.uniform(0, 5),
+            "tier1_kol_buy_supply_percent": rng.uniform(0, 0.5),
+            "influencer_reach": rng.randint(0, 1_000_000),
+            "polarity_positive_percent": rng.uniform(0, 100),
+        },
+        "event": {
+            "inflow_over_mcap_percent": rng.uniform(-5, 15),
+            "liquidity_outflow_percent": rng.uniform(0, 20),
+            "upgrade_or_staking_live": rng.random() < 0.1,
+        },
+    }
+
+
+def rank_row_payload(rng: random.Random) -> dict:
+    """A RankRow dict as the frontend sends to /rank"""
+    mc = rng.lognormvariate(13, 1.5)
+    vol = mc * rng.uniform(0.05, 3)
+    return {
+        "id": _address(rng),
+        "symbol": f"T{rng.randrange(1_000_000)}",
+        "name": "Synthetic Token",
+        "price_now": rng.lognormvariate(-8, 3),
+        "mc_now": mc,
+        "mc_change_pct": rng.uniform(-50, 300),
+        "vol_now": vol,
+        "vol_to_mc": vol / mc,
+        "lp_now": mc * rng.uniform(0.01, 0.2),
+        "holders_now": rng.randint(20, 20_000),
+        "netflow_now": rng.uniform(-vol, vol),
+        "whale_buy_count": rng.randint(0, 40),
+        "kolusd_now": rng.uniform(0, 2_000_000),
+        "kol_velocity": rng.uniform(0, 40),
+        "fee_sol_now": rng.uniform(0, 300),
+        "minutes_since_peak": rng.uniform(0, 120),
+        "top10_pct": rng.uniform(0.05, 0.6),
+        "bundle_pct": rng.uniform(0, 0.6),
+        "dca_flag": rng.randint(0, 1),
+        "ath_flag": rng.randint(0, 1),
+    }
+
+
+# --- Cases -------------------------------------------------------------------------
+
+
+@dataclass
+class Case:
+    """One benchmarked call: ``prepare`` builds the input pool, ``call`` runs once per input"""
+    name: str
+    prepare: Callable[[random.Random, int], list]
+    call: Callable[[object], object]
+
+
+def _pool(make: Callable[[random.Random], object]) -> Callable[[random.Random, int], list]:
+    return lambda rng, n: [make(rng) for _ in range(min(n, POOL_SIZE))]
+
+
+_engine = ScoringEngine()
+
+CASES: Dict[str, Case] = {case.name: case for case in (
+    Case("prefilter.run_pre_filter",
+         _pool(lambda rng: TokenData.model_validate(token_payload(rng))),
+         lambda token: run_pre_filter(token, verbose=False)),
+    Case("engine.score",
+         _pool(lambda rng: ScoreMetrics.model_validate(metrics_payload(rng))),
+         lambda metrics: _engine.score(metrics, "1h")),
+    Case("engine.score_all_timeframes",
+         _pool(lambda rng: ScoreMetrics.model_validate(metrics_payload(rng))),
+         _engine.score_all_timeframes),
+    Case("ranker.score_new", _pool(rank_row_payload), lambda row: score_new(row, SOL_USD)),
+    Case("ranker.score_surging", _pool(rank_row_payload), lambda row: score_surging(row, SOL_USD)),
+    Case("ranker.score_all", _pool(rank_row_payload), lambda row: score_all(row, SOL_USD)),
+    Case("models.TokenData", _pool(token_payload), TokenData.model_validate),
+    Case("models.ScoreMetrics", _pool(metrics_payload), ScoreMetrics.model_validate),
+    Case("models.RankRow", _pool(rank_row_payload), RankRow.model_validate),
+)}
+
+
+# --- Measurement ---------------------------------------------------------------------
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def _run_batch(case: Case, pool: list, size: int, latencies: Optional[array] = None) -> list:
+    """Call ``case`` ``size`` times, keeping every result alive like a batch ranker would"""
+    results = []
+    append = results.append
+    call = case.call
+    n = len(pool)
+    if latencies is None:
+        for i in range(size):
+            append(call(pool[i % n]))
+        return results
+    clock = time.perf_counter_ns
+    record = latencies.append
+    for i in range(size):
+        start = clock()
+        append(call(pool[i % n]))
+        record(clock() - start)
+    return results
+
+
+def run_case(case: Case, size: int, seed: int = 7, memory: bool = True) -> Dict[str, object]:
+    """Throughput, per-call latency percentiles and peak traced memory of ``size`` calls"""
+    pool = case.prepare(random.Random(f"{seed}:{case.name}"), size)
+    rounds = max(1, math.ceil(MIN_TIMED_CALLS / size))
+
+    # Throughput: untimed-per-call batches, best round wins
+    best = math.inf
+    for _ in range(rounds):
+        start = time.perf_counter()
+        _run_batch(case, pool, size)
+        best = min(best, time.perf_counter() - start)
+
+    # Latency: a separate pass with a clock read around every call
+    latencies = array("d")
+    for _ in range(rounds):
+        _run_batch(case, pool, size, latencies)
+    ordered = sorted(latencies)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            _run_batch(case, pool, size)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "case": case.name,
+        "size": size,
+        "seconds": best,
+        "throughput_per_s": size / best if best > 0 else float("inf"),
+        "latency_us": {
+            "mean": sum(ordered) / len(ordered) / 1000,
+            "p50": _percentile(ordered, 50) / 1000,
+            "p90": _percentile(ordered, 90) / 1000,
+            "p99": _percentile(ordered, 99) / 1000,
+        },
+        "peak_memory_bytes": peak,
+    }
+
+
+def run(cases: List[str], sizes: List[int], seed: int = 7, memory: bool = True,
+        progress: Optional[Callable[[Dict[str, object]], None]] = None) -> Dict[str, object]:
+    results = {}
+    for name in cases:
+        for size in sizes:
+            result = run_case(CASES[name], size, seed, memory)
+            results[f"{name}@{size}"] = result
+            if progress:
+                progress(result)
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "pydantic": pydantic.VERSION,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# --- Comparison ----------------------------------------------------------------------
+
+
+@dataclass
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else math.inf
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Regression]:
+    """Results in both files that got worse by more than ``threshold`` (0.10 = 10%).
+
+    Lower throughput, higher p50 latency and higher peak memory count as worse.
+    """
+    regressions = []
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        if cur["throughput_per_s"] < base["throughput_per_s"] * (1 - threshold):
+            regressions.append(Regression(key, "throughput_per_s", base["throughput_per_s"], cur["throughput_per_s"]))
+        if cur["latency_us"]["p50"] > base["latency_us"]["p50"] * (1 + threshold):
+            regressions.append(Regression(key, "latency_us.p50", base["latency_us"]["p50"], cur["latency_us"]["p50"]))
+        if base.get("peak_memory_bytes") and cur.get("peak_memory_bytes") is not None:
+            if cur["peak_memory_bytes"] > base["peak_memory_bytes"] * (1 + threshold):
+                regressions.append(Regression(key, "peak_memory_bytes", base["peak_memory_bytes"], cur["peak_memory_bytes"]))
+    return regressions
+
+
+def _format_result(result: Dict[str, object]) -> str:
+    peak = result["peak_memory_bytes"]
+    memory = f"{peak / 1024:12,.1f} KiB" if peak is not None else ""
+    latency = result["latency_us"]
+    return (
+        f"{result['case']:<30} {result['size']:>9,}  {result['throughput_per_s']:>14,.0f}/s  "
+        f"p50 {latency['p50']:8.2f}us  p99 {latency['p99']:8.2f}us  {memory}"
+    )
+
+
+def _print_regressions(regressions: List[Regression], threshold: float) -> int:
+    if not regressions:
+        print(f"✅ No regressions beyond {threshold:.0%}", file=sys.stderr)
+        return 0
+    print(f"❌ {len(regressions)} regression(s) beyond {threshold:.0%}:", file=sys.stderr)
+    for r in regressions:
+        print(f"   {r.key:<40} {r.metric:<18} {r.baseline:>14,.2f} -> {r.current:>14,.2f} ({r.change:+.1%})",
+              file=sys.stderr)
+    return 1
+
+
+def _load(path: str) -> Dict[str, object]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.micro",
+        description="Micro-benchmarks for the pre-filter, scoring engine, ranking formulas and model construction.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run benchmarks and write a results file")
+    run_parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                            help="comma-separated token counts per case")
+    run_parser.add_argument("--cases", default=",".join(CASES),
+                            help=f"comma-separated case names (available: {', '.join(CASES)})")
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    run_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="results JSON path (use it as a baseline later)")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp_parser = sub.add_parser("compare", help="flag regressions between two results files")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="relative change counted as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return _print_regressions(compare(_load(args.baseline), _load(args.current), args.threshold), args.threshold)
+
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    report = run(cases, sizes, args.seed, not args.no_memory, progress=lambda r: print(_format_result(r)))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}", file=sys.stderr)
+    if args.compare:
+        return _print_regressions(compare(_load(args.compare), report, args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+"""Trench report prompt size and latency: the previous layout versus ``build_prompt``.
+
+Both layouts are sent to a local mock chat server. It charges prefill time
+per uncached prompt token and caches repeated prefixes the way OpenAI's
+automatic prompt caching does, so the comparison covers token counts and
+the latency they cost::
+
+    python -m benchmarks.prompts --reports 50 --prefill-ms 200
+    python -m benchmarks.prompts --cache-min-tokens 0   # provider caching short prefixes
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.ai.client import OpenAIChatClient
+from app.ai.mock_chat_server import MockChatServer
+from app.ai.tokens import CHARS_PER_TOKEN, estimate_tokens
+from app.ai.trench_report import SYSTEM_PROMPT, TrenchInput, build_prompt
+
+
+def legacy_user_prompt(data: TrenchInput) -> str:
+    """The user prompt as built before the static-prefix layout, kept for comparison"""
+    momentum_score = data.scores.get('momentum', 0)
+    smart_money_score = data.scores.get('smart_money', 0)
+    sentiment_score = data.scores.get('sentiment', 0)
+    event_score = data.scores.get('event', 0)
+    total_score = data.scores.get('total', 0)
+    max_score = max(momentum_score, smart_money_score, sentiment_score, event_score)
+    if max_score == momentum_score and momentum_score > 15:
+        theme = "Momentum"
+    elif max_score == smart_money_score and smart_money_score > 15:
+        theme = "Smart Money"
+    elif max_score == sentiment_score and sentiment_score > 5:
+        theme = "Sentiment Driven"
+    elif max_score == event_score and event_score > 5:
+        theme = "Event Catalyst"
+    else:
+        theme = "Stability"
+    market_cap_tier = "micro" if data.metrics.get('market_cap_usd', 0) < 10000000 else "mid" if data.metrics.get('market_cap_usd', 0) < 100000000 else "large"
+    volume_strength = "high" if data.metrics.get('volume_24h_usd', 0) > 1000000 else "moderate" if data.metrics.get('volume_24h_usd', 0) > 100000 else "low"
+    top_signals = data.signals[:6]
+    return (
+        f"🎯 ALPHA REPORT: ${data.token.get('symbol')} ({data.token.get('name')})\n"
+        f"📊 DVM Score: {total_score:.0f}/100 | Theme: {theme}\n"
+        f"💰 Market Cap: {market_cap_tier.title()}-cap | Volume: {volume_strength}\n"
+        f"🔍 Key Signals: {', '.join(top_signals)}\n"
+        f"📈 Score Breakdown: Momentum {momentum_score:.0f} | Smart Money {smart_money_score:.0f} | Sentiment {sentiment_score:.0f} | Event {event_score:.0f}\n\n"
+        "Write a POWERFUL DVM Trenches alpha report using natural American English in this EXACT format:\n\n"
+        "**🎯 ${SYMBOL} – {Primary Theme} Play**\n"
+        '📍 **The Intel:** "Write 2-3 clear sentences sharing what\'s really happening. Start with specific whale moves, '
+        "smart money activity, or market dynamics. Use exact numbers and percentages. "
+        'End with what traders should watch for next. Sound like a pro sharing premium insights."\n\n'
+        "**⚡ Bottom Line:** BULLISH/NEUTRAL/CAUTIOUS - clear reason with supporting data\n\n"
+        "**📊 Score Breakdown:**\n"
+        "• Momentum: [score]/37.5 - what's driving price action\n"
+        "• Smart Money: [score]/37.5 - what whales are doing\n"
+        "• Sentiment: [score]/12.5 - social media and community buzz\n"
+        "• Event: [score]/12.5 - upcoming catalysts or news\n\n"
+        "**👀 What to Watch:** 3 specific things to monitor with clear thresholds\n\n"
+        "NATURAL AMERICAN ENGLISH EXAMPLES:\n"
+        '• "Here\'s what\'s happening: Three major whale wallets just bought $2.1M worth of [TOKEN] in a coordinated 15-minute buying spree. The on-chain data shows they\'re using the same DCA strategy that worked for [previous winner]. This could be the start of something big."\n'
+        '• "Word from the trenches: The [TOKEN] team just burned half their supply while top influencers are quietly loading up. Social mentions jumped 340% but the price hasn\'t caught up yet — classic setup before a major move."\n'
+        '• "Smart money is rotating: Major wallets sold their [competing token] positions and moved $4.2M into [TOKEN] over the past two days. Volume is building, holder count is growing, and liquidity is locked. All the pieces are falling into place."\n\n'
+        "WRITING REQUIREMENTS:\n"
+        "- Use natural, conversational American English\n"
+        "- Include specific wallet activity and transaction details\n"
+        "- Reference successful comparable tokens when relevant\n"
+        "- Sound like a seasoned trader sharing exclusive insights\n"
+        "- Keep under 280 words but deliver maximum value\n"
+        "- Use precise numbers, percentages, and timeframes\n"
+        "- Make it clear and easy to understand\n"
+        "- Use strategic emojis for visual appeal"
+    )
+
+
+def _compact(data: TrenchInput) -> Tuple[str, str]:
+    prompt = build_prompt(data)
+    return prompt.system, prompt.user
+
+
+LAYOUTS: Dict[str, Callable[[TrenchInput], Tuple[str, str]]] = {
+    "legacy": lambda data: (SYSTEM_PROMPT, legacy_user_prompt(data)),
+    "compact": _compact,
+}
+
+
+def trench_inputs(count: int, seed: int = 7) -> List[TrenchInput]:
+    rng = random.Random(seed)
+    inputs = []
+    for i in range(count):
+        scores = {"momentum": rng.uniform(0, 37.5), "smart_money": rng.uniform(0, 37.5),
+                  "sentiment": rng.uniform(0, 12.5), "event": rng.uniform(0, 12.5)}
+        scores["total"] = sum(scores.values())
+        inputs.append(TrenchInput(
+            token={"symbol": f"TK{i}", "name": f"Token Number {i}", "address": f"Addr{i:06d}"},
+            prefilter={"passed": True},
+            scores=scores,
+            signals=[f"5m: vol/avg {rng.uniform(1, 4):.1f}x", f"5m: price {rng.uniform(-10, 20):+.1f}%"],
+            metrics={"market_cap_usd": rng.uniform(1e5, 2e8), "volume_24h_usd": rng.uniform(1e4, 5e6)},
+            timeframe="multi",
+            as_of_utc="2025-08-08T12:00:00Z",
+        ))
+    return inputs
+
+
+def run_layout(layout: str, inputs: List[TrenchInput], prefill_ms: float, cache_min_tokens: int,
+               latency: str = "none") -> Dict[str, object]:
+    build = LAYOUTS[layout]
+    prompts = [build(data) for data in inputs]
+    with MockChatServer(latency=latency, prefill_ms_per_1k_tokens=prefill_ms, cache_min_tokens=cache_min_tokens) as server:
+        client = OpenAIChatClient(api_key="mock", base_url=server.url)
+        latencies = []
+        for system, user in prompts:
+            started = time.perf_counter()
+            client.complete(system, user, model="gpt-4o", max_tokens=600)
+            latencies.append((time.perf_counter() - started) * 1000)
+        requests = list(server.requests)
+    joined = [system + user for system, user in prompts]
+    shared_prefix = os.path.commonprefix(joined)
+    return {
+        "reports": len(inputs),
+        "prompt_tokens_mean": statistics.fmean(estimate_tokens(s) + estimate_tokens(u) for s, u in prompts),
+        "static_prefix_tokens": len(shared_prefix) // CHARS_PER_TOKEN,
+        "uncached_tokens_mean": statistics.fmean(r["prompt_tokens"] - r["cached_tokens"] for r in requests),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2),
+            "p50": round(statistics.median(latencies), 2),
+        },
+    }
+
+
+def run(reports: int = 50, prefill_ms: float = 200.0, cache_min_tokens: int = 1024, latency: str = "none",
+        seed: int = 7) -> Dict[str, Dict[str, object]]:
+    inputs = trench_inputs(reports, seed)
+    return {layout: run_layout(layout, inputs, prefill_ms, cache_min_tokens, latency) for layout in LAYOUTS}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.prompts", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=50)
+    parser.add_argument("--prefill-ms", type=float, default=200.0, help="mock prefill cost per 1k uncached prompt tokens")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024,
+                        help="shortest cacheable prefix (OpenAI: 1024)")
+    parser.add_argument("--latency", default="none", help="extra mock latency model (see provider_sim)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("-o", "--output", help="write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.reports, args.prefill_ms, args.cache_min_tokens, args.latency, args.seed)
+    print(f"{'layout':<10} {'prompt tok':>11} {'static prefix':>14} {'uncached tok':>13} {'mean ms':>9} {'p50 ms':>8}")
+    for layout, r in results.items():
+        print(f"{layout:<10} {r['prompt_tokens_mean']:>11.1f} {r['static_prefix_tokens']:>14} "
+              f"{r['uncached_tokens_mean']:>13.1f} {r['latency_ms']['mean']:>9.2f} {r['latency_ms']['p50']:>8.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+"""Per-request settings for one extraction.
+
+Everything that used to be read from process-wide state (``DVM_DEMO_MODE``)
+travels with the call instead, so extractions for different requests can run
+in parallel in one process without seeing each other's settings.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+# "full" calls every provider endpoint; "fast" skips the throttled Birdeye price
+# history (five calls at 1 req/sec on the public plan) and keeps its spot price
+TIERS = ("full", "fast")
+
+# "default" reuses provider data still within its TTL; "refresh" re-fetches it
+CACHE_POLICIES = ("default", "refresh")
+
+
+@dataclass(frozen=True)
+class ExtractionContext:
+    demo_mode: bool = False  # synthetic data for tokens no provider knows
+    tier: str = "full"
+    deadline: Optional[float] = None  # time.monotonic() value after which providers are abandoned
+    cache_policy: str = "default"
+    fields: Optional[Tuple[str, ...]] = None  # None: every field
+
+    def __post_init__(self):
+        if self.tier not in TIERS:
+            raise ValueError(f"unknown extraction tier {self.tier!r}, expected one of {TIERS}")
+        if self.cache_policy not in CACHE_POLICIES:
+            raise ValueError(f"unknown cache policy {self.cache_policy!r}, expected one of {CACHE_POLICIES}")
+        if self.fields is not None and not isinstance(self.fields, tuple):
+            object.__setattr__(self, "fields", tuple(self.fields))
+
+    @classmethod
+    def create(cls, timeout: Optional[float] = None, fields: Optional[List[str]] = None,
+               **kwargs) -> "ExtractionContext":
+        """A context whose deadline is ``timeout`` seconds from now"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        return cls(deadline=deadline, fields=tuple(fields) if fields is not None else None, **kwargs)
+
+    def with_fields(self, fields: Optional[List[str]]) -> "ExtractionContext":
+        return replace(self, fields=tuple(fields) if fields is not None else None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, default: float) -> float:
+        """HTTP timeout for one provider call: ``default`` capped by the time left"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        # requests rejects a zero timeout; an expired call fails fast instead
+        return max(0.001, min(default, remaining))
+
+
+DEFAULT_CONTEXT = ExtractionContext()
@@ -0,0 +1,100 @@
+"""
+Dependency graph for derived token variables
+Derived fields are declared as nodes over raw provider fields and evaluated
+lazily: only the nodes a consumer asks for (and their upstream nodes) run
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class DerivedGraph:
+    def __init__(self):
+        # Node name -> (input fields, calculation); inputs include the optional ones
+        self.nodes: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Any]]] = {}
+        # Node name -> inputs the calculation can do without
+        self.optional: Dict[str, Set[str]] = {}
+
+    def add(self, name: str, inputs: Iterable[str], calculate: Callable[[Dict[str, Any]], Any],
+            optional: Iterable[str] = ()):
+        """Declare a derived field. ``calculate`` returns None when its inputs can't produce a value.
+
+        ``optional`` inputs are fetched and tracked like ``inputs``, but a missing
+        one doesn't stop the calculation (it must use ``d.get`` for them).
+        """
+        self.nodes[name] = (tuple(inputs) + tuple(optional), calculate)
+        self.optional[name] = set(optional)
+
+    def required_inputs(self, fields: Iterable[str]) -> Set[str]:
+        """Raw (non-derived) fields the given fields depend on, including raw fields requested directly"""
+        raw = set()
+        seen = set()
+        stack = list(fields)
+        while stack:
+            field = stack.pop()
+            if field in seen:
+                continue
+            seen.add(field)
+            if field in self.nodes:
+                stack.extend(self.nodes[field][0])
+            else:
+                raw.add(field)
+        return raw
+
+    def dependents(self, fields: Iterable[str]) -> Set[str]:
+        """Derived fields that transitively depend on any of the given fields"""
+        affected = set()
+        frontier = set(fields)
+        while frontier:
+            found = {
+                name for name, (inputs, _) in self.nodes.items()
+                if name not in affected and not frontier.isdisjoint(inputs)
+            }
+            affected |= found
+            frontier = found
+        return affected
+
+    def evaluate(self, data: Dict[str, Any], fields: Optional[Iterable[str]] = None,
+                 invalidated: Optional[Set[str]] = None) -> List[str]:
+        """Compute the requested derived fields (all when ``fields`` is None) into ``data``.
+
+        Values already present in ``data`` are reused unless listed in ``invalidated``,
+        so every node runs at most once per call. Returns the fields that were written.
+        """
+        targets = list(self.nodes) if fields is None else [f for f in fields if f in self.nodes]
+        invalidated = invalidated or set()
+        written: List[str] = []
+        resolved: Dict[str, bool] = {}
+
+        def resolve(name: str) -> bool:
+            if name in resolved:
+                return resolved[name]
+            if name in data and name not in invalidated:
+                resolved[name] = True
+                return True
+            # Guard against cycles while this node is being resolved
+            resolved[name] = False
+            inputs, calculate = self.nodes[name]
+            for field in inputs:
+                available = resolve(field) if field in self.nodes else field in data
+                if not available and field not in self.optional[name]:
+                    return False
+            value = calculate(data)
+            if value is None:
+                return False
+            data[name] = value
+            written.append(name)
+            resolved[name] = True
+            return True
+
+        for target in targets:
+            resolve(target)
+        return written
+
+
+def providers_for(fields: Optional[Iterable[str]], graph: DerivedGraph,
+                  provider_fields: Dict[str, Set[str]]) -> List[str]:
+    """Providers whose fields are needed to produce ``fields`` (all providers when None)"""
+    if fields is None:
+        return list(provider_fields)
+    needed = graph.required_inputs(fields)
+    return [name for name, provided in provider_fields.items() if not needed.isdisjoint(provided)]
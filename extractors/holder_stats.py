@@ -0,0 +1,49 @@
+"""Holder distribution from token accounts, one account at a time.
+
+Token accounts arrive page by page and are never kept: ``HolderStats`` holds
+the ``top_n`` largest balances in a min-heap plus running counts and sums.
+That costs O(log top_n) per account and constant memory however many
+holders a token has. Holders are accounts with a non-zero balance, so one
+wallet holding several token accounts counts more than once.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, Iterable, List
+
+
+class HolderStats:
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.accounts = 0
+        self.holders = 0
+        self.total_supply = 0.0
+        self._top: List[float] = []  # min-heap of the largest balances
+
+    def add(self, amount: float):
+        self.accounts += 1
+        if amount <= 0:
+            return
+        self.holders += 1
+        self.total_supply += amount
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, amount)
+        elif amount > self._top[0]:
+            heapq.heapreplace(self._top, amount)
+
+    def update(self, accounts: Iterable[Dict[str, Any]]) -> "HolderStats":
+        for account in accounts:
+            self.add(float(account.get('amount') or 0))
+        return self
+
+    @property
+    def top_amount(self) -> float:
+        return sum(self._top)
+
+    @property
+    def top_percent(self) -> float:
+        """Share of supply held by the ``top_n`` largest holders, in percent"""
+        return self.top_amount / self.total_supply * 100 if self.total_supply > 0 else 0.0
+
+    def largest(self) -> List[float]:
+        return sorted(self._top, reverse=True)
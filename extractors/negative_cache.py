@@ -0,0 +1,88 @@
+"""Addresses that no provider knows, remembered so repeats skip provider traffic.
+
+Spam mints and typos come back through ``/rank`` and ``/extract`` again and
+again. The first time every provider comes back empty the address is cached
+as not found for ``ttl`` seconds. Each further empty lookup after that
+multiplies the TTL by ``factor``, up to ``max_ttl``. A token that turns up
+later is noticed within one TTL.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from app.utils.instrumentation import CACHE_REQUESTS, inc
+
+# Rough cost of one entry besides the address string (tuple, floats, OrderedDict slot)
+_PER_ENTRY_OVERHEAD_BYTES = 150
+
+
+class NegativeCache:
+    def __init__(self, ttl: float = 30, max_ttl: float = 3600, factor: float = 2.0,
+                 max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.factor = factor
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # address -> (expires_at, strikes)
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+    def ttl_for(self, strikes: int) -> float:
+        """TTL after ``strikes`` empty lookups in a row"""
+        return min(self.max_ttl, self.ttl * self.factor ** max(strikes - 1, 0))
+
+    def get(self, address: str) -> bool:
+        """Whether ``address`` is currently cached as not found"""
+        with self._lock:
+            entry = self._entries.get(address)
+            hit = entry is not None and self.clock() < entry[0]
+            if hit:
+                self._entries.move_to_end(address)
+        inc(CACHE_REQUESTS, "not_found", "hit" if hit else "miss")
+        return hit
+
+    def add(self, address: str) -> float:
+        """Record an empty lookup of ``address``, returning how long it is cached for"""
+        now = self.clock()
+        with self._lock:
+            expires_at, strikes = self._entries.get(address, (now, 0))
+            # Long after the last entry ran out the address starts over at the short TTL
+            if now - expires_at > self.max_ttl:
+                strikes = 0
+            ttl = self.ttl_for(strikes + 1)
+            self._entries[address] = (now + ttl, strikes + 1)
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return ttl
+
+    def discard(self, address: str):
+        """Forget ``address``, e.g. once a provider has found it"""
+        with self._lock:
+            self._entries.pop(address, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def estimated_bytes(self) -> int:
+        with self._lock:
+            return sum(sys.getsizeof(address) for address in self._entries) \
+                + len(self._entries) * _PER_ENTRY_OVERHEAD_BYTES
+
+
+# Shared by every extraction in the process
+NOT_FOUND = NegativeCache(
+    ttl=float(os.getenv("DVM_NOT_FOUND_TTL", "30")),
+    max_ttl=float(os.getenv("DVM_NOT_FOUND_MAX_TTL", "3600")),
+    max_entries=int(os.getenv("DVM_NOT_FOUND_CACHE_SIZE", "10000")),
+)
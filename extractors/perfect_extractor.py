@@ -3,34 +3,90 @@ import os
 import requests
 import time
 from datetime import datetime
-from typing import Dict, Optional, Any
-from collections import defaultdict
+from typing import Dict, Optional, Any, List
 from dotenv import load_dotenv
 
+from extractors.derived_graph import DerivedGraph, providers_for
+from extractors.tx_cursor import TX_CURSORS, HeliusTransactionReader, TransactionCursorStore
+
 # Load environment variables
 load_dotenv()
 
+# Fields each provider can supply, used to skip providers a consumer doesn't need
+PROVIDER_FIELDS = {
+    'dexscreener': {
+        'token_symbol', 'token_name', 'token_address', 'token_age_minutes', 'price_now',
+        'mc_now', 'volume_5m_usd', 'volume_24h_usd', 'liquidity_usd', 'lp_count',
+        'txns_5m_buys', 'txns_5m_sells', 'txns_24h_buys', 'txns_24h_sells',
+    },
+    'birdeye': {
+        'price_change_percent', 'price_change_5m_percent', 'price_change_15m_percent',
+        'price_change_30m_percent', 'price_change_1h_percent', 'price_change_24h_percent',
+    },
+    'helius': {
+        'dca_accumulation_supply_percent', '_helius_available', '_transfer_count',
+        '_unique_wallets', '_whale_transactions', '_total_supply',
+    },
+}
+
+
+def _whale_buy_tokens(d):
+    whale_tx_count = d['_whale_transactions']
+    total_supply = d.get('_total_supply', 0)
+    avg_whale_size = total_supply * 0.001 if total_supply > 0 else 50000000
+    return whale_tx_count * avg_whale_size
+
+
+# Scoring metrics as nodes over pre-filter fields and Helius transaction stats
+SCORING_GRAPH = DerivedGraph()
+# Volume ratio: 288 5-minute periods in 24h
+SCORING_GRAPH.add('vol_over_avg_ratio', ('volume_5m_usd', 'volume_24h_usd'),
+                  lambda d: d['volume_5m_usd'] / (d['volume_24h_usd'] / 288) if d['volume_24h_usd'] > 0 else None)
+# Whale activity from the transactions of wallets with a large share of the token's history
+SCORING_GRAPH.add('_whale_buy_tokens', ('_whale_transactions',), _whale_buy_tokens, optional=('_total_supply',))
+SCORING_GRAPH.add('whale_buy_usd', ('_whale_buy_tokens',),
+                  lambda d: d['_whale_buy_tokens'] * d.get('price_now', 0), optional=('price_now',))
+SCORING_GRAPH.add('whale_buy_supply_percent', ('_whale_buy_tokens',),
+                  lambda d: d['_whale_buy_tokens'] / d['_total_supply'] * 100 if d.get('_total_supply', 0) > 0 else 0,
+                  optional=('_total_supply',))
+# Net inflow estimation
+SCORING_GRAPH.add('net_inflow_wallets_gt_10k_usd', ('whale_buy_usd',), lambda d: d['whale_buy_usd'] * 0.6)
+# Inflow over market cap
+SCORING_GRAPH.add('inflow_over_mcap_percent', ('net_inflow_wallets_gt_10k_usd', 'mc_now'),
+                  lambda d: d['net_inflow_wallets_gt_10k_usd'] / d['mc_now'] * 100 if d['mc_now'] > 0 else None)
+
 class PerfectTokenExtractor:
-    def __init__(self):
+    def __init__(self, tx_cursors: Optional[TransactionCursorStore] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json',
         })
         
-        # API configurations
+        # API configurations (hosts can be pointed at a local stand-in, see extractors/provider_sim.py)
         self.apis = {
-            'dexscreener': "https://api.dexscreener.com/latest/dex/tokens/",
-            'birdeye': "https://public-api.birdeye.so",
-            'helius': "https://api.helius.xyz/v0",
+            'dexscreener': f"{os.getenv('DEXSCREENER_API_URL', 'https://api.dexscreener.com')}/latest/dex/tokens/",
+            'birdeye': os.getenv('BIRDEYE_API_URL', "https://public-api.birdeye.so"),
+            'helius': f"{os.getenv('HELIUS_API_URL', 'https://api.helius.xyz')}/v0",
         }
         
         # Get API keys from environment
         self.birdeye_key = os.getenv('BIRDEYE_API_KEY', '')
         self.helius_key = os.getenv('HELIUS_API_KEY', '')
+        
+        # Seconds between Birdeye history calls (public tier allows 1 req/sec)
+        self.birdeye_interval = float(os.getenv('BIRDEYE_REQUEST_INTERVAL', '1.1'))
+        
+        # Helius transactions are read incrementally from a per-token cursor (see extractors/tx_cursor.py)
+        self.tx_reader = HeliusTransactionReader(
+            self.session, self.apis['helius'], self.helius_key,
+            TX_CURSORS if tx_cursors is None else tx_cursors,
+            max_new_pages=int(os.getenv('HELIUS_MAX_NEW_PAGES', '20')),
+            backfill_pages=int(os.getenv('HELIUS_BACKFILL_PAGES', '10')),
+        )
     
-    def extract_all_data(self, token_address: str) -> Dict[str, Any]:
-        """Extract maximum data from all sources"""
+    def extract_all_data(self, token_address: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Extract maximum data from all sources, or only what ``fields`` depend on"""
         print(f"\n🚀 PERFECT EXTRACTION FOR: {token_address}")
         print("="*60)
         
@@ -44,22 +100,24 @@ class PerfectTokenExtractor:
             "coverage": {}
         }
         
+        sources = providers_for(fields, SCORING_GRAPH, PROVIDER_FIELDS)
+        
         # 1. Extract from DexScreener (no API key needed)
-        dex_data = self.get_dexscreener_data(token_address)
+        dex_data = self.get_dexscreener_data(token_address) if 'dexscreener' in sources else None
         if dex_data:
             result["data_sources"]["dexscreener"] = dex_data
             self.merge_data(result, dex_data)
             print(f"✅ DexScreener: {len(dex_data)} variables")
         
         # 2. Extract from Birdeye (with API key)
-        birdeye_data = self.get_birdeye_data(token_address)
+        birdeye_data = self.get_birdeye_data(token_address) if 'birdeye' in sources else None
         if birdeye_data:
             result["data_sources"]["birdeye"] = birdeye_data
             self.merge_data(result, birdeye_data)
             print(f"✅ Birdeye: {len(birdeye_data)} variables")
         
         # 3. Extract from Helius (with API key)
-        helius_data = self.get_helius_data(token_address)
+        helius_data = self.get_helius_data(token_address) if 'helius' in sources else None
         if helius_data:
             result["data_sources"]["helius"] = helius_data
             self.merge_data(result, helius_data)
@@ -68,7 +126,7 @@ class PerfectTokenExtractor:
         # 4. GMGN removed for speed - using API-based extractors only
         
         # 5. Calculate derived metrics
-        self.calculate_scoring_metrics(result)
+        self.calculate_scoring_metrics(result, fields)
         
         # 6. Add intelligent defaults for missing data
         self.add_defaults(result)
@@ -183,7 +241,7 @@ class PerfectTokenExtractor:
                 except:
                     continue
                 
-                time.sleep(1.1)  # Rate limit: 1 req/sec
+                time.sleep(self.birdeye_interval)  # Rate limit: 1 req/sec
             
             return result if result else None
             
@@ -206,37 +264,26 @@ class PerfectTokenExtractor:
             # Get some basic token info if available
             result['_helius_available'] = True
             
-            # Get transaction data for pattern analysis
-            tx_url = f"{self.apis['helius']}/addresses/{token_address}/transactions?api-key={self.helius_key}&limit=100"
-            tx_response = self.session.get(tx_url, timeout=10)
+            # Transaction patterns over the token's history: only pages newer than the
+            # last analysis are fetched, plus a few older ones until the backfill is done
+            try:
+                activity = self.tx_reader.update(token_address)
+            except Exception as e:
+                print(f"Helius transactions error: {e}")
+                activity = self.tx_reader.store.get(token_address)
             
-            if tx_response.status_code == 200:
-                transactions = tx_response.json()
-                
-                # Analyze transaction patterns
-                transfer_count = 0
-                unique_wallets = set()
-                wallet_activity = defaultdict(int)
-                
-                for tx in transactions:
-                    tx_type = tx.get('type', '')
-                    fee_payer = tx.get('feePayer', '')
-                    
-                    if tx_type == 'TRANSFER':
-                        transfer_count += 1
-                    
-                    if fee_payer:
-                        unique_wallets.add(fee_payer)
-                        wallet_activity[fee_payer] += 1
-                
+            if activity.transactions:
                 # DCA detection
-                dca_wallets = [w for w, count in wallet_activity.items() if count >= 3]
-                if unique_wallets:
-                    result['dca_accumulation_supply_percent'] = (len(dca_wallets) / len(unique_wallets)) * 100
+                if activity.unique_wallets:
+                    result['dca_accumulation_supply_percent'] = (activity.dca_wallets() / activity.unique_wallets) * 100
                 
                 # Store transaction data for calculations
-                result['_transfer_count'] = transfer_count
-                result['_unique_wallets'] = len(unique_wallets)
+                result['_transfer_count'] = activity.transfers
+                result['_unique_wallets'] = activity.unique_wallets
+                result['_transactions_seen'] = activity.transactions
+                result['_history_complete'] = activity.history_complete
+                result['_whale_transactions'] = activity.whale_transactions()
+                result['_wallets_estimated'] = activity.sketched
             
             return result if result else None
             
@@ -271,37 +318,16 @@ class PerfectTokenExtractor:
             if key in new_data:
                 result['scoring_data'][key] = new_data[key]
     
-    def calculate_scoring_metrics(self, result: Dict):
-        """Calculate additional scoring metrics from available data"""
+    def calculate_scoring_metrics(self, result: Dict, fields: Optional[List[str]] = None):
+        """Calculate additional scoring metrics from available data (only ``fields`` when given)"""
         pre_filter = result['pre_filter_data']
         scoring = result['scoring_data']
         
-        # Calculate volume ratio
-        if 'volume_5m_usd' in pre_filter and 'volume_24h_usd' in pre_filter:
-            avg_5m_volume = pre_filter['volume_24h_usd'] / 288  # 288 5-minute periods in 24h
-            if avg_5m_volume > 0:
-                scoring['vol_over_avg_ratio'] = pre_filter['volume_5m_usd'] / avg_5m_volume
-        
-        # Estimate whale metrics from transaction patterns
-        if '_transfer_count' in result.get('data_sources', {}).get('helius', {}):
-            transfer_count = result['data_sources']['helius']['_transfer_count']
-            total_supply = result['data_sources']['helius'].get('_total_supply', 0)
-            price = pre_filter.get('price_now', 0)
-            
-            # Estimate whale activity
-            whale_tx_count = int(transfer_count * 0.1)
-            avg_whale_size = total_supply * 0.001 if total_supply > 0 else 50000000
-            
-            whale_buy_tokens = whale_tx_count * avg_whale_size
-            scoring['whale_buy_usd'] = whale_buy_tokens * price
-            scoring['whale_buy_supply_percent'] = (whale_buy_tokens / total_supply * 100) if total_supply > 0 else 0
-            
-            # Net inflow estimation
-            scoring['net_inflow_wallets_gt_10k_usd'] = scoring['whale_buy_usd'] * 0.6
-            
-            # Inflow over market cap
-            if 'mc_now' in pre_filter and pre_filter['mc_now'] > 0:
-                scoring['inflow_over_mcap_percent'] = (scoring['net_inflow_wallets_gt_10k_usd'] / pre_filter['mc_now']) * 100
+        # Evaluate over a flat view; intermediate and private fields stay out of the result
+        data = {**result.get('data_sources', {}).get('helius', {}), **pre_filter, **scoring}
+        for key in SCORING_GRAPH.evaluate(data, fields):
+            if not key.startswith('_'):
+                scoring[key] = data[key]
     
     def add_defaults(self, result: Dict):
         """Add intelligent defaults for missing critical data - designed to pass pre-filter"""
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for DexScreener, Jupiter, Birdeye and Helius
+Serves recorded fixtures or a deterministic synthetic token universe with
+configurable latency, 429/5xx injection and per-provider rate limits, so
+extraction and load tests run without network access
+
+    # Capture real responses for a few tokens
+    python -m extractors.provider_sim record --fixtures fixtures/ <TOKEN> [<TOKEN> ...]
+
+    # Serve them (plus 1000 synthetic tokens) on :8900
+    python -m extractors.provider_sim serve --fixtures fixtures/ --synthetic 1000 \\
+        --latency '*=lognormal:40:0.6' --errors 'birdeye=0.02,0.05' --rate-limit 'birdeye=5'
+
+Point the extractors at it with the env vars printed on startup
+(DEXSCREENER_API_URL, JUPITER_API_URL, BIRDEYE_API_URL, HELIUS_API_URL).
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+PROVIDERS = ('dexscreener', 'jupiter', 'birdeye', 'helius')
+
+# Env var each extractor reads for a provider's host
+PROVIDER_ENV = {
+    'dexscreener': 'DEXSCREENER_API_URL',
+    'jupiter': 'JUPITER_API_URL',
+    'birdeye': 'BIRDEYE_API_URL',
+    'helius': 'HELIUS_API_URL',
+}
+
+# Query params that never belong in a fixture key (secrets, wall-clock bounds)
+_VOLATILE_PARAMS = {'api-key', 'time_from', 'time_to'}
+
+_BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_SOL_MINT = 'So11111111111111111111111111111111111111112'
+
+
+def provider_for_path(path: str) -> Optional[str]:
+    """Which provider an API path belongs to (all four share one host here)"""
+    if path.startswith('/latest/dex/'):
+        return 'dexscreener'
+    if path.startswith('/v4/price'):
+        return 'jupiter'
+    if path.startswith('/defi/'):
+        return 'birdeye'
+    if path.startswith('/v0/'):
+        return 'helius'
+    return None
+
+
+def fixture_key(path: str, params: Dict[str, str]) -> str:
+    """Stable key for a request: path plus non-volatile params (history windows keep their length)"""
+    stable = {k: v for k, v in params.items() if k not in _VOLATILE_PARAMS}
+    if 'time_from' in params and 'time_to' in params:
+        stable['window'] = str(int(params['time_to']) - int(params['time_from']))
+    return path + '?' + '&'.join(f"{k}={stable[k]}" for k in sorted(stable))
+
+
+class FixtureStore:
+    """Recorded responses on disk: one JSON file per request under <dir>/<provider>/"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.responses: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.isdir(directory):
+            for provider in os.listdir(directory):
+                provider_dir = os.path.join(directory, provider)
+                if not os.path.isdir(provider_dir):
+                    continue
+                for name in os.listdir(provider_dir):
+                    with open(os.path.join(provider_dir, name)) as f:
+                        fixture = json.load(f)
+                    self.responses[fixture['key']] = (fixture['status'], fixture['body'])
+
+    def get(self, key: str) -> Optional[Tuple[int, Any]]:
+        return self.responses.get(key)
+
+    def save(self, provider: str, key: str, status: int, body: Any):
+        provider_dir = os.path.join(self.directory, provider)
+        os.makedirs(provider_dir, exist_ok=True)
+        name = hashlib.sha1(key.encode()).hexdigest()[:16] + '.json'
+        with self._lock:
+            with open(os.path.join(provider_dir, name), 'w') as f:
+                json.dump({'key': key, 'status': status, 'body': body}, f, indent=1)
+            self.responses[key] = (status, body)
+
+
+class RecordingSession(requests.Session):
+    """requests.Session that saves every provider response into a FixtureStore"""
+
+    def __init__(self, store: FixtureStore):
+        super().__init__()
+        self.store = store
+
+    def request(self, method, url, params=None, **kwargs):
+        response = super().request(method, url, params=params, **kwargs)
+        parts = urlsplit(response.url)
+        provider = provider_for_path(parts.path)
+        if provider:
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            self.store.save(provider, fixture_key(parts.path, dict(parse_qsl(parts.query))), response.status_code, body)
+        return response
+
+
+class SyntheticUniverse:
+    """Deterministic fake tokens; the same seed always produces the same responses"""
+
+    def __init__(self, size: int = 1000, seed: int = 7, holders_cap: int = 2000, transactions: int = 300):
+        self.seed = seed
+        self.holders_cap = holders_cap
+        self.transactions = transactions
+        self.created = time.time()
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+        # Extra transactions appended after startup, per token (newest last)
+        self.new_transactions: Dict[str, int] = defaultdict(int)
+        for i in range(size):
+            address = self.address(i)
+            self.tokens[address] = self._params(i, address)
+
+    def address(self, index: int) -> str:
+        rng = random.Random(f"{self.seed}:address:{index}")
+        return ''.join(rng.choice(_BASE58) for _ in range(44))
+
+    def _params(self, index: int, address: str) -> Dict[str, Any]:
+        rng = random.Random(f"{self.seed}:{address}")
+        price = math.exp(rng.uniform(-14, 1))
+        supply = 10 ** rng.uniform(8, 10)
+        mc = price * supply
+        vol_24h = mc * rng.uniform(0.05, 3)
+        return {
+            'index': index,
+            'symbol': f"SIM{index}",
+            'name': f"Simulated Token {index}",
+            'price': price,
+            'supply': supply,
+            'mc': mc,
+            'liquidity': mc * rng.uniform(0.01, 0.2),
+            'vol_24h': vol_24h,
+            'vol_1h': vol_24h / 24 * rng.uniform(0.3, 4),
+            'vol_5m': vol_24h / 288 * rng.uniform(0.2, 6),
+            'change_m5': rng.uniform(-5, 8),
+            'change_h1': rng.uniform(-15, 25),
+            'change_h24': rng.uniform(-40, 120),
+            'age_minutes': rng.randint(30, 20000),
+            'lp_count': rng.randint(1, 5),
+            'holders': rng.randint(20, self.holders_cap),
+            'txns_5m': rng.randint(0, 200),
+        }
+
+    def _price_at(self, token: Dict[str, Any], ts: float) -> float:
+        # Smooth deterministic walk around the current price
+        phase = token['index'] * 0.37
+        drift = 1 + 0.05 * math.sin(ts / 900 + phase) + 0.02 * math.sin(ts / 97 + phase)
+        return token['price'] * drift
+
+    def respond(self, provider: str, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        if provider == 'dexscreener':
+            return 200, self._dexscreener(path.rsplit('/', 1)[-1])
+        if provider == 'jupiter':
+            ids = params.get('ids', '')
+            return 200, {'data': {ids: {'id': ids, 'price': self.tokens[ids]['price'], 'confidence': 0.98}}
+                         if ids in self.tokens else {}}
+        if provider == 'birdeye':
+            return self._birdeye(path, params)
+        return self._helius(path, params)
+
+    def _dexscreener(self, address: str) -> Dict[str, Any]:
+        token = self.tokens.get(address)
+        if token is None:
+            return {'schemaVersion': '1.0.0', 'pairs': None}
+        pairs = []
+        for n in range(token['lp_count']):
+            share = 1.0 if n == 0 else 0.1 / n
+            buys = token['txns_5m'] // 2
+            pairs.append({
+                'chainId': 'solana',
+                'dexId': ['raydium', 'orca', 'meteora', 'pumpswap', 'lifinity'][n],
+                'pairAddress': f"{address[:30]}PAIR{n}",
+                'baseToken': {'address': address, 'name': token['name'], 'symbol': token['symbol']},
+                'quoteToken': {'address': _SOL_MINT, 'name': 'Wrapped SOL', 'symbol': 'SOL'},
+                'priceNative': f"{token['price'] / 225:.12f}",
+                'priceUsd': f"{token['price']:.12f}",
+                'txns': {
+                    'm5': {'buys': buys, 'sells': token['txns_5m'] - buys},
+                    'h1': {'buys': buys * 10, 'sells': (token['txns_5m'] - buys) * 10},
+                    'h24': {'buys': buys * 200, 'sells': (token['txns_5m'] - buys) * 200},
+                },
+                'volume': {k: token[v] * share for k, v in
+                           (('m5', 'vol_5m'), ('h1', 'vol_1h'), ('h24', 'vol_24h'))},
+                'priceChange': {'m5': token['change_m5'], 'h1': token['change_h1'], 'h24': token['change_h24']},
+                'liquidity': {'usd': token['liquidity'] * share},
+                'fdv': token['mc'],
+                'marketCap': token['mc'],
+                'pairCreatedAt': int((self.created - token['age_minutes'] * 60) * 1000),
+            })
+        return {'schemaVersion': '1.0.0', 'pairs': pairs}
+
+    def _birdeye(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        token = self.tokens.get(params.get('address', ''))
+        if token is None:
+            return 200, {'success': False, 'data': None}
+        if path == '/defi/price':
+            return 200, {'success': True, 'data': {
+                'value': token['price'], 'priceChange24h': token['change_h24'], 'updateUnixTime': int(time.time())}}
+        if path == '/defi/history_price':
+            step = {'1m': 60, '15m': 900, '30m': 1800}.get(params.get('type', '1m'), 60)
+            start, end = int(params.get('time_from', 0)), int(params.get('time_to', 0))
+            items = [{'unixTime': ts, 'value': self._price_at(token, ts)} for ts in range(start, end + 1, step)]
+            return 200, {'success': True, 'data': {'items': items}}
+        return 404, {'success': False, 'message': 'Not found'}
+
+    def _helius(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        if path == '/v0/token-accounts':
+            token = self.tokens.get(params.get('mint', ''))
+            if token is None:
+                return 200, []
+            count = token['holders']
+            limit = int(params.get('limit', count) or count)
+            page = int(params.get('page', 1) or 1)
+            start = (page - 1) * limit
+            # Account i's balance depends only on i, so any page size sees the same accounts
+            return 200, [
+                {'address': f"acct{token['index']}x{i}", 'owner': f"owner{token['index']}x{i}",
+                 'mint': params.get('mint'),
+                 'amount': int(token['supply'] / (i + 1) ** 1.2
+                               * random.Random(f"{self.seed}:holders:{token['index']}:{i}").uniform(0.9, 1.1))}
+                for i in range(start, min(start + limit, count))
+            ]
+        if path.startswith('/v0/addresses/') and path.endswith('/transactions'):
+            address = path.split('/')[3]
+            token = self.tokens.get(address)
+            if token is None:
+                return 200, []
+            return 200, self._transactions(address, token, params)
+        return 404, {'error': 'not found'}
+
+    def _transactions(self, address: str, token: Dict[str, Any], params: Dict[str, str]) -> List[Dict[str, Any]]:
+        # Transaction i (0 = oldest) is fully determined by the token and i; newest first like Helius
+        total = self.transactions + self.new_transactions[address]
+        signatures = [f"sig{token['index']}n{i}" for i in range(total)]
+        newest = total - 1
+        if params.get('before') in signatures:
+            newest = signatures.index(params['before']) - 1
+        oldest = 0
+        if params.get('until') in signatures:
+            oldest = signatures.index(params['until']) + 1
+        limit = int(params.get('limit', 100))
+        wallets = max(5, token['holders'] // 10)
+        out = []
+        for i in range(newest, oldest - 1, -1):
+            if len(out) >= limit:
+                break
+            rng = random.Random(f"{self.seed}:tx:{token['index']}:{i}")
+            out.append({
+                'signature': signatures[i],
+                'type': rng.choice(['TRANSFER', 'SWAP', 'SWAP', 'TRANSFER']),
+                # Skewed wallet popularity so some wallets repeat (DCA-like)
+                'feePayer': f"wallet{token['index']}x{int(wallets * rng.random() ** 3)}",
+                'timestamp': int(self.created) - (total - i) * 30,
+            })
+        return out
+
+    def add_transactions(self, address: str, count: int):
+        """Append new activity for a token (newer than everything served so far)"""
+        self.new_transactions[address] += count
+
+
+class LatencyModel:
+    """Per-request delay: none, fixed:<ms>, uniform:<lo_ms>:<hi_ms> or lognormal:<median_ms>:<sigma>"""
+
+    def __init__(self, spec: str = 'none', seed: int = 0):
+        self.spec = spec
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.args = [float(p) for p in parts[1:]]
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Delay in seconds"""
+        with self._lock:
+            if self.kind == 'fixed':
+                ms = self.args[0]
+            elif self.kind == 'uniform':
+                ms = self.rng.uniform(self.args[0], self.args[1])
+            elif self.kind == 'lognormal':
+                ms = self.rng.lognormvariate(math.log(self.args[0]), self.args[1])
+            else:
+                ms = 0.0
+        return ms / 1000
+
+
+class FaultProfile:
+    """Latency, error injection and rate limiting for one provider"""
+
+    def __init__(self, latency: str = 'none', error_5xx: float = 0.0, error_429: float = 0.0,
+                 rate_limit_rps: float = 0.0, seed: int = 0):
+        self.latency = LatencyModel(latency, seed)
+        self.error_5xx = error_5xx
+        self.error_429 = error_429
+        self.rate_limit_rps = rate_limit_rps
+        self.rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        # Token bucket holding up to one second of requests
+        self._tokens = rate_limit_rps
+        self._refilled = time.monotonic()
+
+    def admit(self) -> Optional[int]:
+        """Status code to fail this request with, or None to serve it"""
+        with self._lock:
+            if self.rate_limit_rps > 0:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit_rps, self._tokens + (now - self._refilled) * self.rate_limit_rps)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            roll = self.rng.random()
+        if roll < self.error_429:
+            return 429
+        if roll < self.error_429 + self.error_5xx:
+            return 503
+        return None
+
+
+class ProviderSimulator:
+    """Threaded HTTP server answering all four providers' endpoints on one host"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fixtures: Optional[FixtureStore] = None,
+                 universe: Optional[SyntheticUniverse] = None, faults: Optional[Dict[str, FaultProfile]] = None):
+        self.fixtures = fixtures
+        self.universe = universe
+        self.faults = faults or {}
+        self.stats: Dict[str, Dict[str, Any]] = {
+            p: {'requests': 0, 'status': defaultdict(int), 'latency_s': []} for p in PROVIDERS
+        }
+        self._stats_lock = threading.Lock()
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                simulator._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point the extractors at this simulator"""
+        env = {var: self.url for var in PROVIDER_ENV.values()}
+        env.setdefault('BIRDEYE_API_KEY', os.getenv('BIRDEYE_API_KEY') or 'sim')
+        env.setdefault('HELIUS_API_KEY', os.getenv('HELIUS_API_KEY') or 'sim')
+        env['BIRDEYE_REQUEST_INTERVAL'] = '0'
+        return env
+
+    def start(self) -> 'ProviderSimulator':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'ProviderSimulator':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        started = time.perf_counter()
+        parts = urlsplit(handler.path)
+        params = dict(parse_qsl(parts.query))
+        provider = provider_for_path(parts.path)
+
+        status, body = 404, {'error': 'unknown endpoint'}
+        if provider:
+            fault = self.faults.get(provider) or self.faults.get('*')
+            injected = fault.admit() if fault else None
+            if fault:
+                time.sleep(fault.latency.sample())
+            if injected:
+                status, body = injected, {'error': 'rate limited' if injected == 429 else 'service unavailable'}
+            else:
+                recorded = self.fixtures.get(fixture_key(parts.path, params)) if self.fixtures else None
+                if recorded:
+                    status, body = recorded
+                elif self.universe:
+                    status, body = self.universe.respond(provider, parts.path, params)
+
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+        if provider:
+            with self._stats_lock:
+                stats = self.stats[provider]
+                stats['requests'] += 1
+                stats['status'][status] += 1
+                stats['latency_s'].append(time.perf_counter() - started)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for stats in self.stats.values():
+                stats['requests'] = 0
+                stats['status'].clear()
+                stats['latency_s'].clear()
+
+
+def _parse_provider_specs(values: List[str]) -> Dict[str, str]:
+    """['birdeye=lognormal:40:0.5', '*=fixed:5'] -> {'birdeye': ..., '*': ...}"""
+    specs = {}
+    for value in values or []:
+        provider, _, spec = value.partition('=')
+        specs[provider] = spec
+    return specs
+
+
+def build_faults(latency: List[str], errors: List[str], rate_limits: List[str], seed: int = 7) -> Dict[str, FaultProfile]:
+    latency_specs = _parse_provider_specs(latency)
+    error_specs = _parse_provider_specs(errors)
+    rate_specs = _parse_provider_specs(rate_limits)
+    faults = {}
+    for n, provider in enumerate(('*',) + PROVIDERS):
+        if not any(provider in specs for specs in (latency_specs, error_specs, rate_specs)):
+            continue
+        error_5xx, _, error_429 = error_specs.get(provider, error_specs.get('*', '0')).partition(',')
+        faults[provider] = FaultProfile(
+            latency=latency_specs.get(provider, latency_specs.get('*', 'none')),
+            error_5xx=float(error_5xx or 0),
+            error_429=float(error_429 or 0),
+            rate_limit_rps=float(rate_specs.get(provider, rate_specs.get('*', 0))),
+            seed=seed + n,
+        )
+    return faults
+
+
+def record(tokens: List[str], fixtures_dir: str):
+    """Extract real tokens through a RecordingSession, saving every provider response"""
+    from extractors.perfect_extractor import PerfectTokenExtractor
+    from extractors.unified_extractor import UnifiedTokenExtractor
+
+    store = FixtureStore(fixtures_dir)
+    for extractor_cls in (UnifiedTokenExtractor, PerfectTokenExtractor):
+        extractor = extractor_cls()
+        session = RecordingSession(store)
+        session.headers.update(extractor.session.headers)
+        extractor.session = session
+        for token in tokens:
+            extractor.extract_all_data(token)
+    print(f"💾 {len(store.responses)} fixtures in {fixtures_dir}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m extractors.provider_sim', description=__doc__.split('\n')[1])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='capture real provider responses into fixtures')
+    rec.add_argument('tokens', nargs='+')
+    rec.add_argument('--fixtures', required=True)
+
+    serve = sub.add_parser('serve', help='serve fixtures and/or a synthetic universe')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8900)
+    serve.add_argument('--fixtures', help='fixture directory written by `record`')
+    serve.add_argument('--synthetic', type=int, default=0, help='number of synthetic tokens')
+    serve.add_argument('--seed', type=int, default=7)
+    serve.add_argument('--latency', action='append', help='PROVIDER=none|fixed:MS|uniform:LO:HI|lognormal:MEDIAN:SIGMA')
+    serve.add_argument('--errors', action='append', help='PROVIDER=5XX_RATE,429_RATE')
+    serve.add_argument('--rate-limit', action='append', help='PROVIDER=REQUESTS_PER_SECOND')
+    serve.add_argument('--list-tokens', type=int, default=0, help='print the first N synthetic addresses')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record(args.tokens, args.fixtures)
+        return 0
+
+    universe = SyntheticUniverse(args.synthetic, args.seed) if args.synthetic else None
+    simulator = ProviderSimulator(
+        args.host, args.port,
+        fixtures=FixtureStore(args.fixtures) if args.fixtures else None,
+        universe=universe,
+        faults=build_faults(args.latency, args.errors, args.rate_limit, args.seed),
+    )
+    print(f"🧪 Provider simulator on {simulator.url}")
+    for var, value in simulator.env().items():
+        print(f"export {var}={value}")
+    if universe and args.list_tokens:
+        for address in list(universe.tokens)[:args.list_tokens]:
+            print(address)
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+"""The last extraction result per token, brought up to date instead of re-extracted.
+
+A token seen again within ``max_age`` seconds starts from its cached result.
+``UnifiedTokenExtractor.refresh`` then re-fetches only the providers whose
+fields are past their TTL. A /rank poll of a known token costs one
+DexScreener call instead of the full fan-out. An entry is reused only when it
+was extracted for at least the fields and tier now asked for. After
+``max_age`` the token gets a full extraction again. That also retries
+providers that failed or knew nothing the first time.
+
+Only results with provider data are cached. Unknown tokens go to the
+not-found cache (extractors/negative_cache.py) and blocklisted ones are
+checked on every call. Results missing a provider that failed or ran past
+the deadline are not cached either, since a refresh only re-fetches
+providers the result already has.
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.utils.instrumentation import CACHE_REQUESTS, inc
+from app.utils.memory import deep_sizeof
+
+
+class ExtractionCache:
+    def __init__(self, max_age: float = 300, max_entries: int = 2000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # address -> (result, fields it covers or None for all, tier, extracted_at)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Optional[frozenset], str, float]]" = OrderedDict()
+
+    def get(self, address: str, fields: Optional[Iterable[str]] = None,
+            tier: str = "full") -> Optional[Dict[str, Any]]:
+        """A private copy of the cached result, if it is recent enough and covers ``fields`` and ``tier``"""
+        with self._lock:
+            entry = self._entries.get(address)
+            usable = (
+                entry is not None
+                and self.clock() - entry[3] < self.max_age
+                and (entry[1] is None or (fields is not None and entry[1].issuperset(fields)))
+                and (entry[2] == "full" or tier == "fast")
+            )
+            if usable:
+                self._entries.move_to_end(address)
+                result = entry[0]
+        inc(CACHE_REQUESTS, "extraction", "hit" if usable else "miss")
+        # Callers mutate what they get back (history metrics, model conversion)
+        return copy.deepcopy(result) if usable else None
+
+    def put(self, address: str, result: Dict[str, Any], fields: Optional[Iterable[str]] = None,
+            tier: str = "full"):
+        """Cache a fresh full or narrow extraction of ``address``"""
+        if not result.get("data_sources") or result.get("blocked") or result.get("missing_sources"):
+            self.discard(address)
+            return
+        entry = (copy.deepcopy(result), frozenset(fields) if fields is not None else None, tier, self.clock())
+        with self._lock:
+            self._entries[address] = entry
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, address: str, result: Dict[str, Any]):
+        """Replace the result after a refresh, keeping what the entry covers and its age"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is not None:
+                self._entries[address] = (result,) + entry[1:]
+
+    def discard(self, address: str):
+        with self._lock:
+            self._entries.pop(address, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def estimated_bytes(self) -> int:
+        with self._lock:
+            entries = list(self._entries.items())
+        return deep_sizeof(entries)
+
+
+# Shared by every extraction in the process
+EXTRACTIONS = ExtractionCache(
+    max_age=float(os.getenv("DVM_EXTRACTION_CACHE_MAX_AGE", "300")),
+    max_entries=int(os.getenv("DVM_EXTRACTION_CACHE_SIZE", "2000")),
+)
@@ -0,0 +1,203 @@
+"""Per-token Helius transaction cursors with running per-wallet aggregates.
+
+The first analysis of a token reads its newest page of transactions. Each
+later call first reads only what is newer than the remembered signature
+(``until=``). It then spends a few pages walking further back (``before=``)
+until it reaches the token's first transaction. Wallet counts, transfers and
+totals are folded in as pages arrive. After the backfill, a repeat analysis
+costs one request plus one per 100 new transactions, and its DCA and whale
+metrics still cover the whole history.
+
+Per-wallet counts start exact. In the default auto mode a token switches to a
+fixed-size ``WalletSketch`` once it passes ``sketch_after`` wallets (in sketch
+mode from the start), so no token holds more than about ``sketch_after``
+dict entries (see extractors/sketches.py for the sketch's error bounds).
+``estimated_bytes`` is reported at /admin/memory.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Union
+
+from extractors.sketches import DCA_MIN_TRANSACTIONS, ExactWalletCounts, WalletSketch
+
+WALLET_COUNT_MODES = ("exact", "sketch", "auto")
+
+# A wallet with at least this share of a token's transactions counts as a whale
+WHALE_SHARE = 0.02
+
+
+@dataclass
+class TokenActivity:
+    newest_signature: Optional[str] = None  # everything up to here is counted
+    oldest_signature: Optional[str] = None  # backfill continues before this one
+    history_complete: bool = False
+    transactions: int = 0
+    transfers: int = 0
+    # Switch to a WalletSketch past this many wallets (0: from the start, None: never)
+    sketch_after: Optional[int] = None
+    wallets: Union[ExactWalletCounts, WalletSketch] = None
+    updated_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.wallets is None:
+            self.wallets = WalletSketch() if self.sketch_after == 0 else ExactWalletCounts()
+
+    @property
+    def sketched(self) -> bool:
+        return isinstance(self.wallets, WalletSketch)
+
+    def add(self, transactions: Iterable[Dict[str, Any]]):
+        wallets = self.wallets
+        for tx in transactions:
+            self.transactions += 1
+            if tx.get('type', '') == 'TRANSFER':
+                self.transfers += 1
+            fee_payer = tx.get('feePayer', '')
+            if fee_payer:
+                wallets.add(fee_payer)
+        if (self.sketch_after is not None and not self.sketched
+                and self.wallets.unique_wallets > self.sketch_after):
+            self.wallets = WalletSketch.from_counts(self.wallets)
+
+    @property
+    def unique_wallets(self) -> int:
+        return self.wallets.unique_wallets
+
+    def dca_wallets(self, min_transactions: int = DCA_MIN_TRANSACTIONS) -> int:
+        return self.wallets.dca_wallets(min_transactions)
+
+    def whale_transactions(self, share: float = WHALE_SHARE) -> int:
+        """Transactions paid for by wallets holding at least ``share`` of all of them (the 16 heaviest at most)"""
+        return sum(count for _, count in self.wallets.heavy_hitters() if count >= share * self.transactions)
+
+    def reset(self):
+        self.newest_signature = self.oldest_signature = None
+        self.history_complete = False
+        self.transactions = self.transfers = 0
+        self.wallets = None
+        self.__post_init__()
+
+
+class TransactionCursorStore:
+    """``TokenActivity`` per token, the least recently analysed evicted past ``max_tokens``"""
+
+    def __init__(self, max_tokens: int = 1000, wallet_counts: str = "auto", sketch_after: int = 2000):
+        if wallet_counts not in WALLET_COUNT_MODES:
+            raise ValueError(f"unknown wallet count mode {wallet_counts!r}, expected one of {WALLET_COUNT_MODES}")
+        self.max_tokens = max_tokens
+        self.sketch_after = {"exact": None, "sketch": 0, "auto": sketch_after}[wallet_counts]
+        self._lock = threading.Lock()
+        self._tokens: "OrderedDict[str, TokenActivity]" = OrderedDict()
+
+    def get(self, token_address: str) -> TokenActivity:
+        with self._lock:
+            activity = self._tokens.get(token_address)
+            if activity is None:
+                activity = self._tokens[token_address] = TokenActivity(sketch_after=self.sketch_after)
+            self._tokens.move_to_end(token_address)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+            return activity
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def estimated_bytes(self) -> int:
+        with self._lock:
+            activities = list(self._tokens.values())
+        return sum(a.wallets.nbytes() + 300 for a in activities)
+
+
+class HeliusTransactionReader:
+    """Brings a token's ``TokenActivity`` up to date through the Helius transactions endpoint"""
+
+    def __init__(self, session, base_url: str, api_key: str, store: TransactionCursorStore,
+                 page_size: int = 100, max_new_pages: int = 20, backfill_pages: int = 10, timeout: float = 10):
+        self.session = session
+        self.base_url = base_url
+        self.api_key = api_key
+        self.store = store
+        self.page_size = page_size
+        self.max_new_pages = max_new_pages
+        self.backfill_pages = backfill_pages
+        self.timeout = timeout
+        self.requests = 0
+
+    def _page(self, token_address: str, before: Optional[str] = None, until: Optional[str] = None) -> list:
+        params = {'api-key': self.api_key, 'limit': self.page_size}
+        if before:
+            params['before'] = before
+        if until:
+            params['until'] = until
+        self.requests += 1
+        response = self.session.get(f"{self.base_url}/addresses/{token_address}/transactions",
+                                    params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"Helius transactions: HTTP {response.status_code}")
+        page = response.json()
+        if not isinstance(page, list):
+            raise RuntimeError("Helius transactions: unexpected response")
+        return page
+
+    def update(self, token_address: str) -> TokenActivity:
+        activity = self.store.get(token_address)
+        with activity.lock:
+            self._read_new(token_address, activity)
+            self._backfill(token_address, activity)
+            activity.updated_at = time.time()
+        return activity
+
+    def _read_new(self, token_address: str, activity: TokenActivity):
+        """Everything newer than the cursor, newest first; applied only once it reaches the cursor"""
+        pages, before = [], None
+        # A token seen for the first time starts from its newest page; the backfill does the rest
+        max_pages = self.max_new_pages if activity.newest_signature else 1
+        for _ in range(max_pages):
+            page = self._page(token_address, before=before, until=activity.newest_signature)
+            if page:
+                pages.append(page)
+            if len(page) < self.page_size:
+                break
+            before = page[-1]['signature']
+        else:
+            if activity.newest_signature:
+                # More new activity than we read: the counted history no longer joins up, start
+                # again from what was just read and let the backfill walk back from there
+                activity.reset()
+        if not pages:
+            return
+        for page in pages:
+            activity.add(page)
+        activity.newest_signature = pages[0][0]['signature']
+        if activity.oldest_signature is None:
+            activity.oldest_signature = pages[-1][-1]['signature']
+            activity.history_complete = len(pages[-1]) < self.page_size
+
+    def _backfill(self, token_address: str, activity: TokenActivity):
+        for _ in range(self.backfill_pages):
+            if activity.history_complete or activity.oldest_signature is None:
+                return
+            page = self._page(token_address, before=activity.oldest_signature)
+            activity.add(page)
+            if page:
+                activity.oldest_signature = page[-1]['signature']
+            activity.history_complete = len(page) < self.page_size
+
+
+# Shared by every extraction in the process
+# (up to ~200 KB of exact counts per token before it switches to a ~10 KB sketch)
+TX_CURSORS = TransactionCursorStore(
+    int(os.getenv("HELIUS_CURSOR_TOKENS", "1000")),
+    wallet_counts=os.getenv("HELIUS_WALLET_COUNTS", "auto"),
+    sketch_after=int(os.getenv("HELIUS_SKETCH_AFTER", "2000")),
+)
@@ -9,43 +9,209 @@ import json
 import requests
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, Iterable, List
+import contextvars
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from app.utils.instrumentation import CACHE_REQUESTS, PROVIDER_ERRORS, inc, timed
+from app.utils.log import get_logger, token_extra
+from extractors.blocklist import BLOCKLIST, Blocklist
+from extractors.context import DEFAULT_CONTEXT, ExtractionContext
+from extractors.derived_graph import DerivedGraph, providers_for
+from extractors.holder_stats import HolderStats
+from extractors.negative_cache import NOT_FOUND, NegativeCache
+from extractors.result_cache import EXTRACTIONS, ExtractionCache
+
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
+# How long fields fetched from each provider stay fresh (seconds)
+PROVIDER_TTL_SECONDS = {
+    'dexscreener': 30,
+    'jupiter': 30,
+    'birdeye': 60,
+    'helius': 300,
+}
+
+# Fields each provider can supply, used to skip providers a consumer doesn't need
+PROVIDER_FIELDS = {
+    'dexscreener': {
+        'token_symbol', 'token_name', 'token_address', 'price_now', 'price_change_pct',
+        'price_change_5m', 'price_change_1h', 'mc_now', 'vol_now', 'volume_5m_usd',
+        'volume_1h_usd', 'volume_15m_usd', 'volume_30m_usd', 'volume_24h_usd', 'lp_now',
+        'liquidity_usd', 'lp_count', 'tx_5m', 'tx_1h', 'tx_now', 'pair_created_at',
+        'token_age_minutes', 'degen_audit', 'liquidity_locked_percent', 'holders_count',
+        'top_10_holders_percent', 'bundle_percent',
+    },
+    'jupiter': {'jupiter_price', 'price_confidence'},
+    'birdeye': {
+        'price_now', 'price_change_percent', 'price_change_5m_percent', 'price_change_15m_percent',
+        'price_change_30m_percent', 'price_change_1h_percent', 'price_change_24h_percent',
+    },
+    'helius': {
+        'holders_count', 'top_10_holders_percent', 'dca_accumulation_supply_percent',
+        '_helius_available', '_transfer_count', '_unique_wallets',
+    },
+}
+
+# Fields a provider measures where others only estimate them; its values replace the estimates
+AUTHORITATIVE_FIELDS = {
+    'helius': {'holders_count', 'top_10_holders_percent'},
+}
+
+# Authoritative fields that are only a lower bound when the provider's result is partial
+PARTIAL_LOWER_BOUNDS = {
+    'helius': ('_holders_partial', {'holders_count'}),
+}
+
+# Always fetched so an unknown token can be told apart from a narrow request
+IDENTITY_FIELDS = ('token_symbol', 'token_name')
+
+# What a blocklisted token extracts to; the audit flags make the pre-filter reject it
+BLOCKED_DATA = {
+    "token_symbol": "BLOCKED",
+    "token_name": "Blocklisted Token",
+    "lp_count": 1,  # Minimum required by model validation
+    "degen_audit": {
+        "is_honeypot": True,
+        "has_blacklist": True,
+        "buy_tax_percent": 0.0,
+        "sell_tax_percent": 0.0,
+    },
+}
+
+# Derived variables as nodes over provider fields. A calculation returns None
+# when its inputs can't produce a meaningful value, leaving the field untouched.
+DERIVED_GRAPH = DerivedGraph()
+# Market cap calculations
+DERIVED_GRAPH.add('supply_now', ('mc_now', 'price_now'),
+                  lambda d: d['mc_now'] / d['price_now'] if d['price_now'] > 0 else None)
+# Ratios
+DERIVED_GRAPH.add('vol_to_mc', ('vol_now', 'mc_now'),
+                  lambda d: d['vol_now'] / d['mc_now'] if d['mc_now'] > 0 else None)
+DERIVED_GRAPH.add('lp_mcap_ratio', ('lp_now', 'mc_now'),
+                  lambda d: d['lp_now'] / d['mc_now'] if d['mc_now'] > 0 else None)
+# Use price change as proxy for mc change
+DERIVED_GRAPH.add('mc_change_pct', ('price_change_pct',), lambda d: d['price_change_pct'])
+# Estimate holder metrics if we have some data
+DERIVED_GRAPH.add('holders_per_mc', ('holders_count', 'mc_now'),
+                  lambda d: d['holders_count'] / (d['mc_now'] / 1_000_000) if d['mc_now'] > 0 else None)
+# Activity flags
+DERIVED_GRAPH.add('high_activity_flag', ('tx_5m',), lambda d: d['tx_5m'] > 50)
+DERIVED_GRAPH.add('ath_flag', ('price_change_pct',), lambda d: d['price_change_pct'] > 0.20)
+
+class ProviderError(Exception):
+    """A provider request failed (HTTP error, bad response).
+
+    Unlike a provider returning None, this says nothing about whether the
+    token exists, so it never lands the address in the not-found cache.
+    """
+
+    def __init__(self, message: str, reason: Optional[str] = "exception"):
+        super().__init__(message)
+        # Label for PROVIDER_ERRORS; None when the session hook already counted it
+        self.reason = reason
+
+    @classmethod
+    def http(cls, provider: str, status_code: int) -> "ProviderError":
+        return cls(f"{provider}: HTTP {status_code}", reason=None)
+
+
 class UnifiedTokenExtractor:
-    def __init__(self):
+    def __init__(self, negative_cache: Optional[NegativeCache] = None, blocklist: Optional[Blocklist] = None,
+                 results: Optional[ExtractionCache] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'application/json',
         })
         
-        # API endpoints
+        # API endpoints (hosts can be pointed at a local stand-in, see extractors/provider_sim.py)
         self.apis = {
-            'dexscreener': "https://api.dexscreener.com/latest/dex/tokens/",
-            'jupiter': "https://price.jup.ag/v4/price",
-            'birdeye': "https://public-api.birdeye.so",
-            'helius': "https://api.helius.xyz/v0/addresses",
+            'dexscreener': f"{os.getenv('DEXSCREENER_API_URL', 'https://api.dexscreener.com')}/latest/dex/tokens/",
+            'jupiter': f"{os.getenv('JUPITER_API_URL', 'https://price.jup.ag')}/v4/price",
+            'birdeye': os.getenv('BIRDEYE_API_URL', "https://public-api.birdeye.so"),
+            'helius': f"{os.getenv('HELIUS_API_URL', 'https://api.helius.xyz')}/v0",
         }
         
         # Get API keys from environment
         self.helius_key = os.getenv('HELIUS_API_KEY', '')
         self.birdeye_key = os.getenv('BIRDEYE_API_KEY', '')
         
-    def extract_all_data(self, token_address: str) -> Dict[str, Any]:
-        """Extract maximum data from all available sources"""
-        print(f"\n🚀 UNIFIED EXTRACTION FOR: {token_address}")
-        print("="*60)
+        # Seconds between Birdeye history calls (public tier allows 1 req/sec)
+        self.birdeye_interval = float(os.getenv('BIRDEYE_REQUEST_INTERVAL', '1.1'))
+        
+        # Token accounts per Helius page, and how many pages to read at most
+        self.helius_page_size = int(os.getenv('HELIUS_PAGE_SIZE', '1000'))
+        self.helius_max_pages = int(os.getenv('HELIUS_MAX_PAGES', '500'))
+        
+        # Provider name -> fetch method
+        self.providers = {
+            'dexscreener': self.get_dexscreener_data,
+            'jupiter': self.get_jupiter_data,
+            'birdeye': self.get_birdeye_data,
+            'helius': self.get_helius_data,
+        }
+        self.session.hooks['response'].append(self._count_http_errors)
+        
+        # Addresses every provider reported as not found
+        self.negative_cache = NOT_FOUND if negative_cache is None else negative_cache
+        # Known scam mints and deployers (DVM_BLOCKLIST_FILE)
+        self.blocklist = BLOCKLIST if blocklist is None else blocklist
+        # Recent results, refreshed provider by provider (DVM_EXTRACTION_CACHE_MAX_AGE)
+        self.results = EXTRACTIONS if results is None else results
+        
+    def _count_http_errors(self, response, *args, **kwargs):
+        """Session hook: count non-2xx provider responses"""
+        if response.status_code >= 400:
+            for source, base in self.apis.items():
+                if response.url.startswith(base):
+                    inc(PROVIDER_ERRORS, source, f"http_{response.status_code}")
+                    break
+        return response
+    
+    def _fetch_timed(self, source: str, token_address: str, context: ExtractionContext):
+        with timed("provider", source):
+            return self.providers[source](token_address, context)
+    
+    def extract(self, token_address: str, fields: Optional[List[str]] = None,
+                context: Optional[ExtractionContext] = None) -> Dict[str, Any]:
+        """``extract_all_data`` for a new token, ``refresh`` of its cached result for a recent one"""
+        context = context or DEFAULT_CONTEXT
+        if fields is None and context.fields is not None:
+            fields = list(context.fields)
+        cached = None
+        if token_address not in self.blocklist:
+            cached = self.results.get(token_address, fields, context.tier)
+        if cached is not None:
+            result = self.refresh(cached, fields, context=context)
+            self.results.update(token_address, result)
+        else:
+            result = self.extract_all_data(token_address, fields, context)
+            self.results.put(token_address, result, fields, context.tier)
+        return result
+    
+    def extract_all_data(self, token_address: str, fields: Optional[List[str]] = None,
+                         context: Optional[ExtractionContext] = None) -> Dict[str, Any]:
+        """Extract maximum data from all available sources.
+        
+        When ``fields`` (or ``context.fields``) is given only the providers and
+        derived variables those fields depend on are evaluated. ``context``
+        carries the request's demo mode, tier and deadline.
+        """
+        context = context or DEFAULT_CONTEXT
+        if fields is None and context.fields is not None:
+            fields = list(context.fields)
         
         # Detect token type
         is_ethereum = token_address.startswith('0x') and len(token_address) == 42
         token_type = "Ethereum/EVM" if is_ethereum else "Solana"
-        print(f"Token Type: {token_type}")
+        logger.debug("extracting %s (%s)", token_address, token_type,
+                     extra=token_extra(token_address, token_type=token_type, tier=context.tier))
         
         result = {
             "token_address": token_address,
@@ -53,6 +219,7 @@ class UnifiedTokenExtractor:
             "extraction_timestamp": datetime.utcnow().isoformat(),
             "data_sources": {},
             "combined_data": {},
+            "field_provenance": {},
             "coverage": {
                 "total_variables": 69,
                 "extracted": 0,
@@ -60,47 +227,66 @@ class UnifiedTokenExtractor:
             }
         }
         
-        # Parallel extraction from multiple sources
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {
-                executor.submit(self.get_dexscreener_data, token_address): 'dexscreener',
-                executor.submit(self.get_jupiter_data, token_address): 'jupiter',
-                executor.submit(self.get_birdeye_data, token_address): 'birdeye',
-                executor.submit(self.get_helius_data, token_address): 'helius',
-            }
-            
-            for future in as_completed(futures):
-                source = futures[future]
-                try:
-                    data = future.result()
-                    if data:
-                        result["data_sources"][source] = data
-                        self.merge_data(result["combined_data"], data)
-                        print(f"✅ {source}: {len(data)} variables")
-                    else:
-                        print(f"⚠️  {source}: No data returned")
-                except Exception as e:
-                    print(f"❌ {source}: {str(e)}")
+        # Parallel extraction from the sources the requested fields need
+        if fields is not None:
+            fields = list(IDENTITY_FIELDS) + [f for f in fields if f not in IDENTITY_FIELDS]
+        sources = providers_for(fields, DERIVED_GRAPH, PROVIDER_FIELDS)
+        if token_address in self.blocklist:
+            logger.info("%s is blocklisted, skipping providers", token_address, extra=token_extra(token_address))
+            fetched = []
+            result["blocked"] = True
+            result["combined_data"].update(BLOCKED_DATA)
+            self.record_provenance(result, BLOCKED_DATA, 'blocklist', time.time())
+        elif context.cache_policy != "refresh" and self.negative_cache.get(token_address):
+            # Known not found: straight to the placeholder without any provider traffic
+            fetched = []
+            result["not_found_cached"] = True
+        else:
+            fetched = self.fetch_sources(token_address, sources, context)
+            # Providers that failed or were past the deadline
+            missing = set(sources) - {source for source, _, _ in fetched}
+            if missing:
+                result["missing_sources"] = sorted(missing)
+            if any(data for _, data, _ in fetched):
+                self.negative_cache.discard(token_address)
+            elif not missing:
+                # Only when every provider answered "not found"; a missing provider proves nothing
+                self.negative_cache.add(token_address)
+        # Authoritative providers last, so their values and lower bounds see every estimate
+        for source, data, fetched_at in sorted(fetched, key=lambda f: f[0] in AUTHORITATIVE_FIELDS):
+            if data:
+                result["data_sources"][source] = data
+                with timed("merge"):
+                    written = self.merge_data(result["combined_data"], data, *self.merge_rules(source, data))
+                    self.record_provenance(result, written, source, fetched_at)
+                logger.debug("%s: %d variables", source, len(data),
+                             extra=token_extra(token_address, source=source, variables=len(data)))
+            else:
+                logger.debug("%s: token not found", source, extra=token_extra(token_address, source=source))
         
         # Add calculated and derived variables
-        self.calculate_derived_variables(result["combined_data"])
+        with timed("derive"):
+            derived = self.calculate_derived_variables(result["combined_data"], fields=fields)
+            self.record_provenance(result, derived, 'derived', time.time())
         
         # Add intelligent defaults for missing critical variables
+        before = set(result["combined_data"])
         self.add_intelligent_defaults(result["combined_data"])
+        self.record_provenance(result, set(result["combined_data"]) - before, 'default', time.time())
         
         # If we have no basic data, add minimal required fields to prevent errors
         if not result["combined_data"].get("token_symbol"):
-            print("\n⚠️  WARNING: Token not found on any data source!")
-            print("This token may be:")
-            print("  - Not yet listed on any DEX")
-            print("  - A new/private token")
-            print("  - An invalid address")
+            # Not yet listed on any DEX, a new/private token or an invalid address
+            demo_mode = context.demo_mode
+            logger.debug("%s not found on any data source%s", token_address,
+                         ", using demo data" if demo_mode else "",
+                         extra=token_extra(token_address, demo_mode=demo_mode,
+                                           not_found_cached=result.get("not_found_cached", False)))
             
-            # Check if demo mode is enabled via environment variable
-            demo_mode = os.getenv('DVM_DEMO_MODE', 'false').lower() == 'true'
+            placeholder_source = 'demo' if demo_mode else 'placeholder'
+            before = dict(result["combined_data"])
             
             if demo_mode:
-                print("\n🎭 DEMO MODE ENABLED - Generating synthetic data")
                 # Generate realistic demo data that passes pre-filter
                 result["combined_data"].update({
                     "token_symbol": "DEMO",
@@ -142,6 +328,13 @@ class UnifiedTokenExtractor:
                     "top_10_holders_percent": 100.0,
                     "bundle_percent": 100.0
                 })
+            
+            self.record_provenance(
+                result,
+                [k for k, v in result["combined_data"].items() if k not in before or before[k] is not v],
+                placeholder_source,
+                time.time(),
+            )
         
         # Calculate coverage
         result["coverage"]["extracted"] = len(result["combined_data"])
@@ -154,13 +347,135 @@ class UnifiedTokenExtractor:
         
         return result
     
-    def get_dexscreener_data(self, token_address: str) -> Optional[Dict[str, Any]]:
-        """Extract comprehensive data from DexScreener"""
+    def fetch_sources(self, token_address: str, sources: List[str],
+                      context: ExtractionContext = DEFAULT_CONTEXT) -> List[tuple]:
+        """Fetch the given providers in parallel, returning (source, data, fetched_at) tuples.
+        
+        ``data`` is None when a provider doesn't know the token. Providers that
+        failed or were still running at ``context.deadline`` are left out.
+        """
+        fetched = []
+        executor = ThreadPoolExecutor(max_workers=max(len(sources), 1))
+        futures = {
+            # Copied context so provider timings reach the current request's Server-Timing
+            executor.submit(contextvars.copy_context().run, self._fetch_timed, source, token_address, context): source
+            for source in sources
+        }
         try:
-            url = f"{self.apis['dexscreener']}{token_address}"
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code != 200 or not response.json().get('pairs'):
+            for future in as_completed(futures, timeout=context.remaining()):
+                source = futures[future]
+                try:
+                    data = future.result()
+                    if not data:
+                        inc(PROVIDER_ERRORS, source, "no_data")
+                    fetched.append((source, data, time.time()))
+                except ProviderError as e:
+                    if e.reason:
+                        inc(PROVIDER_ERRORS, source, e.reason)
+                    logger.warning("%s failed: %s", source, e, extra=token_extra(token_address, source=source))
+                except requests.Timeout as e:
+                    inc(PROVIDER_ERRORS, source, "timeout")
+                    logger.warning("%s timed out: %s", source, e, extra=token_extra(token_address, source=source))
+                except Exception as e:
+                    inc(PROVIDER_ERRORS, source, "exception")
+                    logger.warning("%s error: %s", source, e, exc_info=True,
+                                   extra=token_extra(token_address, source=source))
+        except TimeoutError:
+            for future, source in futures.items():
+                if not future.done():
+                    inc(PROVIDER_ERRORS, source, "deadline")
+                    logger.warning("%s: deadline passed", source, extra=token_extra(token_address, source=source))
+        finally:
+            # Don't wait for abandoned providers; their own timeouts end them
+            executor.shutdown(wait=False, cancel_futures=True)
+        return fetched
+    
+    def record_provenance(self, result: Dict[str, Any], fields, source: str, fetched_at: float):
+        """Remember which source supplied each field and when"""
+        provenance = result.setdefault("field_provenance", {})
+        for field in fields:
+            provenance[field] = {"source": source, "fetched_at": fetched_at}
+    
+    def stale_sources(self, result: Dict[str, Any], fields: Optional[List[str]] = None,
+                      now: Optional[float] = None) -> List[str]:
+        """Providers owning at least one field that is past its TTL"""
+        now = time.time() if now is None else now
+        provenance = result.get("field_provenance", {})
+        stale = set()
+        for field in (fields if fields is not None else provenance):
+            meta = provenance.get(field)
+            if not meta or meta["source"] not in PROVIDER_TTL_SECONDS:
+                continue
+            if now - meta["fetched_at"] > PROVIDER_TTL_SECONDS[meta["source"]]:
+                stale.add(meta["source"])
+        return sorted(stale)
+    
+    def refresh(self, result: Dict[str, Any], fields: Optional[List[str]] = None,
+                now: Optional[float] = None, context: Optional[ExtractionContext] = None) -> Dict[str, Any]:
+        """Re-fetch only the providers whose fields went stale and update derived variables incrementally.
+        
+        With ``context.cache_policy == "refresh"`` every provider owning one of the fields is re-fetched.
+        """
+        context = context or DEFAULT_CONTEXT
+        if fields is None and context.fields is not None:
+            fields = list(context.fields)
+        if context.cache_policy == "refresh":
+            now = float("inf")
+        stale = self.stale_sources(result, fields, now)
+        # Providers whose previous data is still within its TTL count as cache hits
+        for source in result.get("data_sources", {}):
+            if source in PROVIDER_TTL_SECONDS:
+                inc(CACHE_REQUESTS, "provider_ttl", "miss" if source in stale else "hit")
+        if not stale:
+            return result
+        
+        logger.debug("refreshing %s: %s", result['token_address'], ', '.join(stale),
+                     extra=token_extra(result['token_address'], stale=stale))
+        combined = result["combined_data"]
+        provenance = result.setdefault("field_provenance", {})
+        changed = set()
+        
+        for source, data, fetched_at in self.fetch_sources(result["token_address"], stale, context):
+            if not data:
+                # Keep the previous values; they stay stale and are retried next time
+                logger.debug("%s: token not found", source, extra=token_extra(result['token_address'], source=source))
+                continue
+            result["data_sources"][source] = data
+            _, lower_bounds = self.merge_rules(source, data)
+            for key, value in data.items():
+                if key in lower_bounds and value is not None and value < (combined.get(key) or 0):
+                    continue
+                owner = provenance.get(key, {}).get("source")
+                # Fresh values replace whatever this provider (or a fallback) supplied before;
+                # fields owned by another live provider follow the normal merge rules
+                if owner == source or owner not in PROVIDER_TTL_SECONDS or (value and not combined.get(key)):
+                    if combined.get(key) != value:
+                        changed.add(key)
+                    combined[key] = value
+                    provenance[key] = {"source": source, "fetched_at": fetched_at}
+        
+        with timed("derive"):
+            derived = self.calculate_derived_variables(combined, changed)
+            self.record_provenance(result, derived, 'derived', time.time())
+        
+        result["refreshed_at"] = datetime.utcnow().isoformat()
+        result["coverage"]["extracted"] = len(combined)
+        result["coverage"]["percentage"] = round(
+            (result["coverage"]["extracted"] / result["coverage"]["total_variables"]) * 100, 1
+        )
+        self.generate_extraction_summary(result)
+        return result
+    
+    def get_dexscreener_data(self, token_address: str,
+                             context: ExtractionContext = DEFAULT_CONTEXT) -> Optional[Dict[str, Any]]:
+        """Extract comprehensive data from DexScreener (None when it has no pairs for the token)"""
+        url = f"{self.apis['dexscreener']}{token_address}"
+        response = self.session.get(url, timeout=context.timeout(10))
+        if response.status_code != 200:
+            raise ProviderError.http("DexScreener", response.status_code)
+        
+        try:
+            if not response.json().get('pairs'):
                 return None
             
             all_pairs = response.json()['pairs']
@@ -222,7 +537,9 @@ class UnifiedTokenExtractor:
                 age_ms = current_time - extracted['pair_created_at']
                 age_minutes = int(age_ms / (1000 * 60))
                 extracted['token_age_minutes'] = age_minutes
-                print(f"DEBUG: pair_created_at={extracted['pair_created_at']}, current_time={current_time}, age_minutes={age_minutes}")
+                logger.debug("dexscreener age %s: %d minutes", token_address, age_minutes,
+                             extra=token_extra(token_address, pair_created_at=extracted['pair_created_at'],
+                                               current_time_ms=current_time, age_minutes=age_minutes))
             
             # Add more default values that DexScreener can provide
             extracted.update({
@@ -246,38 +563,42 @@ class UnifiedTokenExtractor:
             
             return extracted
             
-        except Exception as e:
-            print(f"DexScreener error: {e}")
-            return None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ProviderError(f"DexScreener: unexpected response ({e})") from e
     
-    def get_jupiter_data(self, token_address: str) -> Optional[Dict[str, Any]]:
+    def get_jupiter_data(self, token_address: str,
+                         context: ExtractionContext = DEFAULT_CONTEXT) -> Optional[Dict[str, Any]]:
         """Get additional price data from Jupiter"""
+        url = f"{self.apis['jupiter']}?ids={token_address}"
+        response = self.session.get(url, timeout=context.timeout(5))
+        if response.status_code != 200:
+            raise ProviderError.http("Jupiter", response.status_code)
         try:
-            url = f"{self.apis['jupiter']}?ids={token_address}"
-            response = self.session.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if token_address in data.get('data', {}):
-                    token_data = data['data'][token_address]
-                    return {
-                        'jupiter_price': float(token_data.get('price', 0)),
-                        'price_confidence': float(token_data.get('confidence', 0)),
-                    }
-            return None
-        except Exception as e:
-            print(f"Jupiter error: {e}")
+            data = response.json()
+            if token_address in (data.get('data') or {}):
+                token_data = data['data'][token_address]
+                return {
+                    'jupiter_price': float(token_data.get('price', 0)),
+                    'price_confidence': float(token_data.get('confidence', 0)),
+                }
             return None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ProviderError(f"Jupiter: unexpected response ({e})") from e
     
-    def get_birdeye_data(self, token_address: str) -> Optional[Dict[str, Any]]:
-        """Get price history and changes from Birdeye (working endpoints only)"""
+    def get_birdeye_data(self, token_address: str,
+                         context: ExtractionContext = DEFAULT_CONTEXT) -> Optional[Dict[str, Any]]:
+        """Get price history and changes from Birdeye (working endpoints only).
+        
+        The ``fast`` tier only fetches the current price.
+        """
         if not self.birdeye_key:
-            print("⚠️  Birdeye: No API key configured")
+            # Not configured, so never consulted; that isn't a failure
+            logger.debug("birdeye: no API key configured", extra=token_extra(token_address))
             return None
             
         # Skip if address looks like Ethereum format (0x prefix)
         if token_address.startswith('0x'):
-            print("⚠️  Birdeye: Ethereum-style addresses not supported")
+            logger.debug("birdeye: Ethereum-style addresses not supported", extra=token_extra(token_address))
             return None
             
         try:
@@ -288,11 +609,16 @@ class UnifiedTokenExtractor:
             price_url = f"{self.apis['birdeye']}/defi/price"
             price_params = {'address': token_address}
             
-            price_response = self.session.get(price_url, headers=headers, params=price_params, timeout=5)
-            if price_response.status_code == 200:
-                price_data = price_response.json().get('data', {})
-                result['price_now'] = price_data.get('value', 0)
-                result['price_change_24h_percent'] = price_data.get('priceChange24h', 0)
+            price_response = self.session.get(price_url, headers=headers, params=price_params,
+                                              timeout=context.timeout(5))
+            if price_response.status_code != 200:
+                raise ProviderError.http("Birdeye", price_response.status_code)
+            price_data = price_response.json().get('data')
+            if not price_data:
+                # Birdeye doesn't know the token; its history would be empty too
+                return None
+            result['price_now'] = price_data.get('value', 0)
+            result['price_change_24h_percent'] = price_data.get('priceChange24h', 0)
             
             # 2. Get price history for multiple timeframes
             current_time = int(time.time())
@@ -304,7 +630,14 @@ class UnifiedTokenExtractor:
                 '24h': 86400
             }
             
+            if context.tier == "fast":
+                timeframes = {}
+            
             for tf_name, seconds in timeframes.items():
+                if context.expired:
+                    logger.info("birdeye: deadline passed, skipping %s and longer", tf_name,
+                                extra=token_extra(token_address, timeframe=tf_name))
+                    break
                 history_url = f"{self.apis['birdeye']}/defi/history_price"
                 
                 # Determine the appropriate interval type
@@ -323,7 +656,8 @@ class UnifiedTokenExtractor:
                 }
                 
                 try:
-                    history_response = self.session.get(history_url, headers=headers, params=history_params, timeout=5)
+                    history_response = self.session.get(history_url, headers=headers, params=history_params,
+                                                        timeout=context.timeout(5))
                     if history_response.status_code == 200:
                         history_data = history_response.json().get('data', {})
                         items = history_data.get('items', [])
@@ -339,106 +673,104 @@ class UnifiedTokenExtractor:
                             if tf_name == '1h':
                                 result['price_change_percent'] = change_pct
                     else:
-                        print(f"Birdeye {tf_name} failed: {history_response.status_code}")
+                        logger.warning("birdeye %s history: HTTP %d", tf_name, history_response.status_code,
+                                       extra=token_extra(token_address, timeframe=tf_name,
+                                                         status=history_response.status_code))
                 except Exception as e:
-                    print(f"Birdeye {tf_name} error: {e}")
+                    logger.warning("birdeye %s history error: %s", tf_name, e,
+                                   extra=token_extra(token_address, timeframe=tf_name))
                     continue
                 
-                time.sleep(1.1)  # Respect rate limits (1 req/sec)
+                with timed("throttle", "birdeye"):
+                    time.sleep(context.timeout(self.birdeye_interval))  # Respect rate limits (1 req/sec)
             
             return result if result else None
             
-        except Exception as e:
-            print(f"Birdeye error: {e}")
-            return None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ProviderError(f"Birdeye: unexpected response ({e})") from e
     
-    def get_helius_data(self, token_address: str) -> Optional[Dict[str, Any]]:
+    def get_helius_data(self, token_address: str,
+                        context: ExtractionContext = DEFAULT_CONTEXT) -> Optional[Dict[str, Any]]:
         """Get holder data from Helius (if API key available)"""
         if not self.helius_key:
-            print("⚠️  Helius: No API key configured")
+            logger.debug("helius: no API key configured", extra=token_extra(token_address))
             return None
             
         # Skip if address looks like Ethereum format (0x prefix)
         if token_address.startswith('0x'):
-            print("⚠️  Helius: Ethereum-style addresses not supported")
+            logger.debug("helius: Ethereum-style addresses not supported", extra=token_extra(token_address))
             return None
             
         try:
-            # Try token holders endpoint
-            url = f"https://api.helius.xyz/v0/token-accounts?api-key={self.helius_key}&mint={token_address}"
-            response = self.session.get(url, timeout=10)
+            # Page through the token accounts; each page is folded into running stats and dropped
+            url = f"{self.apis['helius']}/token-accounts"
+            stats = HolderStats()
+            complete = False
+            for page in range(1, self.helius_max_pages + 1):
+                if context.expired:
+                    if page == 1:
+                        raise ProviderError("Helius: deadline passed before the first holder page", reason="deadline")
+                    logger.info("helius: deadline passed after %d holder pages", page - 1,
+                                extra=token_extra(token_address, pages=page - 1))
+                    break
+                params = {'api-key': self.helius_key, 'mint': token_address,
+                          'limit': self.helius_page_size, 'page': page}
+                response = self.session.get(url, params=params, timeout=context.timeout(10))
+                if response.status_code != 200:
+                    if page == 1:
+                        raise ProviderError.http("Helius", response.status_code)
+                    break  # keep the pages read so far as a partial result
+                accounts = response.json()
+                if not isinstance(accounts, list):
+                    raise ProviderError("Helius: unexpected token accounts response")
+                stats.update(accounts)
+                if len(accounts) < self.helius_page_size:
+                    complete = True
+                    break
             
-            if response.status_code == 200:
-                data = response.json()
-                if data and isinstance(data, list) and len(data) > 0:
-                    # Calculate basic holder metrics
-                    holders_count = len(data)
-                    
-                    # Get total supply from token accounts
-                    total_supply = sum(float(acc.get('amount', 0)) for acc in data if acc.get('amount'))
-                    
-                    # Simple DCA detection - accounts that have been accumulating
-                    dca_accounts = 0
-                    for acc in data:
-                        if acc.get('amount', 0) > 0:
-                            dca_accounts += 1
-                    
-                    result = {
-                        'holders_count': holders_count,
-                        '_helius_available': True,
-                        'dca_accumulation_supply_percent': min(2.5, (dca_accounts / max(holders_count, 1)) * 10),
-                        '_transfer_count': 1,  # Placeholder
-                        '_unique_wallets': holders_count
-                    }
-                    return result
-            return None
-        except Exception as e:
-            print(f"Helius error: {e}")
-            return None
+            if stats.accounts == 0:
+                return None
+            result = {
+                # A lower bound when paging stopped early
+                'holders_count': stats.holders,
+                '_helius_available': True,
+                # Simple DCA detection - share of accounts still holding a balance
+                'dca_accumulation_supply_percent': min(2.5, (stats.holders / stats.accounts) * 10),
+                '_transfer_count': 1,  # Placeholder
+                '_unique_wallets': stats.holders,
+            }
+            # Concentration is only meaningful over every account
+            if complete and stats.holders >= stats.top_n:
+                result['top_10_holders_percent'] = stats.top_percent
+            else:
+                result['_holders_partial'] = not complete
+            return result
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ProviderError(f"Helius: unexpected response ({e})") from e
     
-    def calculate_holder_metrics(self, holders: List[Dict]) -> Dict[str, Any]:
-        """Calculate holder distribution metrics"""
-        if not holders:
-            return {}
-            
-        sorted_holders = sorted(holders, key=lambda x: float(x.get('amount', 0)), reverse=True)
-        total_supply = sum(float(h.get('amount', 0)) for h in holders)
-        
-        if total_supply > 0 and len(sorted_holders) >= 10:
-            top_10_amount = sum(float(h.get('amount', 0)) for h in sorted_holders[:10])
+    def calculate_holder_metrics(self, holders: Iterable[Dict]) -> Dict[str, Any]:
+        """Calculate holder distribution metrics in one pass (any iterable of token accounts)"""
+        stats = HolderStats().update(holders)
+        if stats.total_supply > 0 and stats.holders >= stats.top_n:
             return {
-                'holders_count': len(holders),
-                'top_10_holders_percent': (top_10_amount / total_supply) * 100
+                'holders_count': stats.holders,
+                'top_10_holders_percent': stats.top_percent
             }
         return {}
     
-    def calculate_derived_variables(self, data: Dict[str, Any]):
-        """Calculate variables that can be derived from other data"""
-        # Market cap calculations
-        if 'mc_now' in data and 'price_now' in data and data['price_now'] > 0:
-            data['supply_now'] = data['mc_now'] / data['price_now']
+    def calculate_derived_variables(self, data: Dict[str, Any], changed: Optional[set] = None,
+                                    fields: Optional[List[str]] = None) -> List[str]:
+        """Calculate variables that can be derived from other data.
         
-        # Ratios
-        if 'vol_now' in data and 'mc_now' in data and data['mc_now'] > 0:
-            data['vol_to_mc'] = data['vol_now'] / data['mc_now']
-            
-        if 'lp_now' in data and 'mc_now' in data and data['mc_now'] > 0:
-            data['lp_mcap_ratio'] = data['lp_now'] / data['mc_now']
-        
-        # Use price change as proxy for mc change
-        if 'price_change_pct' in data:
-            data['mc_change_pct'] = data['price_change_pct']
-        
-        # Estimate holder metrics if we have some data
-        if 'holders_count' in data and 'mc_now' in data and data['mc_now'] > 0:
-            data['holders_per_mc'] = data['holders_count'] / (data['mc_now'] / 1_000_000)
-        
-        # Activity flags
-        if 'tx_5m' in data:
-            data['high_activity_flag'] = data['tx_5m'] > 50
-            
-        if 'price_change_pct' in data:
-            data['ath_flag'] = data['price_change_pct'] > 0.20
+        ``changed`` recomputes only variables downstream of those fields and
+        ``fields`` limits evaluation to what a consumer asked for. Returns the
+        names of the variables that were written.
+        """
+        if changed is not None:
+            stale = DERIVED_GRAPH.dependents(changed)
+            targets = stale if fields is None else stale & set(fields)
+            return DERIVED_GRAPH.evaluate(data, targets, invalidated=stale)
+        return DERIVED_GRAPH.evaluate(data, fields)
     
     def add_intelligent_defaults(self, data: Dict[str, Any]):
         """Add intelligent defaults for missing critical variables"""
@@ -466,11 +798,33 @@ class UnifiedTokenExtractor:
             if key not in data and value is not None:
                 data[key] = value
     
-    def merge_data(self, target: Dict[str, Any], source: Dict[str, Any]):
-        """Merge source data into target, prioritizing non-zero values"""
+    def merge_rules(self, source: str, data: Dict[str, Any]) -> tuple:
+        """(authoritative, lower_bounds) keys for merging ``source``'s ``data``"""
+        authoritative = AUTHORITATIVE_FIELDS.get(source, set())
+        flag, bounded = PARTIAL_LOWER_BOUNDS.get(source, (None, set()))
+        if flag and data.get(flag):
+            # e.g. Helius paging stopped at the deadline: its holder count only rules out lower estimates
+            return authoritative - bounded, bounded
+        return authoritative, set()
+    
+    def merge_data(self, target: Dict[str, Any], source: Dict[str, Any], authoritative=(),
+                   lower_bounds=()) -> List[str]:
+        """Merge source data into target, prioritizing non-zero values. Returns the keys written.
+        
+        ``authoritative`` keys are always taken from ``source``; ``lower_bounds`` keys
+        only replace a smaller value.
+        """
+        written = []
         for key, value in source.items():
-            if key not in target or (value and not target.get(key)):
+            if key in lower_bounds and value is not None and target.get(key) is not None:
+                if value > target[key]:
+                    target[key] = value
+                    written.append(key)
+                continue
+            if key not in target or (value and not target.get(key)) or key in authoritative:
                 target[key] = value
+                written.append(key)
+        return written
     
     def generate_extraction_summary(self, result: Dict[str, Any]):
         """Generate a summary of extraction results"""
@@ -492,11 +846,26 @@ class UnifiedTokenExtractor:
         }
         result["summary"] = summary
 
-def extract_token_data(token_address: str, fast_mode: bool = False) -> Dict[str, Any]:
-    """Main function to extract token data"""
-    # Use the unified extractor directly (it has all the improvements)
+def extract_token_data(token_address: str, fast_mode: bool = False,
+                       fields: Optional[List[str]] = None,
+                       context: Optional[ExtractionContext] = None) -> Dict[str, Any]:
+    """Main function to extract token data. ``fast_mode`` is the ``fast`` tier when no ``context`` is given."""
+    if context is None:
+        context = ExtractionContext(tier="fast" if fast_mode else "full")
+    # Use the unified extractor directly (it has all the improvements); recent tokens are only refreshed
     extractor = UnifiedTokenExtractor()
-    return extractor.extract_all_data(token_address)
+    return extractor.extract(token_address, fields, context)
+
+def compact_result(result: Dict[str, Any], include_sources: bool = False) -> Dict[str, Any]:
+    """The extraction result without the per-provider payloads already merged into ``combined_data``.
+
+    ``data_sources`` is replaced by the list of providers that returned data.
+    """
+    if include_sources or "data_sources" not in result:
+        return result
+    compact = {key: value for key, value in result.items() if key != "data_sources"}
+    compact["sources"] = sorted(result["data_sources"])
+    return compact
 
 if __name__ == "__main__":
     # Test with a sample token
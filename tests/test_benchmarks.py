@@ -0,0 +1,52 @@
+import json
+
+from benchmarks.micro import CASES, compare, main, run
+
+
+def test_run_reports_throughput_latency_and_memory():
+    report = run(["ranker.score_all", "models.RankRow"], [1, 50])
+    assert set(report["results"]) == {
+        "ranker.score_all@1", "ranker.score_all@50", "models.RankRow@1", "models.RankRow@50",
+    }
+    result = report["results"]["models.RankRow@50"]
+    assert result["throughput_per_s"] > 0
+    assert 0 < result["latency_us"]["p50"] <= result["latency_us"]["p99"]
+    assert result["peak_memory_bytes"] > 0
+
+
+def test_every_case_runs_once():
+    report = run(list(CASES), [1], memory=False)
+    assert len(report["results"]) == len(CASES)
+
+
+def test_compare_flags_only_changes_beyond_threshold():
+    def result(throughput, p50, peak):
+        return {"throughput_per_s": throughput, "latency_us": {"p50": p50}, "peak_memory_bytes": peak}
+
+    baseline = {"results": {"a@1": result(1000, 10, 1000), "b@1": result(1000, 10, 1000)}}
+    current = {"results": {"a@1": result(950, 10.5, 1050), "b@1": result(800, 13, 2000), "c@1": result(1, 1, 1)}}
+    regressions = compare(baseline, current, threshold=0.10)
+    assert {(r.key, r.metric) for r in regressions} == {
+        ("b@1", "throughput_per_s"), ("b@1", "latency_us.p50"), ("b@1", "peak_memory_bytes"),
+    }
+
+
+def test_cli_writes_results_and_fails_on_regression(tmp_path):
+    output = tmp_path / "current.json"
+    assert main(["run", "--cases", "ranker.score_new", "--sizes", "10", "-o", str(output)]) == 0
+    report = json.loads(output.read_text())
+
+    baseline = tmp_path / "baseline.json"
+    report["results"]["ranker.score_new@10"]["throughput_per_s"] *= 10
+    baseline.write_text(json.dumps(report))
+    assert main(["compare", str(baseline), str(output)]) == 1
+
+
+def test_prompt_layouts_compare_tokens_and_latency():
+    from benchmarks.prompts import run as run_prompts
+
+    results = run_prompts(reports=4, prefill_ms=50, cache_min_tokens=0)
+    legacy, compact = results["legacy"], results["compact"]
+    assert compact["prompt_tokens_mean"] < legacy["prompt_tokens_mean"]
+    assert compact["static_prefix_tokens"] > legacy["static_prefix_tokens"]
+    assert compact["uncached_tokens_mean"] < legacy["uncached_tokens_mean"] / 2
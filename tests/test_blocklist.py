@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+
+from extractors.blocklist import Blocklist
+from extractors.negative_cache import NegativeCache
+from extractors.unified_extractor import UnifiedTokenExtractor
+
+LISTED = [f"Scam{i:05d}Mint" for i in range(2000)]
+
+
+def test_filter_hits_are_confirmed_exactly():
+    # A loose filter lets many clean addresses through to the exact check
+    blocklist = Blocklist(LISTED, fp_rate=0.2)
+    assert all(address in blocklist for address in LISTED)
+    assert not any(f"Clean{i}" in blocklist for i in range(5000))
+    stats = blocklist.stats()
+    assert stats["false_positives"] > 0
+    assert 0.1 < stats["fp_rate_observed"] < 0.3
+
+
+def test_memory_and_false_positive_rate_are_reported():
+    blocklist = Blocklist(LISTED)
+    stats = blocklist.stats()
+    assert stats["entries"] == 2000
+    # ~1.8 bytes of filter plus a 16-byte digest per entry
+    assert stats["bytes_per_entry"] < 20
+    assert stats["fp_rate_expected"] < 0.002
+    assert blocklist.measure_fp_rate(20_000) < 0.005
+
+
+def test_reload_rebuilds_from_file(tmp_path):
+    path = tmp_path / "blocklist.txt"
+    path.write_text("# scams\nMintA  honeypot\nDeployerB\n")
+    blocklist = Blocklist.from_file(str(path))
+    assert blocklist.blocked("Clean", "DeployerB") == "DeployerB"
+    path.write_text("MintC\n")
+    assert blocklist.reload()["entries"] == 1
+    assert "MintA" not in blocklist and "MintC" in blocklist
+
+
+
+def test_missing_blocklist_file_is_reported(monkeypatch, tmp_path, caplog):
+    from extractors.blocklist import _from_env
+
+    monkeypatch.setenv("DVM_BLOCKLIST_FILE", str(tmp_path / "typo.txt"))
+    blocklist = _from_env()
+    assert len(blocklist) == 0
+    assert any(r.levelname == "ERROR" and "typo.txt" in r.getMessage() for r in caplog.records)
+
+def test_blocklisted_tokens_skip_extraction_and_ranking(monkeypatch):
+    calls = []
+    extractor = UnifiedTokenExtractor(negative_cache=NegativeCache(), blocklist=Blocklist(["MintA"]))
+    extractor.providers = {name: (lambda address, context, name=name: calls.append(name)) for name in extractor.providers}
+    result = extractor.extract_all_data("MintA")
+    assert calls == [] and result["blocked"]
+    assert result["combined_data"]["degen_audit"]["is_honeypot"]
+
+    import app.api.server as server
+
+    extracted = []
+    monkeypatch.setattr(server, "BLOCKLIST", Blocklist(["MintA", "DeployerB"]))
+    monkeypatch.setattr(server, "extract_token_data",
+                        lambda address, fields=None, context=None: extracted.append(address) or {})
+    rows = [{"id": "MintA", "symbol": "A", "name": "A", "price_now": 1.0},
+            {"id": "MintB", "symbol": "B", "name": "B", "price_now": 1.0, "deployer": "DeployerB"},
+            {"id": "MintC", "symbol": "C", "name": "C", "price_now": 1.0}]
+    response = TestClient(server.app).post("/rank", json={"tab": "All", "rows": rows})
+    assert response.status_code == 200
+    assert extracted == ["MintC"]
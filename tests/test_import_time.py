@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+from benchmarks.import_time import budget_ms, heaviest, import_times
+
+LAZY = ["openai", "requests", "extractors.unified_extractor"]
+
+
+def test_server_import_leaves_heavy_dependencies_for_first_use():
+    code = ("import sys, app.api.server; "
+            f"print(','.join(m for m in {LAZY!r} if m in sys.modules))")
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ""
+
+
+def test_import_time_within_budget():
+    for module in ("app.api.server", "app.main"):
+        result = import_times(module)
+        assert result["total_ms"] <= budget_ms(), heaviest(result, 5)
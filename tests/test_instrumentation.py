@@ -0,0 +1,120 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.utils.instrumentation import PREFILTER_FAILURES, STAGE_SECONDS, Registry
+
+
+def test_registry_sums_shards_across_threads():
+    registry = Registry()
+
+    def work():
+        for _ in range(1000):
+            registry.inc(PREFILTER_FAILURES, ("age_gt_1h",))
+            registry.observe(STAGE_SECONDS, 0.003, ("provider", "birdeye"))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    registry.inc(PREFILTER_FAILURES, ("age_gt_1h",))
+
+    counters, histograms = registry.snapshot()
+    assert counters[(PREFILTER_FAILURES, ("age_gt_1h",))] == 4001
+    assert sum(histograms[(STAGE_SECONDS, ("provider", "birdeye"))][:-1]) == 4000
+    # Finished threads were folded into the retired shard
+    assert len(registry._shards) == 1
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    registry.observe(STAGE_SECONDS, 0.003, ("scoring", ""))
+    registry.observe(STAGE_SECONDS, 0.2, ("scoring", ""))
+    registry.inc(PREFILTER_FAILURES, ("lp_count_gt_1",), 2)
+    text = registry.render()
+    assert "# TYPE dvm_stage_duration_seconds histogram" in text
+    assert 'dvm_stage_duration_seconds_bucket{stage="scoring",le="0.005"} 1' in text
+    assert 'dvm_stage_duration_seconds_bucket{stage="scoring",le="+Inf"} 2' in text
+    assert 'dvm_stage_duration_seconds_count{stage="scoring"} 2' in text
+    assert 'dvm_prefilter_failures_total{check="lp_count_gt_1"} 2' in text
+
+
+def test_metrics_endpoint_counts_score_requests():
+    from app.api.server import app
+
+    client = TestClient(app)
+    token = {
+        "token_address": "Bad1111111111111111111111111111111111111111",
+        "token_symbol": "BAD",
+        "token_name": "Bad Example Token",
+        "token_age_minutes": 30,
+        "liquidity_locked_percent": 100.0,
+        "volume_5m_usd": 7000.0,
+        "holders_count": 200,
+        "lp_count": 1,
+        "lp_mcap_ratio": 0.015,
+        "top_10_holders_percent": 20.0,
+    }
+    assert client.post("/score", json={"token": token}).status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'dvm_prefilter_failures_total{check="age_gt_1h"}' in response.text
+    assert 'dvm_stage_duration_seconds_count{stage="prefilter"}' in response.text
+
+
+PASSING_TOKEN = {
+    "token_address": "So11111111111111111111111111111111111111112",
+    "token_symbol": "DVM",
+    "token_name": "DVM Example Token",
+    "token_age_minutes": 90,
+    "liquidity_locked_percent": 100.0,
+    "volume_5m_usd": 7250.0,
+    "holders_count": 358,
+    "lp_count": 3,
+    "lp_mcap_ratio": 0.045,
+    "top_10_holders_percent": 24.7,
+}
+
+
+def test_score_response_carries_server_timing():
+    from app.api.server import app
+
+    client = TestClient(app)
+    response = client.post("/score", json={"token": dict(PASSING_TOKEN)})
+    header = response.headers["server-timing"]
+    for stage in ("prefilter;dur=", "scoring;dur=", "report_wait;dur=", "total;dur="):
+        assert stage in header
+    assert response.json()["timings"] is None
+
+    timings = client.post("/score?timings=true", json={"token": dict(PASSING_TOKEN)}).json()["timings"]
+    assert set(timings["stages_ms"]) >= {"prefilter", "scoring", "report_wait"}
+    assert timings["total_ms"] >= timings["stages_ms"]["scoring"]
+
+
+def test_rank_timings_break_down_per_token(monkeypatch):
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+
+    import app.api.server as server
+    from app.utils.instrumentation import timed
+
+    def fake_extract(address, fields=None, context=None):
+        # Provider work in another thread reports into the request through a copied context
+        def provider():
+            with timed("provider", "dexscreener"):
+                pass
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(contextvars.copy_context().run, provider).result()
+        return {"data_sources": {}, "combined_data": {**PASSING_TOKEN, "token_address": address}}
+
+    monkeypatch.setattr(server, "extract_token_data", fake_extract)
+    rows = [{"id": address, "symbol": "A", "name": "A", "price_now": 1.0} for address in ("tokenA", "tokenB")]
+    response = TestClient(server.app).post("/rank?timings=true", json={"tab": "All", "rows": rows})
+    timings = response.json()["timings"]
+    assert set(timings["tokens"]) == {"tokenA", "tokenB"}
+    assert "provider.dexscreener" in timings["tokens"]["tokenA"]
+    assert "ranking" in timings["stages_ms"]
+    assert "ranking" not in timings["tokens"]["tokenB"]
+    assert "provider.dexscreener;dur=" in response.headers["server-timing"]
@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+
+from app.api.server import app
+from benchmarks.load import SCENARIOS, Scenario, parse_server_timing, run_scenario
+
+
+TOKENS = ["So11111111111111111111111111111111111111112"]
+
+
+def run(scenario: Scenario, **kwargs):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await run_scenario(client, scenario, TOKENS, **kwargs)
+    return asyncio.run(go())
+
+
+def test_closed_loop_scenario_reports_latency_and_errors():
+    summary = run(SCENARIOS["report-20"], requests=10)
+    assert summary["requests"] == 10
+    assert summary["error_rate"] == 0.0
+    assert summary["status"] == {"200": 10}
+    assert 0 < summary["latency_ms"]["p50"] <= summary["latency_ms"]["p99"]
+    assert sum(summary["histogram"].values()) == 10
+
+
+def test_open_loop_scenario_counts_failures():
+    scenario = Scenario("missing", "/does-not-exist", lambda rng, tokens: {}, rate=200)
+    summary = run(scenario, requests=5)
+    assert summary["requests"] == 5
+    assert summary["error_rate"] == 1.0
+    assert summary["status"] == {"404": 5}
+
+
+def test_parse_server_timing():
+    assert parse_server_timing('extract;dur=12.5;desc="Extract", score;dur=0.4, cache') == {
+        "extract": 12.5, "score": 0.4,
+    }
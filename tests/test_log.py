@@ -0,0 +1,70 @@
+import io
+import json
+import logging
+
+from app.utils.log import configure_logging, debug_token, get_logger, shutdown_logging, token_extra, token_sampled
+
+
+def test_token_sampling_is_deterministic_and_proportional():
+    tokens = [f"token{i}" for i in range(10_000)]
+    kept = [t for t in tokens if token_sampled(t, 0.1)]
+    assert 800 < len(kept) < 1200
+    assert kept == [t for t in tokens if token_sampled(t, 0.1)]
+    assert all(token_sampled(t, 1.0) for t in tokens[:10])
+
+
+def test_json_output_with_module_levels_and_sampling():
+    stream = io.StringIO()
+    configure_logging(level="INFO", modules="app.test_log.debug=DEBUG", fmt="json", sample_rate=0.5, stream=stream)
+    try:
+        quiet = get_logger("app.test_log.quiet")
+        verbose = get_logger("app.test_log.debug")
+        quiet.debug("hidden %s", "x")
+        quiet.info("shown %d", 1)
+        for i in range(200):
+            verbose.debug("token %s", i, extra=token_extra(f"tok{i}", score=i))
+    finally:
+        shutdown_logging()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records[0] == {**records[0], "level": "INFO", "logger": "app.test_log.quiet", "msg": "shown 1"}
+    debug = records[1:]
+    assert 50 < len(debug) < 150
+    assert all(r["token"] == f"tok{r['score']}" and token_sampled(r["token"], 0.5) for r in debug)
+
+
+def test_disabled_debug_does_not_format():
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted while disabled")
+
+    stream = io.StringIO()
+    configure_logging(level="INFO", modules="", fmt="text", stream=stream)
+    try:
+        logger = get_logger("app.test_log.lazy")
+        logger.debug("value %s", Exploding())
+        assert not debug_token(logger, "tok")
+    finally:
+        shutdown_logging()
+    assert stream.getvalue() == ""
+    logging.getLogger("app").setLevel(logging.INFO)
+
+
+def test_server_configures_logging_only_while_running(monkeypatch):
+    import logging.handlers
+
+    from fastapi.testclient import TestClient
+
+    import app.api.server as server
+    from app.ai.report_jobs import ReportJobQueue
+
+    # Shutdown stops the report workers; keep the shared queue for other tests
+    monkeypatch.setattr(server, "report_jobs", ReportJobQueue(lambda data: "ok"))
+
+    def queued():
+        return any(isinstance(h, logging.handlers.QueueHandler) for h in logging.getLogger("app").handlers)
+
+    assert not queued()
+    with TestClient(server.app):
+        assert queued()
+    assert not queued() and logging.getLogger("app").propagate
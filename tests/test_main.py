@@ -0,0 +1,58 @@
+import json
+
+from app.main import main
+
+
+TOKEN = {
+    "token_address": "So11111111111111111111111111111111111111112",
+    "token_symbol": "DVM",
+    "token_name": "DVM Example Token",
+    "token_age_minutes": 90,
+    "degen_audit": {"is_honeypot": False, "has_blacklist": False, "buy_tax_percent": 1.5, "sell_tax_percent": 2.0},
+    "liquidity_locked_percent": 100.0,
+    "volume_5m_usd": 7250.0,
+    "holders_count": 358,
+    "lp_count": 3,
+    "lp_mcap_ratio": 0.045,
+    "top_10_holders_percent": 24.7,
+    "bundle_percent": 20.0,
+}
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+
+def test_streaming_prefilter_across_workers(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    records = [dict(TOKEN, token_address=f"T{i}", token_age_minutes=30 if i % 3 == 0 else 90) for i in range(50)]
+    write_jsonl(src, records)
+    with src.open("a") as f:
+        f.write("{not json}\n")
+
+    code = main(["prefilter", str(src), "-o", str(out), "--workers", "2", "--chunk-size", "7"])
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert code == 1
+    assert [r["token_address"] for r in lines[:50]] == [f"T{i}" for i in range(50)]
+    assert sum(r["passed"] for r in lines[:50]) == 33
+    assert lines[50]["line"] == 51
+
+
+def test_streaming_rank_keeps_top_n(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(src, [{"id": f"R{i}", "symbol": "R", "name": "R", "price_now": 1.0, "mc_change_pct": i} for i in range(20)])
+    assert main(["rank", str(src), "-o", str(out), "--workers", "1", "--top", "3"]) == 0
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["id"] for r in rows] == ["R19", "R18", "R17"]
+
+
+def test_streaming_score_reports_non_object_lines(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    write_jsonl(src, [TOKEN, None, "x", [], dict(TOKEN, metrics=5)])
+
+    code = main(["score", str(src), "-o", str(out), "--workers", "1"])
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert code == 1
+    assert lines[0]["token_address"] == TOKEN["token_address"]
+    assert [r["line"] for r in lines[1:]] == [2, 3, 4, 5]
+    assert lines[1]["error"] == "expected a JSON object, got NoneType"
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.memory import memory_router
+from app.utils.memory import MemoryAccounting, deep_sizeof
+from app.utils.timeseries import TokenSeriesStore
+from extractors.unified_extractor import compact_result
+
+
+HEADERS = {"X-DVM-Profile": "secret"}
+_retained = []
+
+
+def test_deep_sizeof_counts_contents_once():
+    shared = "x" * 1000
+    assert deep_sizeof({"a": shared, "b": shared}) < deep_sizeof({"a": shared, "b": "y" * 1000})
+    assert deep_sizeof([list(range(100))]) > deep_sizeof([[]])
+
+
+def test_compact_result_drops_source_payloads():
+    payload = {"price_now": 1.0, "mc_now": 2.0, "pairs": [{"x": i} for i in range(50)]}
+    result = {"combined_data": {"price_now": 1.0, "mc_now": 2.0},
+              "data_sources": {"dexscreener": payload, "birdeye": {"price_now": 1.0}}}
+    compact = compact_result(result)
+    assert "data_sources" not in compact
+    assert compact["sources"] == ["birdeye", "dexscreener"]
+    assert deep_sizeof(compact) < deep_sizeof(result)
+    assert compact_result(result, include_sources=True) is result
+
+
+def test_memory_endpoint_reports_structures_and_growth():
+    accounting = MemoryAccounting()
+    store = TokenSeriesStore(capacity=8)
+    accounting.register("series_store", store.estimated_bytes)
+    store.record("tok", {"price_now": 1.0})
+
+    app = FastAPI()
+    app.include_router(memory_router("secret", accounting))
+    client = TestClient(app)
+    assert client.get("/admin/memory").status_code == 403
+
+    report = client.get("/admin/memory", headers=HEADERS).json()
+    assert report["structures_bytes"] == {"series_store": store.bytes_per_token}
+    assert report["tracing"] is False
+
+    try:
+        assert client.post("/admin/memory/tracing?frames=2", headers=HEADERS).json()["tracing"] is True
+        _retained.append([bytearray(1024) for _ in range(200)])
+        report = client.get("/admin/memory?diff=true&limit=5", headers=HEADERS).json()
+        assert report["traced_bytes"] > 200 * 1024
+        assert any("test_memory.py" in row["site"] and row["bytes_diff"] >= 200 * 1024 for row in report["top"])
+        assert client.get("/admin/memory?group_by=bogus", headers=HEADERS).status_code == 400
+    finally:
+        client.delete("/admin/memory/tracing", headers=HEADERS)
+        _retained.clear()
+    assert accounting.tracing is False
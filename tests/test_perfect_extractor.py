@@ -0,0 +1,23 @@
+from extractors.perfect_extractor import PerfectTokenExtractor
+from extractors.provider_sim import ProviderSimulator, SyntheticUniverse
+from extractors.tx_cursor import TransactionCursorStore
+
+
+def test_narrow_fields_match_a_full_extraction(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=3, transactions=150)
+    token = next(iter(universe.tokens))
+    monkeypatch.setenv("BIRDEYE_REQUEST_INTERVAL", "0")
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        full = PerfectTokenExtractor(tx_cursors=TransactionCursorStore()).extract_all_data(token)
+        narrow = {
+            field: PerfectTokenExtractor(tx_cursors=TransactionCursorStore()).extract_all_data(token, fields=[field])
+            for field in ("whale_buy_usd", "whale_buy_supply_percent", "inflow_over_mcap_percent")
+        }
+
+    assert full["scoring_data"]["whale_buy_usd"] > 0
+    for field, result in narrow.items():
+        assert result["scoring_data"][field] == full["scoring_data"][field]
+        # Birdeye supplies none of them
+        assert "birdeye" not in result["data_sources"]
@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.profiling import ProfileStore, install_profiling
+
+
+def busy_provider_call():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return 1
+
+
+def make_app(tmp_path, max_bytes=None):
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        with ThreadPoolExecutor(1) as pool:
+            return {"value": pool.submit(busy_provider_call).result()}
+
+    assert install_profiling(app, token="secret", directory=str(tmp_path), max_bytes=max_bytes)
+    return TestClient(app)
+
+
+def test_profiling_not_installed_without_token(monkeypatch):
+    monkeypatch.delenv("DVM_PROFILE_TOKEN", raising=False)
+    app = FastAPI()
+    assert install_profiling(app) is False
+    assert app.user_middleware == []
+
+
+def test_profiled_request_covers_worker_threads(tmp_path):
+    client = make_app(tmp_path)
+    assert "x-dvm-profile" not in client.get("/work").headers
+    assert client.get("/work", headers={"X-DVM-Profile": "wrong"}).headers.get("x-dvm-profile") is None
+
+    response = client.get("/work", headers={"X-DVM-Profile": "secret"})
+    name = response.headers["x-dvm-profile"]
+    assert name.endswith(".collapsed")
+
+    profile = client.get(f"/admin/profiles/{name}", headers={"X-DVM-Profile": "secret"})
+    assert profile.status_code == 200
+    assert "busy_provider_call" in profile.text
+    assert client.get(f"/admin/profiles/{name}").status_code == 403
+    listing = client.get("/admin/profiles", headers={"X-DVM-Profile": "secret"}).json()
+    assert [p["name"] for p in listing["profiles"]] == [name]
+
+
+def test_speedscope_format_via_query(tmp_path):
+    client = make_app(tmp_path)
+    # The token itself is never taken from the query string
+    assert client.get("/work?profile=secret").headers.get("x-dvm-profile") is None
+    name = client.get("/work?profile_format=speedscope", headers={"X-DVM-Profile": "secret"}).headers["x-dvm-profile"]
+    body = client.get(f"/admin/profiles/{name}", headers={"X-DVM-Profile": "secret"}).json()
+    assert body["profiles"][0]["type"] == "sampled"
+    assert any("busy_provider_call" in f["name"] for f in body["shared"]["frames"])
+
+
+def test_store_prunes_oldest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_bytes=250)
+    for i in range(5):
+        store.write(f"p{i}.collapsed", "x" * 100)
+        time.sleep(0.01)
+    assert [p["name"] for p in store.list()] == ["p4.collapsed", "p3.collapsed"]
+    assert store.path("../secret") is None
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.ai.batch import generate_reports
+from app.ai.client import AsyncOpenAIChatClient
+from app.ai.mock_chat_server import MockChatServer
+from app.ai.tokens import TokenBudget
+from app.ai.trench_report import TrenchInput, build_prompt
+
+
+def trench_input(symbol, total=70.0):
+    return TrenchInput(
+        token={"symbol": symbol, "name": symbol, "address": f"{symbol}111"},
+        prefilter={"passed": True},
+        scores={"total": total, "momentum": 25.0, "smart_money": 30.0, "sentiment": 5.0, "event": 10.0},
+        signals=["5m: vol/avg 2.1x"],
+        metrics={},
+        timeframe="multi",
+        as_of_utc="2025-08-08T12:00:00Z",
+    )
+
+
+def test_token_budget_reserves_in_call_order():
+    now = [0.0]
+    budget = TokenBudget(600, clock=lambda: now[0])  # 10 tokens per second
+    assert budget.reserve(500) == 0
+    assert budget.reserve(200) == 10.0  # 100 short
+    assert budget.reserve(50) == 15.0  # queued behind the previous reservation
+    now[0] = 15.0
+    assert budget.reserve(0) == 0
+
+
+def test_batch_caps_concurrency_against_mock_server():
+    with MockChatServer(latency="fixed:50") as server:
+        client = AsyncOpenAIChatClient(api_key="mock", base_url=server.url)
+        inputs = [trench_input(f"T{i}") for i in range(6)] + [trench_input("T0")]
+        results = asyncio.run(generate_reports(inputs, client, concurrency=2, max_tokens=100))
+
+    assert [r.token_address for r in results] == [f"T{i}111" for i in range(6)] + ["T0111"]
+    assert all(r.markdown == server.reply and r.error is None for r in results)
+    # The duplicate input was generated once
+    assert len(server.requests) == 6
+    assert server.max_in_flight == 2
+
+
+def test_batch_waits_on_token_budget():
+    per_request = build_prompt(trench_input("A")).tokens + 100
+    # Each request costs a quarter of a second of budget once the burst is spent
+    budget = TokenBudget(per_request * 240)
+    budget.reserve(per_request * 240)
+    with MockChatServer() as server:
+        client = AsyncOpenAIChatClient(api_key="mock", base_url=server.url)
+        started = time.perf_counter()
+        asyncio.run(generate_reports([trench_input("A"), trench_input("B")], client,
+                                     concurrency=2, budget=budget, max_tokens=100))
+        elapsed = time.perf_counter() - started
+    assert elapsed >= 0.4
+    assert server.total_tokens > 0
+
+
+def test_batch_endpoint_reuses_cached_reports():
+    import app.api.server as server
+
+    server.report_cache.clear()
+    client = TestClient(server.app)
+    request = {"reports": [
+        {"token_data": {"token_address": f"Batch{i}", "symbol": f"B{i}"}, "metrics": {}, "score": 50.0 + i * 10}
+        for i in range(3)
+    ]}
+    first = client.post("/report/batch", json=request).json()["reports"]
+    assert [r["token_address"] for r in first] == ["Batch0", "Batch1", "Batch2"]
+    assert all(r["text"] and not r["cached"] for r in first)
+    assert all(r["cached"] for r in client.post("/report/batch", json=request).json()["reports"])
+    assert client.post("/report/batch", json={"reports": request["reports"] * 17}).status_code == 422
+    server.report_cache.clear()
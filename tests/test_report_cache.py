@@ -0,0 +1,61 @@
+import asyncio
+
+from app.ai.report_cache import ReportCache
+from app.ai.report_jobs import DONE, ReportJobQueue
+from app.ai.trench_report import TrenchInput
+from app.utils.instrumentation import CACHE_REQUESTS, registry
+
+
+def trench_input(address="Tok111", total=81.0, holders=1234, as_of="2025-08-08T12:00:00Z"):
+    return TrenchInput(
+        token={"symbol": "TOK", "name": "Token", "address": address},
+        prefilter={"passed": True, "holders_count": holders},
+        scores={"total": total, "momentum": 30.0, "smart_money": 35.0},
+        signals=[],
+        metrics={"momentum": {"vol_over_avg_ratio": 2.13, "price_change_percent": 9.2}},
+        timeframe="multi",
+        as_of_utc=as_of,
+    )
+
+
+def test_near_identical_inputs_share_a_key():
+    cache = ReportCache(score_bucket=2.5)
+    base = cache.key(trench_input())
+    assert cache.key(trench_input(total=81.9, holders=1180, as_of="later")) == base
+    assert cache.key(trench_input(total=83.0)) != base  # next score bucket
+    assert cache.key(trench_input(holders=2500)) != base
+    assert cache.key(trench_input(address="Other1")) != base
+
+
+def test_ttl_and_lru_eviction():
+    cache = ReportCache(ttl=60, max_entries=2)
+    cache.put(trench_input("A"), "report A", now=1000)
+    cache.put(trench_input("B"), "report B", now=1000)
+    assert cache.get(trench_input("A"), now=1010) == "report A"
+    cache.put(trench_input("C"), "report C", now=1010)  # evicts B, the least recently used
+    assert cache.get(trench_input("B"), now=1010) is None
+    assert cache.get(trench_input("A"), now=1061) is None  # expired
+    assert cache.get(trench_input("C"), now=1061) == "report C"
+    assert len(cache) == 1
+    assert cache.estimated_bytes() > len("report C")
+
+
+def test_queue_serves_cached_reports_without_generating():
+    registry.reset()
+    calls = []
+
+    def generate(data):
+        calls.append(data.scores["total"])
+        return f"report {data.scores['total']}"
+
+    queue = ReportJobQueue(generate, cache=ReportCache())
+    first = asyncio.run(queue.wait(queue.submit(trench_input(total=81.0)), 5))
+    again = queue.submit(trench_input(total=81.4, as_of="later"))
+    assert again.status == DONE and again.id != first.id
+    assert again.markdown == first.markdown == "report 81.0"
+    assert queue.get(again.id) is again
+    assert calls == [81.0]
+
+    counters, _ = registry.snapshot()
+    assert counters[(CACHE_REQUESTS, ("report", "miss"))] == 1
+    assert counters[(CACHE_REQUESTS, ("report", "hit"))] == 1
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ai.report_jobs import DONE, ReportJobQueue, ReportQueueFull
+from app.ai.trench_report import TrenchInput
+
+
+def trench_input(symbol="DVM", total=80.0, as_of="2025-08-08T12:00:00Z"):
+    return TrenchInput(
+        token={"symbol": symbol, "name": symbol, "address": f"{symbol}111"},
+        prefilter={"passed": True},
+        scores={"total": total, "momentum": 30.0},
+        signals=[],
+        metrics={},
+        timeframe="multi",
+        as_of_utc=as_of,
+    )
+
+
+def test_identical_pending_jobs_are_deduplicated():
+    release = threading.Event()
+    calls = []
+
+    def generate(data):
+        calls.append(data.token["symbol"])
+        release.wait(5)
+        return f"report {data.token['symbol']}"
+
+    queue = ReportJobQueue(generate, max_concurrency=1)
+    first = queue.submit(trench_input(as_of="t1"))
+    assert queue.submit(trench_input(as_of="t2")) is first
+    other = queue.submit(trench_input("ABC"))
+    assert other is not first
+    release.set()
+
+    asyncio.run(queue.wait(other, 5))
+    assert first.status == other.status == DONE
+    assert queue.get(first.id).markdown == "report DVM"
+    assert calls == ["DVM", "ABC"]
+    # Finished jobs no longer absorb new requests
+    assert queue.submit(trench_input()) is not first
+
+
+def test_concurrency_and_pending_are_bounded():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def generate(data):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+        return "ok"
+
+    queue = ReportJobQueue(generate, max_concurrency=2, max_pending=6)
+    jobs = [queue.submit(trench_input(f"T{i}")) for i in range(6)]
+    with pytest.raises(ReportQueueFull):
+        queue.submit(trench_input("T6"))
+    for job in jobs:
+        asyncio.run(queue.wait(job, 5))
+    assert all(job.status == DONE for job in jobs)
+    assert max(peak) == 2
+
+
+def test_score_returns_report_id_and_inline_markdown():
+    from app.api.server import app
+
+    client = TestClient(app)
+    token = {
+        "token_address": "Good111111111111111111111111111111111111111",
+        "token_symbol": "GOOD",
+        "token_name": "Good Example Token",
+        "token_age_minutes": 90,
+        "liquidity_locked_percent": 100.0,
+        "volume_5m_usd": 9000.0,
+        "holders_count": 300,
+        "lp_count": 2,
+        "lp_mcap_ratio": 0.05,
+        "top_10_holders_percent": 10.0,
+    }
+    body = client.post("/score", json={"token": token}).json()
+    assert body["report_id"]
+    # The mock client's dynamic report fits in the inline wait budget
+    assert body["report_status"] == DONE
+    assert body["trench_report_markdown"]
+
+    report = client.get(f"/report/{body['report_id']}").json()
+    assert report["status"] == DONE
+    assert report["markdown"] == body["trench_report_markdown"]
+    assert client.get("/report/unknown").status_code == 404
+
+
+def test_report_returns_503_when_the_queue_is_full(monkeypatch):
+    import app.api.server as server
+
+    monkeypatch.setattr(server, "report_jobs", ReportJobQueue(lambda data: "ok", max_pending=0))
+    client = TestClient(server.app)
+    body = {"token_data": {"token_address": "Full111", "token_symbol": "FULL"}, "metrics": {}, "score": 50.0}
+    response = client.post("/report", json=body)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(server.REPORT_RETRY_AFTER_SECONDS)
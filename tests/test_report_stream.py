@@ -0,0 +1,60 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.ai.client import OpenAIChatClient
+
+
+class FakeStreamingClient:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    def complete(self, system_prompt, user_prompt, model, temperature, max_tokens):
+        raise AssertionError("streaming endpoint should not wait for the full completion")
+
+    def stream(self, system_prompt, user_prompt, model, temperature, max_tokens):
+        self.calls += 1
+        yield from self.chunks
+
+
+def parse_events(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_openai_client_streams_deltas():
+    def delta(text):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    client = OpenAIChatClient(api_key="test")
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: iter([delta("## Re"), delta(None), delta("port")]) if kwargs["stream"] else None)))
+    assert list(client.stream("system", "user", model="gpt-4o")) == ["## Re", "port"]
+
+
+def test_report_stream_forwards_chunks_and_caches_the_report(monkeypatch):
+    import app.api.server as server
+
+    fake = FakeStreamingClient(["## Stream", "ed rep", "ort"])
+    monkeypatch.setattr(server, "chat_client", fake)
+    server.report_cache.clear()
+    client = TestClient(server.app)
+    request = {"token_data": {"token_address": "Strm111", "symbol": "STRM"}, "metrics": {}, "score": 72.0}
+
+    response = client.post("/report/stream", json=request)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    assert [text["text"] for event, text in events if event == "chunk"] == ["## Stream", "ed rep", "ort"]
+    assert events[-1] == ("done", {"markdown": "## Streamed report", "cached": False})
+
+    # The assembled report is served from the cache, also to the non-streaming endpoint
+    events = parse_events(client.post("/report/stream", json=request).text)
+    assert events[-1] == ("done", {"markdown": "## Streamed report", "cached": True})
+    assert client.post("/report", json=request).json()["report"]["text"] == "## Streamed report"
+    assert fake.calls == 1
+    server.report_cache.clear()
@@ -0,0 +1,49 @@
+import random
+
+from extractors.perfect_extractor import PerfectTokenExtractor
+from extractors.provider_sim import ProviderSimulator, SyntheticUniverse
+from extractors.sketches import WalletSketch, accuracy
+from extractors.tx_cursor import TransactionCursorStore
+
+
+def skewed_wallets(transactions, wallets, seed=1):
+    rng = random.Random(seed)
+    return [f"w{int(wallets * rng.random() ** 3)}" for _ in range(transactions)]
+
+
+def test_sketch_stays_within_documented_error_bounds():
+    report = accuracy(skewed_wallets(100_000, 30_000))
+    sigma = 1.04 / 1024 ** 0.5
+    assert report["unique_wallets_error"] < 4 * sigma
+    assert report["dca_share_error"] < 3 * 0.5 / 128 ** 0.5
+    assert report["whale_recall"] == 1.0
+    assert report["sketch_bytes"] < 10_000 < report["exact_bytes"] / 100
+
+
+def test_sketch_memory_is_fixed():
+    sketch = WalletSketch()
+    for wallet in skewed_wallets(1_000, 500):
+        sketch.add(wallet)
+    small = sketch.nbytes()
+    for wallet in skewed_wallets(50_000, 20_000, seed=2):
+        sketch.add(wallet)
+    # Only the heavy hitters' wallet names can change length
+    assert abs(sketch.nbytes() - small) < 200
+
+
+def test_sketch_mode_matches_exact_mode_on_replayed_transactions(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=6, holders_cap=20_000, transactions=1500)
+    token = next(iter(universe.tokens))
+    monkeypatch.setenv("HELIUS_BACKFILL_PAGES", "100")
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        exact = PerfectTokenExtractor(tx_cursors=TransactionCursorStore(wallet_counts="exact")).get_helius_data(token)
+        sketched = PerfectTokenExtractor(tx_cursors=TransactionCursorStore(wallet_counts="sketch")).get_helius_data(token)
+        auto = PerfectTokenExtractor(tx_cursors=TransactionCursorStore(wallet_counts="auto", sketch_after=100)).get_helius_data(token)
+
+    assert not exact["_wallets_estimated"] and sketched["_wallets_estimated"] and auto["_wallets_estimated"]
+    for estimate in (sketched, auto):
+        assert estimate["_transfer_count"] == exact["_transfer_count"]
+        assert abs(estimate["_unique_wallets"] - exact["_unique_wallets"]) <= 0.1 * exact["_unique_wallets"]
+        assert abs(estimate["dca_accumulation_supply_percent"] - exact["dca_accumulation_supply_percent"]) < 15
@@ -0,0 +1,35 @@
+from app.utils.timeseries import TokenSeriesStore
+
+
+def snapshot(price, mc, holders, lp_mcap_ratio=0.05):
+    return {"price_now": price, "mc_now": mc, "vol_now": 100_000.0, "holders_count": holders, "lp_mcap_ratio": lp_mcap_ratio}
+
+
+def test_series_store_deltas_and_peaks():
+    store = TokenSeriesStore(capacity=4)
+    store.record("A", snapshot(1.0, 1_000_000, 200), timestamp=0)
+    m = store.record("A", snapshot(1.5, 1_500_000, 300, 0.06), timestamp=600)
+    assert m["samples"] == 2
+    assert m["mc_change_pct"] == 50.0
+    assert m["holders_growth_percent"] == 50.0
+    assert round(m["lp_mcap_delta_percent"], 6) == 20.0
+    assert m["ath_hit"] is True
+    assert m["minutes_since_peak"] == 0.0
+
+    m = store.record("A", snapshot(1.2, 1_200_000, 300), timestamp=1200)
+    assert m["ath_hit"] is False
+    assert m["minutes_since_peak"] == 10.0
+
+
+def test_series_store_ring_wraps_and_evicts():
+    store = TokenSeriesStore(capacity=3, max_tokens=2)
+    for i in range(5):
+        m = store.record("A", snapshot(1.0, 1_000 * (i + 1), 100), timestamp=i * 60)
+    # Only the last three samples remain: mc 3000 -> 5000
+    assert m["samples"] == 3
+    assert round(m["mc_change_pct"], 6) == round(2000 / 3000 * 100, 6)
+
+    store.record("B", snapshot(1.0, 1.0, 1))
+    store.record("C", snapshot(1.0, 1.0, 1))
+    assert "A" not in store and len(store) == 2
+    assert store.estimated_bytes() == 2 * store.bytes_per_token
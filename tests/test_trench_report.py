@@ -1,5 +1,8 @@
+import pytest
+
 from app.ai.client import MockChatClient
-from app.ai.trench_report import TrenchInput, generate_trench_report
+from app.ai.tokens import estimate_tokens
+from app.ai.trench_report import STATIC_PREFIX, TrenchInput, build_prompt, generate_trench_report
 
 
 def test_trench_report_builds_and_calls_client():
@@ -17,3 +20,46 @@ def test_trench_report_builds_and_calls_client():
     assert out.startswith("# Report")
 
 
+
+
+def _input(symbol="DVM", signals=None):
+    return TrenchInput(
+        token={"symbol": symbol, "name": "Deep Value Memetics", "address": "So111..."},
+        prefilter={"passed": True},
+        scores={"momentum": 30.0, "smart_money": 35.0, "sentiment": 8.0, "event": 10.0, "total": 83.0},
+        signals=signals if signals is not None else ["5m: vol/avg 2.1x", "5m: price +9.2%"],
+        metrics={},
+        timeframe="multi",
+        as_of_utc="2025-08-08T12:34:56Z",
+    )
+
+
+def test_prompt_keeps_static_prefix_and_compact_data():
+    first, second = build_prompt(_input("DVM")), build_prompt(_input("ABC"))
+    # Everything token-specific is in the user message, after an identical system message
+    assert first.system == second.system == STATIC_PREFIX
+    assert "$DVM" not in first.system
+    assert first.user.splitlines() == [
+        "TOKEN $DVM (Deep Value Memetics)",
+        "SCORE 83/100 | Smart Money | micro-cap | low volume",
+        "BREAKDOWN 30 35 8 10",
+        "SIGNALS 5m: vol/avg 2.1x; 5m: price +9.2%",
+    ]
+
+
+def test_prompt_budget_drops_signals_then_fails():
+    base = build_prompt(_input(signals=[])).tokens
+    trimmed = build_prompt(_input(signals=["x" * 400, "y" * 400]), budget=base + 120)
+    assert trimmed.tokens <= base + 120
+    assert "x" * 400 in trimmed.user and "y" * 400 not in trimmed.user
+    with pytest.raises(ValueError):
+        build_prompt(_input(), budget=estimate_tokens(STATIC_PREFIX))
+
+
+def test_prompt_clips_long_symbol_and_name_instead_of_failing():
+    data = _input(symbol="S" * 5000)
+    data.token["name"] = "N" * 5000
+    prompt = build_prompt(data)
+    assert prompt.user.splitlines()[0] == f"TOKEN ${'S' * 16} ({'N' * 40})"
+    tight = build_prompt(data, budget=estimate_tokens(STATIC_PREFIX) + 30)
+    assert tight.user.splitlines()[0] == f"TOKEN ${'S' * 8} ({'N' * 8})"
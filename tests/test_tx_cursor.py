@@ -0,0 +1,89 @@
+from collections import Counter
+
+from extractors.perfect_extractor import PerfectTokenExtractor
+from extractors.provider_sim import ProviderSimulator, SyntheticUniverse
+from extractors.tx_cursor import TransactionCursorStore
+
+
+def exact_activity(universe, token):
+    _, transactions = universe.respond("helius", f"/v0/addresses/{token}/transactions", {"limit": "100000"})
+    wallets = Counter(tx["feePayer"] for tx in transactions)
+    return {
+        "_transactions_seen": len(transactions),
+        "_transfer_count": sum(tx["type"] == "TRANSFER" for tx in transactions),
+        "_unique_wallets": len(wallets),
+        "dca_accumulation_supply_percent": sum(c >= 3 for c in wallets.values()) / len(wallets) * 100,
+    }
+
+
+def test_repeat_analyses_fetch_only_new_transactions(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=4, transactions=250)
+    token = next(iter(universe.tokens))
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        extractor = PerfectTokenExtractor(tx_cursors=TransactionCursorStore())
+
+        def analyse():
+            before = extractor.tx_reader.requests
+            data = extractor.get_helius_data(token)
+            return data, extractor.tx_reader.requests - before
+
+        # Newest page, then the backfill walks back through the other 150
+        data, requests = analyse()
+        assert requests == 3 and data["_history_complete"]
+        assert {k: data[k] for k in exact_activity(universe, token)} == exact_activity(universe, token)
+
+        # Nothing new: one request that comes back empty
+        assert analyse()[1] == 1
+
+        universe.add_transactions(token, 150)
+        data, requests = analyse()
+        assert requests == 2
+        assert {k: data[k] for k in exact_activity(universe, token)} == exact_activity(universe, token)
+
+
+def test_backfill_is_spread_over_calls(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=4, transactions=450)
+    token = next(iter(universe.tokens))
+    monkeypatch.setenv("HELIUS_BACKFILL_PAGES", "1")
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        extractor = PerfectTokenExtractor(tx_cursors=TransactionCursorStore())
+        seen = [extractor.get_helius_data(token)["_transactions_seen"] for _ in range(4)]
+    assert seen == [200, 300, 400, 450]
+
+
+def test_burst_beyond_new_page_cap_restarts_from_the_newest(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=4, transactions=120)
+    token = next(iter(universe.tokens))
+    monkeypatch.setenv("HELIUS_MAX_NEW_PAGES", "2")
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        extractor = PerfectTokenExtractor(tx_cursors=TransactionCursorStore())
+        extractor.get_helius_data(token)
+        universe.add_transactions(token, 250)
+        # Two new pages don't reach the cursor; the counts restart and the backfill recounts the rest
+        data = extractor.get_helius_data(token)
+    assert data["_history_complete"]
+    assert {k: data[k] for k in exact_activity(universe, token)} == exact_activity(universe, token)
+
+
+def test_whale_metrics_come_from_whale_wallet_activity(monkeypatch):
+    universe = SyntheticUniverse(size=1, seed=4, transactions=250)
+    token = next(iter(universe.tokens))
+    _, transactions = universe.respond("helius", f"/v0/addresses/{token}/transactions", {"limit": "100000"})
+    wallets = Counter(tx["feePayer"] for tx in transactions)
+    whale_transactions = sum(c for c in wallets.values() if c >= 0.02 * len(transactions))
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        result = PerfectTokenExtractor(tx_cursors=TransactionCursorStore()).extract_all_data(token, fields=["whale_buy_usd"])
+
+    assert whale_transactions > 0
+    assert result["data_sources"]["helius"]["_whale_transactions"] == whale_transactions
+    # No supply known: 50M tokens per whale transaction
+    expected = whale_transactions * 50_000_000 * result["pre_filter_data"]["price_now"]
+    assert abs(result["scoring_data"]["whale_buy_usd"] - expected) < 1e-6 * expected
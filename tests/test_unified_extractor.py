@@ -0,0 +1,352 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from extractors.context import ExtractionContext
+from extractors.negative_cache import NegativeCache
+from extractors.unified_extractor import UnifiedTokenExtractor
+
+
+TOKEN = "So11111111111111111111111111111111111111112"
+
+
+def make_extractor(calls: list, price: float = 2.0) -> UnifiedTokenExtractor:
+    extractor = UnifiedTokenExtractor(negative_cache=NegativeCache())
+
+    def dexscreener(address, context):
+        calls.append("dexscreener")
+        return {
+            "token_symbol": "DVM",
+            "token_name": "DVM Example Token",
+            "price_now": price,
+            "mc_now": 1_000_000.0,
+            "vol_now": 250_000.0,
+            "lp_now": 50_000.0,
+            "holders_count": 500,
+        }
+
+    def birdeye(address, context):
+        calls.append("birdeye")
+        return {"price_change_1h_percent": 4.2}
+
+    extractor.providers = {
+        "dexscreener": dexscreener,
+        "jupiter": lambda address, context: calls.append("jupiter"),
+        "birdeye": birdeye,
+        "helius": lambda address, context: calls.append("helius"),
+    }
+    return extractor
+
+
+def test_extraction_records_field_provenance():
+    result = make_extractor([]).extract_all_data(TOKEN)
+    provenance = result["field_provenance"]
+    assert provenance["price_now"]["source"] == "dexscreener"
+    assert provenance["price_change_1h_percent"]["source"] == "birdeye"
+    assert provenance["vol_to_mc"]["source"] == "derived"
+    assert provenance["bundle_percent"]["source"] == "default"
+
+
+def test_refresh_refetches_only_stale_providers():
+    result = make_extractor([]).extract_all_data(TOKEN)
+    fetched_at = result["field_provenance"]["price_now"]["fetched_at"]
+
+    calls = []
+    extractor = make_extractor(calls, price=4.0)
+    # Nothing is stale yet
+    extractor.refresh(result, now=fetched_at + 1)
+    assert calls == []
+
+    # Price went stale: only DexScreener is called again
+    extractor.refresh(result, fields=["price_now"], now=fetched_at + 31)
+    assert calls == ["dexscreener"]
+    assert result["combined_data"]["price_now"] == 4.0
+    assert result["combined_data"]["supply_now"] == 250_000.0
+
+
+def test_narrow_extraction_skips_unneeded_providers():
+    calls = []
+    result = make_extractor(calls).extract_all_data(TOKEN, fields=["vol_to_mc"])
+    assert calls == ["dexscreener"]
+    assert result["combined_data"]["vol_to_mc"] == 0.25
+    # Derived variables nobody asked for are not computed
+    assert "holders_per_mc" not in result["combined_data"]
+
+
+def test_demo_mode_is_per_extraction():
+    extractor = make_extractor([])
+    extractor.providers = {name: (lambda address, context: None) for name in extractor.providers}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda demo: extractor.extract_all_data(TOKEN, context=ExtractionContext(demo_mode=demo)),
+            [True, False] * 8,
+        ))
+    assert [r["combined_data"]["token_symbol"] for r in results] == ["DEMO", "UNKNOWN"] * 8
+    assert "DVM_DEMO_MODE" not in os.environ
+
+
+def test_providers_past_the_deadline_are_abandoned():
+    calls = []
+    extractor = make_extractor(calls)
+
+    def slow(address, context):
+        time.sleep(1.0)
+        return {"jupiter_price": 1.0}
+
+    extractor.providers["jupiter"] = slow
+    started = time.monotonic()
+    result = extractor.extract_all_data(TOKEN, context=ExtractionContext.create(timeout=0.2))
+    assert time.monotonic() - started < 0.8
+    assert "jupiter" not in result["data_sources"]
+    assert result["combined_data"]["price_now"] == 2.0
+
+
+def test_refresh_policy_refetches_fresh_providers():
+    result = make_extractor([]).extract_all_data(TOKEN)
+    calls = []
+    make_extractor(calls, price=3.0).refresh(result, fields=["price_now"],
+                                             context=ExtractionContext(cache_policy="refresh"))
+    assert calls == ["dexscreener"]
+    assert result["combined_data"]["price_now"] == 3.0
+
+
+def test_extract_endpoint_runs_requests_in_parallel_with_their_own_context(monkeypatch):
+    import threading
+
+    from fastapi.testclient import TestClient
+
+    import app.api.server as server
+
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_extract(address, fields=None, context=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        with lock:
+            active[0] -= 1
+        return {"combined_data": {"token_symbol": "DEMO" if context.demo_mode else "UNKNOWN"},
+                "tier": context.tier}
+
+    monkeypatch.setattr(server, "extract_token_data", fake_extract)
+    monkeypatch.setattr(server, "_record_history", lambda address, result: None)
+    client = TestClient(server.app)
+    requests = [{"token_address": f"T{i}", "demo_mode": i % 2 == 0, "tier": "fast"} for i in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda body: client.post("/extract", json=body).json(), requests))
+    assert [r["data"]["combined_data"]["token_symbol"] for r in responses] == ["DEMO", "UNKNOWN"] * 2
+    assert all(r["data"]["tier"] == "fast" for r in responses)
+    assert peak[0] > 1
+    assert "DVM_DEMO_MODE" not in os.environ
+
+
+def test_not_found_addresses_skip_providers_with_growing_ttl():
+    now = [0.0]
+    cache = NegativeCache(ttl=30, max_ttl=100, clock=lambda: now[0])
+    calls = []
+    extractor = make_extractor(calls)
+    extractor.negative_cache = cache
+    extractor.providers = {name: (lambda address, context, name=name: calls.append(name)) for name in extractor.providers}
+
+    first = extractor.extract_all_data(TOKEN)
+    assert len(calls) == 4 and first["combined_data"]["token_symbol"] == "UNKNOWN"
+    calls.clear()
+    again = extractor.extract_all_data(TOKEN, context=ExtractionContext(demo_mode=True))
+    assert calls == [] and again["not_found_cached"]
+    assert again["combined_data"]["token_symbol"] == "DEMO"
+
+    # Expired: providers are asked again, and the next empty answer is cached for longer
+    now[0] = 31
+    extractor.extract_all_data(TOKEN)
+    assert len(calls) == 4
+    assert cache.add(TOKEN) == 100  # 30, 60, then capped at max_ttl
+
+
+def test_found_token_clears_not_found_entry():
+    cache = NegativeCache()
+    cache.add(TOKEN)
+    extractor = make_extractor([])
+    extractor.negative_cache = cache
+    result = extractor.extract_all_data(TOKEN, context=ExtractionContext(cache_policy="refresh"))
+    assert result["combined_data"]["token_symbol"] == "DVM"
+    assert not cache.get(TOKEN)
+
+
+
+def test_partial_helius_holder_count_is_only_a_lower_bound():
+    def holders(helius):
+        extractor = make_extractor([])
+        extractor.providers["helius"] = lambda address, context: helius
+        return extractor.extract_all_data(TOKEN)["combined_data"]["holders_count"]
+
+    # DexScreener estimates 500 holders
+    assert holders({"holders_count": 120, "_helius_available": True}) == 120
+    assert holders({"holders_count": 120, "_holders_partial": True}) == 500
+    assert holders({"holders_count": 900, "_holders_partial": True}) == 900
+
+def test_holder_stats_match_a_full_sort():
+    import random
+
+    rng = random.Random(5)
+    accounts = [{"amount": rng.paretovariate(1.1) if rng.random() > 0.1 else 0} for _ in range(20_000)]
+    metrics = make_extractor([]).calculate_holder_metrics(iter(accounts))
+    amounts = sorted((a["amount"] for a in accounts if a["amount"] > 0), reverse=True)
+    assert metrics["holders_count"] == len(amounts)
+    assert abs(metrics["top_10_holders_percent"] - sum(amounts[:10]) / sum(amounts) * 100) < 1e-9
+
+
+def test_helius_holders_are_paged(monkeypatch):
+    import requests
+
+    from extractors.provider_sim import ProviderSimulator, SyntheticUniverse
+
+    universe = SyntheticUniverse(size=3, seed=2, holders_cap=3000)
+    token = max(universe.tokens, key=lambda t: universe.tokens[t]["holders"])
+    monkeypatch.setenv("HELIUS_PAGE_SIZE", "250")
+    with ProviderSimulator(universe=universe) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        data = UnifiedTokenExtractor().get_helius_data(token)
+        everything = requests.get(f"{sim.url}/v0/token-accounts", params={"mint": token}).json()
+        # Stats are recorded after each response is sent, so the last one may not be counted yet
+        pages = sim.stats["helius"]["requests"]
+
+    amounts = sorted((a["amount"] for a in everything), reverse=True)
+    assert pages >= len(amounts) // 250
+    assert data["holders_count"] == len(amounts)
+    assert abs(data["top_10_holders_percent"] - sum(amounts[:10]) / sum(amounts) * 100) < 1e-9
+
+
+def test_failed_provider_does_not_mark_token_not_found(monkeypatch):
+    from extractors.provider_sim import FaultProfile, ProviderSimulator, SyntheticUniverse
+
+    unknown = "Unknown1111111111111111111111111111111111111"
+    with ProviderSimulator(universe=SyntheticUniverse(size=1), faults={"dexscreener": FaultProfile(error_5xx=1.0)}) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        cache = NegativeCache()
+        extractor = UnifiedTokenExtractor(negative_cache=cache)
+        result = extractor.extract_all_data(unknown)
+        assert result["combined_data"]["token_symbol"] == "UNKNOWN"
+        # DexScreener answered 503, so an empty answer from the others proves nothing
+        assert not cache.get(unknown)
+
+        sim.faults.clear()
+        extractor.extract_all_data(unknown)
+    assert cache.get(unknown)
+
+
+
+def test_unconfigured_providers_do_not_block_not_found_cache(monkeypatch, caplog):
+    import logging
+
+    from extractors.provider_sim import ProviderSimulator, SyntheticUniverse
+
+    unknown = "Unknown1111111111111111111111111111111111111"
+    with ProviderSimulator(universe=SyntheticUniverse(size=1)) as sim:
+        for var, value in sim.env().items():
+            monkeypatch.setenv(var, value)
+        monkeypatch.delenv("BIRDEYE_API_KEY")
+        monkeypatch.delenv("HELIUS_API_KEY")
+        cache = NegativeCache()
+        extractor = UnifiedTokenExtractor(negative_cache=cache)
+        with caplog.at_level(logging.WARNING):
+            result = extractor.extract_all_data(unknown)
+    assert result["combined_data"]["token_symbol"] == "UNKNOWN"
+    # Birdeye and Helius were never asked, the configured providers both said not found
+    assert cache.get(unknown)
+    assert not caplog.records
+
+def test_recent_tokens_are_refreshed_instead_of_extracted_again():
+    from app.utils.instrumentation import CACHE_REQUESTS, registry
+    from extractors.result_cache import ExtractionCache
+
+    now = [0.0]
+    calls = []
+    extractor = make_extractor(calls)
+    extractor.results = ExtractionCache(max_age=300, clock=lambda: now[0])
+
+    first = extractor.extract(TOKEN)
+    assert sorted(calls) == ["birdeye", "dexscreener", "helius", "jupiter"]
+
+    # Every provider is still within its TTL: no provider traffic at all
+    calls.clear()
+    hits = registry.snapshot()[0].get((CACHE_REQUESTS, ("provider_ttl", "hit")), 0)
+    again = extractor.extract(TOKEN)
+    assert calls == [] and again["combined_data"]["price_now"] == first["combined_data"]["price_now"]
+    assert registry.snapshot()[0][(CACHE_REQUESTS, ("provider_ttl", "hit"))] > hits
+
+    # DexScreener's fields went stale: only DexScreener is asked again
+    for meta in extractor.results._entries[TOKEN][0]["field_provenance"].values():
+        if meta["source"] == "dexscreener":
+            meta["fetched_at"] -= 31
+    extractor.extract(TOKEN)
+    assert calls == ["dexscreener"]
+
+    # A narrow entry doesn't serve a wider request, and old entries get a full extraction
+    calls.clear()
+    extractor.extract("Narrow1111111111111111111111111111111111111", fields=["vol_to_mc"])
+    extractor.extract("Narrow1111111111111111111111111111111111111")
+    assert calls[0] == "dexscreener" and len(calls) == 5
+    calls.clear()
+    now[0] = 301
+    extractor.extract(TOKEN)
+    assert len(calls) == 4
+
+
+
+def test_results_cut_short_by_the_deadline_are_not_cached():
+    from extractors.result_cache import ExtractionCache
+
+    calls = []
+    extractor = make_extractor(calls)
+    extractor.results = ExtractionCache()
+
+    def slow(address, context):
+        time.sleep(0.5)
+        calls.append("jupiter")
+        return {"jupiter_price": 1.0}
+
+    extractor.providers["jupiter"] = slow
+    first = extractor.extract(TOKEN, context=ExtractionContext.create(timeout=0.1))
+    assert first["missing_sources"] == ["jupiter"]
+    assert len(extractor.results) == 0
+
+    again = extractor.extract(TOKEN)
+    assert again["combined_data"]["jupiter_price"] == 1.0
+    assert "missing_sources" not in again and len(extractor.results) == 1
+
+def test_rank_extracts_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    import httpx
+
+    import app.api.server as server
+
+    active, peak, lock, contexts = [0], [0], threading.Lock(), []
+
+    def fake_extract(address, fields=None, context=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            contexts.append(context)
+        time.sleep(0.2)
+        with lock:
+            active[0] -= 1
+        return {"combined_data": {}}
+
+    monkeypatch.setattr(server, "extract_token_data", fake_extract)
+    body = {"tab": "All", "rows": [{"id": "R1", "symbol": "R", "name": "R", "price_now": 1.0}]}
+
+    async def rank_concurrently():
+        # One event loop for all requests, as under uvicorn
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/rank", json=body) for _ in range(3)))
+        return [r.status_code for r in responses]
+
+    assert asyncio.run(rank_concurrently()) == [200] * 3
+    assert peak[0] > 1
+    assert all(c.fields == tuple(server.RANK_FIELDS) for c in contexts)
@@ -0,0 +1,39 @@
+from app.utils.volume_window import VolumeWindowAggregator
+
+
+def test_first_sample_matches_24h_average_estimate():
+    agg = VolumeWindowAggregator()
+    agg.add_sample("A", 6_000.0, 300, volume_24h_usd=288_000.0, timestamp=0)
+    ratios = agg.ratios("A")
+    # Same estimate the extractor used: 5m volume over the average 5m of 24h
+    assert round(ratios["5m"], 6) == round(6_000.0 / (288_000.0 / 288), 6)
+    assert ratios["1h"] is None
+    assert round(agg.momentum_fields("A", "1h")["vol_over_avg_ratio"], 6) == round(ratios["5m"], 6)
+
+
+def test_rolling_windows_from_minute_buckets():
+    agg = VolumeWindowAggregator(history_minutes=120)
+    for minute in range(120):
+        agg.add_minute_volume("A", 100.0, timestamp=minute * 60)
+    assert agg.ratios("A") == {"5m": 1.0, "15m": 1.0, "30m": 1.0, "1h": 1.0}
+
+    # A 5 minute spike at 10x the usual volume
+    for minute in range(120, 125):
+        agg.add_minute_volume("A", 1_000.0, timestamp=minute * 60)
+    ratios = agg.ratios("A")
+    assert ratios["5m"] > ratios["15m"] > ratios["1h"] > 1.0
+    assert len(agg) == 1 and agg.estimated_bytes() == agg.bytes_per_token
+
+
+def test_gap_longer_than_history_starts_over():
+    agg = VolumeWindowAggregator()
+    for minute in range(50):
+        agg.add_minute_volume("A", 1_000.0, timestamp=minute * 60)
+    for minute in range(650, 800):
+        agg.add_minute_volume("A", 100.0, timestamp=minute * 60)
+        agg.add_minute_volume("B", 100.0, timestamp=minute * 60)
+    assert agg.ratios("A") == agg.ratios("B") == {"5m": 1.0, "15m": 1.0, "30m": 1.0, "1h": 1.0}
+
+    agg.add_sample("A", 500.0, 300, volume_24h_usd=144_000.0, timestamp=2_000 * 60)
+    agg.add_sample("C", 500.0, 300, volume_24h_usd=144_000.0, timestamp=2_000 * 60)
+    assert agg.ratios("A") == agg.ratios("C")